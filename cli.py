@@ -0,0 +1,247 @@
+"""无界面批量下载入口（适用于 cron / 无显示器的服务器）。
+
+用法:
+    python cli.py run [--sources fred bls ...] [--year 2020] [--workers 4] [--csv] [--all]
+                      [--summary run_summary.json] [--config request_id.json] [--headed]
+    python cli.py plan [--sources ...] [--year 2020]     # 仅列出当前到期的序列
+    python cli.py reprocess [--sources fred bls bea te] [--workers 4]   # 从原始归档离线重建
+
+- 只读取一次 `request_id.json`，所有数据源通过与 GUI 并行模式相同的
+  `worker_pool.WorkerPool` 并发执行；
+- 结束后写出 JSON 运行摘要（每个数据源的耗时、写入行数与失败原因）；
+- 默认只下载刷新计划器（`refresh_planner.py`）判定到期的序列，`--all` 强制全量；
+- 浏览器类数据源一律以无头模式启动 Chrome（无显示器时也能运行），`--headed` 显示浏览器窗口；
+- 不导入 PySide6；重量级依赖只在 worker 进程中加载，本进程启动保持在一秒以内。
+
+退出码：
+    0  全部成功
+    1  部分数据源失败
+    2  参数错误
+    3  读取 request_id.json 失败
+    4  全部数据源失败
+    130 被用户中断（Ctrl+C）
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from logging_config import start_logging, stop_logging
+from refresh_planner import RefreshPlanner
+from request_config import _load_json_raw
+
+EXIT_OK = 0
+EXIT_PARTIAL = 1
+EXIT_USAGE = 2
+EXIT_CONFIG = 3
+EXIT_ALL_FAILED = 4
+EXIT_INTERRUPTED = 130
+
+# 与 DownloaderFactory 注册表保持一致；此处静态列出以避免在主进程导入下载器
+KNOWN_SOURCES = ("bea", "yf", "fred", "bls", "te", "ism", "fw", "dfm", "nyf", "cin", "em", "fs")
+
+logger = logging.getLogger("cli")
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="cli.py", description="Macro Dashboard headless batch refresh")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="download sources into data.db")
+    run.add_argument("--sources", nargs="+", metavar="SOURCE", help=f"sources to run (default: all configured), choices: {', '.join(KNOWN_SOURCES)}")
+    run.add_argument("--year", type=int, default=2020, help="start year of the request (default: 2020)")
+    run.add_argument("--workers", type=int, default=None, help="worker processes (default: POOL_WORKERS or min(4, cpu))")
+    run.add_argument("--csv", action="store_true", help="also export time series to csv/")
+    run.add_argument("--summary", default="run_summary.json", help="path of the JSON run summary (default: run_summary.json)")
+    run.add_argument("--config", default="request_id.json", help="request config path (default: request_id.json)")
+    run.add_argument("--all", action="store_true", help="ignore the refresh plan and download every series")
+    run.add_argument("--headed", action="store_true", help="show browser windows (default: headless Chrome)")
+
+    plan = sub.add_parser("plan", help="print the series that are due for refresh")
+    plan.add_argument("--sources", nargs="+", metavar="SOURCE")
+    plan.add_argument("--year", type=int, default=2020)
+    plan.add_argument("--config", default="request_id.json")
+
+    rep = sub.add_parser("reprocess", help="rebuild data.db from the raw payload archive (no network)")
+    rep.add_argument("--sources", nargs="+", metavar="SOURCE", help="sources to rebuild (default: bea bls fred te)")
+    rep.add_argument("--workers", type=int, default=None, help="parser processes (default: POOL_WORKERS or min(4, cpu))")
+    return parser
+
+
+def _resolve_sources(requested: Optional[List[str]], json_data: Dict[str, Any]) -> List[str]:
+    if not requested:
+        return [s for s in KNOWN_SOURCES if isinstance(json_data.get(s), dict)]
+    unknown = [s for s in requested if s.lower() not in KNOWN_SOURCES]
+    if unknown:
+        raise ValueError(f"unknown sources: {', '.join(unknown)}")
+    return [s.lower() for s in requested]
+
+
+def _write_summary(path: str, summary: Dict[str, Any]) -> None:
+    try:
+        Path(path).write_text(json.dumps(summary, indent=2, ensure_ascii=False), encoding="utf-8")
+    except Exception as e:
+        logger.error("Failed to write run summary %s: %s", path, e)
+
+
+def _sum_cache_stats(entries: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """汇总各 worker 回传的 HTTP 缓存统计。"""
+
+    total: Dict[str, Any] = {}
+    for e in entries:
+        for k, v in (e.get("http_cache") or {}).items():
+            if k != "hit_ratio":
+                total[k] = total.get(k, 0) + v
+    lookups = total.get("hits", 0) + total.get("misses", 0) + total.get("revalidated", 0)
+    total["hit_ratio"] = round((total.get("hits", 0) + total.get("revalidated", 0)) / lookups, 3) if lookups else 0.0
+    return total
+
+
+def cmd_run(args: argparse.Namespace) -> int:
+    json_data = _load_json_raw(Path(args.config))
+    if not isinstance(json_data, dict):
+        return EXIT_CONFIG
+    try:
+        sources = _resolve_sources(args.sources, json_data)
+    except ValueError as e:
+        logger.error("%s", e)
+        return EXIT_USAGE
+    if not sources:
+        logger.error("No sources to run.")
+        return EXIT_USAGE
+
+    if args.workers is not None and args.workers <= 0:
+        logger.error("--workers must be a positive integer")
+        return EXIT_USAGE
+
+    # worker 进程继承本进程的环境变量（load_dotenv 不覆盖已有值），须在进程池启动前设置
+    if args.headed:
+        os.environ["BROWSER_HEADLESS"] = "false"
+    else:
+        os.environ.setdefault("BROWSER_HEADLESS", "true")
+
+    from worker_pool import SourceJob, WorkerPool, default_pool_size
+
+    planner = RefreshPlanner()
+    run_json = json_data
+    if not args.all:
+        run_json, due = planner.plan(json_data, sources, args.year)
+        skipped = [s for s in sources if s not in due]
+        if skipped:
+            logger.info("Up to date, skipped: %s", ", ".join(skipped))
+        sources = [s for s in sources if s in due]
+
+    def on_event(event: str, job: Any, payload: Dict[str, Any]) -> None:
+        if event == "progress":
+            logger.info("%s: %s", job.source, payload.get("message", ""))
+        elif event in ("started", "done", "failed", "cancelled"):
+            logger.info("%s %s %s", job.source, event, {k: v for k, v in payload.items() if k != "source"})
+
+    started_at = datetime.now()
+    t0 = time.perf_counter()
+    jobs = [SourceJob(src, run_json, args.year, return_csv=args.csv) for src in sources]
+    interrupted = False
+    results: List[Any] = []
+    if jobs:
+        pool = WorkerPool(size=min(args.workers or default_pool_size(), len(jobs)), process_tag="worker")
+        try:
+            results = pool.run(jobs, on_event=on_event, write_listeners=[planner.record_write])
+        except KeyboardInterrupt:
+            interrupted = True
+            logger.warning("Interrupted, stopping workers...")
+        finally:
+            pool.shutdown()
+    for r in results:
+        if r.ok:
+            planner.mark_source_fetched(r.job.source, run_json)
+    planner.save()
+
+    entries = [r.to_dict() for r in results]
+    n_ok = sum(1 for e in entries if e["ok"])
+    n_failed = len(entries) - n_ok
+    if interrupted:
+        code = EXIT_INTERRUPTED
+    elif n_failed == 0:
+        code = EXIT_OK
+    elif n_ok == 0:
+        code = EXIT_ALL_FAILED
+    else:
+        code = EXIT_PARTIAL
+
+    cache_stats = _sum_cache_stats(entries)
+    _write_summary(args.summary, {
+        "started_at": started_at.isoformat(timespec="seconds"),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "elapsed_seconds": round(time.perf_counter() - t0, 3),
+        "request_year": args.year,
+        "planned": not args.all,
+        "sources": entries,
+        "succeeded": n_ok,
+        "failed": n_failed,
+        "http_cache": cache_stats,
+        "exit_code": code,
+    })
+    logger.info("Run finished: %d ok, %d failed, summary=%s", n_ok, n_failed, args.summary)
+    logger.info("HTTP cache: %s", cache_stats)
+    return code
+
+
+def cmd_plan(args: argparse.Namespace) -> int:
+    json_data = _load_json_raw(Path(args.config))
+    if not isinstance(json_data, dict):
+        return EXIT_CONFIG
+    try:
+        sources = _resolve_sources(args.sources, json_data)
+    except ValueError as e:
+        logger.error("%s", e)
+        return EXIT_USAGE
+    _, due = RefreshPlanner().plan(json_data, sources, args.year)
+    print(json.dumps(due, indent=2, ensure_ascii=False))
+    return EXIT_OK
+
+
+def cmd_reprocess(args: argparse.Namespace) -> int:
+    from downloaders.reprocess import REPROCESSABLE_SOURCES, reprocess
+
+    sources = [s.lower() for s in (args.sources or REPROCESSABLE_SOURCES)]
+    unknown = [s for s in sources if s not in REPROCESSABLE_SOURCES]
+    if unknown:
+        logger.error("cannot reprocess: %s (supported: %s)", ", ".join(unknown), ", ".join(REPROCESSABLE_SOURCES))
+        return EXIT_USAGE
+    if args.workers is not None and args.workers <= 0:
+        logger.error("--workers must be a positive integer")
+        return EXIT_USAGE
+    summary = reprocess(sources, max_workers=args.workers)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if summary["series"] and not summary["succeeded"]:
+        return EXIT_ALL_FAILED
+    return EXIT_PARTIAL if summary["failed"] else EXIT_OK
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = _build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return EXIT_USAGE if e.code else EXIT_OK
+    if args.command == "run":
+        return cmd_run(args)
+    if args.command == "plan":
+        return cmd_plan(args)
+    if args.command == "reprocess":
+        return cmd_reprocess(args)
+    return EXIT_USAGE
+
+
+if __name__ == "__main__":
+    start_logging(process_tag="cli")
+    try:
+        raise SystemExit(main())
+    finally:
+        stop_logging()
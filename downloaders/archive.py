@@ -0,0 +1,151 @@
+"""原始响应归档（`cache/raw/`），供离线重新解析使用。
+
+`_format_converter` 之后的值才会入库，转换逻辑一改就得重新请求 BEA / BLS / FRED。
+本模块把每次抓取到的原始载荷（FRED/BLS 的 JSON、`beaapi.get_data` 返回的 DataFrame、
+TE 页面 HTML、DFM/NYF/CIN 下载的 xlsx/csv）压缩后按内容哈希去重保存，并在 SQLite 索引中
+记录来源、序列、抓取时间与重新解析所需的元数据。`downloaders.reprocess` 据此离线重建数据库。
+
+环境变量 `RAW_ARCHIVE=false` 可关闭归档。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from downloaders.common import CACHE_FOLDER
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FOLDER = CACHE_FOLDER / "raw"
+
+
+class RawArchive:
+    """按内容哈希去重的原始载荷存储（线程安全，可多进程共享目录）。"""
+
+    def __init__(self, folder: Path = ARCHIVE_FOLDER) -> None:
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.fspath(self.folder / "index.db"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS payloads ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, source TEXT NOT NULL, series TEXT NOT NULL, "
+            "fetched_at REAL NOT NULL, kind TEXT NOT NULL, sha256 TEXT NOT NULL, size INTEGER, meta TEXT)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_payloads_series ON payloads (source, series, fetched_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def blob_path(folder: Path, sha256: str) -> Path:
+        return Path(folder) / "blobs" / sha256[:2] / f"{sha256}.z"
+
+    def put(self, source: str, series: str, payload: bytes, kind: str, meta: Optional[Dict[str, Any]] = None) -> str:
+        """保存一份载荷并返回其哈希；与该序列最近一次归档内容相同时只刷新抓取时间。"""
+
+        sha = hashlib.sha256(payload).hexdigest()
+        path = self.blob_path(self.folder, sha)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp.write_bytes(zlib.compress(payload, 6))
+            os.replace(tmp, path)
+        now = time.time()
+        meta_s = json.dumps(meta or {}, ensure_ascii=False, default=str)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, sha256 FROM payloads WHERE source=? AND series=? ORDER BY fetched_at DESC LIMIT 1",
+                (source, series),
+            ).fetchone()
+            if row is not None and row[1] == sha:
+                self._conn.execute("UPDATE payloads SET fetched_at=?, meta=? WHERE id=?", (now, meta_s, row[0]))
+            else:
+                self._conn.execute(
+                    "INSERT INTO payloads (source, series, fetched_at, kind, sha256, size, meta) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (source, series, now, kind, sha, len(payload), meta_s),
+                )
+            self._conn.commit()
+        return sha
+
+    def latest(self, sources: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """每个 (source, series) 最近一次归档的索引记录。"""
+
+        sql = (
+            "SELECT source, series, fetched_at, kind, sha256, meta FROM payloads p "
+            "WHERE fetched_at = (SELECT MAX(fetched_at) FROM payloads q WHERE q.source=p.source AND q.series=p.series)"
+        )
+        args: List[Any] = []
+        wanted = list(sources or [])
+        if wanted:
+            sql += f" AND source IN ({', '.join('?' for _ in wanted)})"
+            args.extend(wanted)
+        with self._lock:
+            rows = self._conn.execute(sql + " ORDER BY source, series", args).fetchall()
+        return [
+            {"source": r[0], "series": r[1], "fetched_at": r[2], "kind": r[3], "sha256": r[4], "meta": json.loads(r[5] or "{}")}
+            for r in rows
+        ]
+
+
+def load_blob(sha256: str, folder: Path = ARCHIVE_FOLDER) -> bytes:
+    """读取并解压一份归档载荷（不打开索引，供重新解析的子进程使用）。"""
+
+    return zlib.decompress(RawArchive.blob_path(folder, sha256).read_bytes())
+
+
+_ARCHIVE: Optional[RawArchive] = None
+_ARCHIVE_LOCK = threading.Lock()
+
+
+def archive_enabled() -> bool:
+    return os.environ.get("RAW_ARCHIVE", "true").strip().lower() not in ("0", "false", "no")
+
+
+def get_archive() -> Optional[RawArchive]:
+    """进程级共享归档实例；关闭或初始化失败时返回 None。"""
+
+    global _ARCHIVE
+    if not archive_enabled():
+        return None
+    with _ARCHIVE_LOCK:
+        if _ARCHIVE is None:
+            try:
+                _ARCHIVE = RawArchive()
+            except Exception as e:
+                logger.warning("raw archive disabled, failed to open: %s", e)
+                return None
+        return _ARCHIVE
+
+
+def archive_raw(source: str, series: str, payload: bytes, kind: str, meta: Optional[Dict[str, Any]] = None) -> None:
+    """下载器调用的归档入口；任何失败只记日志，不影响下载流程。"""
+
+    archive = get_archive()
+    if archive is None:
+        return
+    try:
+        archive.put(source, series, payload, kind, meta)
+    except Exception as e:
+        logger.warning("raw archive failed for %s/%s: %s", source, series, e)
+
+
+def archive_file(source: str, series: str, path: str, meta: Optional[Dict[str, Any]] = None) -> None:
+    """归档下载得到的文件（xlsx / csv），kind 取扩展名。"""
+
+    if get_archive() is None:
+        return
+    try:
+        payload = Path(path).read_bytes()
+    except OSError as e:
+        logger.warning("raw archive could not read %s: %s", path, e)
+        return
+    archive_raw(source, series, payload, Path(path).suffix.lstrip(".").lower() or "bin", meta)
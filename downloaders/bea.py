@@ -7,162 +7,112 @@ from __future__ import annotations
 import logging
 import os
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Union
 
 import beaapi
 import pandas as pd
 
+from downloaders.archive import archive_raw
 from downloaders.common import (
-    CSV_DATA_FOLDER,
-    CancelledError,
     CancellationToken,
-    DatabaseConverter,
-    DataDownloader,
+    PipelineDownloader,
+    host_slot,
 )
 
 logger = logging.getLogger(__name__)
 
+# beaapi 不经过 common 的 HTTP 重试助手，这里按主机名单独做自适应并发控制
+BEA_HOST = "apps.bea.gov"
 
-class BEADownloader(DataDownloader):
+
+def _last_or_none(s: pd.Series) -> Any:
+    return s.iloc[-1] if len(s) else None
+
+
+def parse_bea_table(data: Union[pd.DataFrame, List[Dict[str, Any]]], table_config: Dict[str, Any]) -> pd.DataFrame:
+    """从 `beaapi.get_data` 的长表中挑出目标行并透视为 TimePeriod 索引的单列表。
+
+    不访问网络，在线下载与 `downloaders.reprocess` 离线重建共用；
+    重建时传入归档的 records JSON（`df.to_json(orient="records")` 解码后的列表）。
+    """
+
+    df = data if isinstance(data, pd.DataFrame) else pd.DataFrame(data)
+
+    try:
+        ld_series = df["LineDescription"].fillna("")
+        pick = ld_series.iloc[1] if len(ld_series) > 1 else (ld_series.iloc[0] if len(ld_series) else "")
+    except Exception:
+        pick = ""
+    df_filtered: pd.DataFrame = df[df["LineDescription"].isin([pick, ""])].copy()
+
+    df_modified: pd.DataFrame = pd.pivot_table(
+        df_filtered,
+        index="TimePeriod",
+        columns="LineDescription",
+        values="DataValue",
+        aggfunc=_last_or_none,
+    )
+    df_modified.columns = [f"{table_config['name']}"]
+    df_modified.index.name = "TimePeriod"
+    return df_modified
+
+
+class BEADownloader(PipelineDownloader):
     """美国经济分析局（BEA）下载器。"""
 
     current_year: int = date.today().year
-    csv_data_folder: str = os.fspath(CSV_DATA_FOLDER)
+    source = "BEA"
+    host = BEA_HOST
+    default_fetch_workers = min(8, (os.cpu_count() or 4) * 2)
 
     def __init__(self, json_dict: Dict[str, Dict[str, Any]], api_key: str, request_year: int):
         self.json_dict: Dict[str, Dict[str, Any]] = json_dict
         self.api_key: str = api_key
         self.request_year: int = request_year
+        self.start_date: str = str(date(request_year, 1, 1))
         self.time_range: str = ",".join(map(str, range(request_year, BEADownloader.current_year + 1)))
         self.time_range_lag: str = self.time_range[:-5]
 
-    def to_db(
-        self,
-        return_csv: bool = False,
-        max_workers: Optional[int] = None,
-        cancel_token: Optional[CancellationToken] = None,
-    ) -> Optional[Dict[str, pd.DataFrame]]:
-        df_dict: Dict[str, pd.DataFrame] = {}
-        items = list(self.json_dict.items())
-        if not items:
-            return df_dict if return_csv else None
-
-        token = cancel_token
-
-        def _check_cancel() -> None:
-            if token is not None:
-                token.raise_if_cancelled()
-
-        def worker(table_name: str, table_config: Dict[str, Any]) -> Tuple[str, Optional[pd.DataFrame]]:
-            _check_cancel()
-            try:
-                logger.info(
-                    "BEA start: table=%s code=%s freq=%s years=%s",
-                    table_name,
-                    table_config.get("code"),
-                    table_config.get("freq"),
-                    self.time_range,
-                )
-                try:
-                    t0 = time.perf_counter()
-                    bea_tbl = beaapi.get_data(
-                        self.api_key,
-                        datasetname=table_config["category"],
-                        TableName=table_config["code"],
-                        Frequency=table_config["freq"],
-                        Year=self.time_range,
-                    )
-                    logger.info("BEA fetched primary range for %s (%.3fs)", table_name, time.perf_counter() - t0)
-                except beaapi.beaapi_error.BEAAPIResponseError:
-                    t0 = time.perf_counter()
-                    bea_tbl = beaapi.get_data(
-                        self.api_key,
-                        datasetname=table_config["category"],
-                        TableName=table_config["code"],
-                        Frequency=table_config["freq"],
-                        Year=self.time_range_lag,
-                    )
-                    logger.warning("BEA fallback years used for %s (%.3fs)", table_name, time.perf_counter() - t0)
-                df: pd.DataFrame = pd.DataFrame(bea_tbl)
-                try:
-                    ld_series = df["LineDescription"].fillna("")
-                    pick = ld_series.iloc[1] if len(ld_series) > 1 else (ld_series.iloc[0] if len(ld_series) else "")
-                except Exception:
-                    pick = ""
-                df_filtered: pd.DataFrame = df[df["LineDescription"].isin([pick, ""])].copy()
-
-                def _last_or_none(s: pd.Series) -> Any:
-                    return s.iloc[-1] if len(s) else None
-
-                df_modified: pd.DataFrame = pd.pivot_table(
-                    df_filtered,
-                    index="TimePeriod",
-                    columns="LineDescription",
-                    values="DataValue",
-                    aggfunc=_last_or_none,
-                )
-                df_modified.columns = [f"{table_config['name']}"]
-                df_modified.index.name = "TimePeriod"
-                logger.info("BEA_%s Successfully extracted! rows=%d", table_name, len(df_modified))
-
-                if df_modified.empty:
-                    logger.error("%s is empty, FAILED INSERT, locate in to_db", table_name)
-                    return table_name, None
-                converter = DatabaseConverter()
-                _check_cancel()
-                final_result_df = converter.write_into_db(
-                    df=df_modified,
-                    data_name=table_config["name"],
-                    start_date=str(date(self.request_year, 1, 1)),
-                    is_time_series=True,
-                    is_pct_data=table_config["needs_pct"],
-                )
-                _check_cancel()
-                return table_name, final_result_df
-            except CancelledError:
-                raise
-            except Exception as e:
-                logger.error("%s FAILED DOWNLOAD/REFORMAT in BEA worker: %s", table_name, e)
-                return table_name, None
-
-        workers_env = os.environ.get("BEA_WORKERS")
-        workers = max_workers or (
-            int(workers_env) if workers_env and workers_env.isdigit() else min(8, (os.cpu_count() or 4) * 2)
+    def _get_data(self, table_config: Dict[str, Any], years: str, cancel_token: Optional[CancellationToken]) -> Any:
+        with host_slot(BEA_HOST, cancel_token):
+            return beaapi.get_data(
+                self.api_key,
+                datasetname=table_config["category"],
+                TableName=table_config["code"],
+                Frequency=table_config["freq"],
+                Year=years,
+            )
+
+    def fetch(self, table_name: str, table_config: Dict[str, Any], cancel_token: Optional[CancellationToken]) -> Any:
+        logger.info(
+            "BEA start: table=%s code=%s freq=%s years=%s",
+            table_name,
+            table_config.get("code"),
+            table_config.get("freq"),
+            self.time_range,
         )
-        logger.info("BEA submitting %d tasks (workers=%d)", len(items), workers)
-        with ThreadPoolExecutor(max_workers=workers) as ex:
-            future_map = {ex.submit(worker, tn, cfg): tn for tn, cfg in items}
-            try:
-                for fut in as_completed(future_map):
-                    _check_cancel()
-                    tn = future_map[fut]
-                    try:
-                        name, df = fut.result()
-                        if df is not None:
-                            df_dict[name] = df
-                    except CancelledError:
-                        logger.info("BEA task %s cancelled", tn)
-                        raise
-                    except Exception as e:
-                        logger.error("BEA future for %s raised: %s", tn, e)
-            finally:
-                if token is not None and token.cancelled():
-                    for fut in future_map:
-                        fut.cancel()
-
-        if return_csv and df_dict:
-            _check_cancel()
-            for name, df in df_dict.items():
-                try:
-                    data_folder_path = os.path.join(BEADownloader.csv_data_folder, name)
-                    os.makedirs(data_folder_path, exist_ok=True)
-                    csv_path = os.path.join(data_folder_path, f"{name}.csv")
-                    df.to_csv(csv_path, index=True)
-                    logger.info("%s saved to %s Successfully!", name, csv_path)
-                except Exception as err:
-                    logger.error("%s FAILED DOWNLOAD CSV in method 'to_csv', since %s", name, err)
-                    continue
-
-        return df_dict if return_csv else None
+        try:
+            t0 = time.perf_counter()
+            bea_tbl = self._get_data(table_config, self.time_range, cancel_token)
+            logger.info("BEA fetched primary range for %s (%.3fs)", table_name, time.perf_counter() - t0)
+        except beaapi.beaapi_error.BEAAPIResponseError:
+            t0 = time.perf_counter()
+            bea_tbl = self._get_data(table_config, self.time_range_lag, cancel_token)
+            logger.warning("BEA fallback years used for %s (%.3fs)", table_name, time.perf_counter() - t0)
+        df: pd.DataFrame = pd.DataFrame(bea_tbl)
+        # 以 records JSON 归档：与 pandas 版本无关，且重建时无需反序列化任意对象
+        archive_raw("bea", table_config["name"], df.to_json(orient="records").encode("utf-8"), "json", {
+            "data_name": table_config["name"],
+            "start_date": self.start_date,
+            "is_pct_data": table_config["needs_pct"],
+            "table_config": table_config,
+        })
+        return df
+
+    def parse(self, table_name: str, table_config: Dict[str, Any], raw: Any) -> Optional[pd.DataFrame]:
+        df_modified = parse_bea_table(raw, table_config)
+        if df_modified.empty:
+            logger.error("%s is empty, FAILED INSERT, locate in to_db", table_name)
+            return None
+        return df_modified
@@ -0,0 +1,340 @@
+"""进程内共享的 Selenium Chrome 驱动池。
+
+以前每个浏览器类下载器（TE / FW / DFM / EM / FS / ISM / CIN）在 `__init__` 里各自启动 Chrome，
+工厂创建对象但从不运行时也要付出启动代价，一次完整抓取会拉起七个浏览器进程。现在：
+
+- 下载器持有 `DriverLease`，首次访问驱动属性时才从池中借出（池中没有空闲驱动时才启动 Chrome）；
+- `lease.quit()` 只是归还，归还时清理 Cookie、多余窗口与 iframe 上下文并回到 about:blank；
+- 驱动累计打开 `BROWSER_RECYCLE_PAGES` 个页面，或 JS 堆超过 `BROWSER_RECYCLE_HEAP_MB` 后关闭重建；
+- 池中最多 `BROWSER_POOL_SIZE` 个驱动（默认 2），`shutdown_driver_pool()` 在运行结束时关闭全部浏览器；
+- 默认无头运行（与原先 DFM / NYF 一致，无显示器的服务器上也能启动），`BROWSER_HEADLESS=false` 显示窗口便于调试。
+
+浏览器配置（profile）：
+- default —— 完整加载页面，适用于需要点击下载文件的 DFM / CIN / ISM；
+- lean    —— 只需要 DOM 与数据的下载器（TE / FW / EM / FS）选用：页面加载策略为 eager，
+  通过偏好设置禁用图片与通知，并用 CDP `Network.setBlockedURLs` 拦截字体、图片、媒体
+  与常见广告 / 统计脚本，并开启 performance 日志供 `downloaders.netcapture` 读取 XHR 响应。
+  `BROWSER_LEAN=false` 时 lean 退化为 capture（default + performance 日志）。
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from downloaders.common import CancellationToken, CancelledError, _env_number
+from downloaders.netcapture import capture_enabled, enable_performance_log
+
+logger = logging.getLogger(__name__)
+
+
+def headless_enabled() -> bool:
+    """Selenium 驱动池与 Playwright 引擎共用的无头开关（默认开启）。"""
+
+    return os.environ.get("BROWSER_HEADLESS", "true").strip().lower() not in ("0", "false", "no")
+
+
+def default_chrome_options(capture: bool = False) -> Any:
+    """所有浏览器下载器共用的 Chrome 参数（原先各下载器参数的并集）。
+
+    capture=True 时开启 performance 日志；只有构建 NetworkCapture 的下载器（lean 配置）需要，
+    DFM / CIN / ISM 不为每个页面记录全部 Network 事件。
+    """
+
+    from selenium.webdriver.chrome.options import Options
+
+    options = Options()
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    if headless_enabled():
+        options.add_argument("--headless=new")
+    if capture and capture_enabled():
+        # FS / EM / FW 从 performance 日志中读取 XHR 响应（downloaders.netcapture）
+        enable_performance_log(options)
+    return options
+
+
+# lean 配置拦截的资源：字体 / 图片 / 媒体文件与常见第三方广告、统计域名（CDP 通配符语法）
+BLOCKED_URL_PATTERNS: List[str] = [
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.ico", "*.svg",
+    "*.mp4", "*.webm", "*.mp3",
+]
+BLOCKED_HOSTS: List[str] = [
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com", "doubleclick.net",
+    "adservice.google.com", "facebook.net", "connect.facebook.com", "hotjar.com", "scorecardresearch.com",
+    "quantserve.com", "taboola.com", "outbrain.com", "criteo.com", "adnxs.com", "amazon-adsystem.com",
+    "pubmatic.com", "rubiconproject.com", "bing.com/bat", "clarity.ms", "newrelic.com", "nr-data.net",
+]
+# Playwright 路由拦截用的资源类型（与 BLOCKED_URL_PATTERNS 对应）
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+
+
+def lean_enabled() -> bool:
+    return os.environ.get("BROWSER_LEAN", "true").strip().lower() not in ("0", "false", "no")
+
+
+def lean_chrome_options() -> Any:
+    """精简配置：DOMContentLoaded 即返回，禁用图片、通知、扩展与后台网络。"""
+
+    options = default_chrome_options(capture=True)
+    options.page_load_strategy = "eager"
+    for arg in (
+        "--blink-settings=imagesEnabled=false",
+        "--disable-extensions",
+        "--disable-notifications",
+        "--disable-background-networking",
+        "--disable-component-update",
+        "--disable-default-apps",
+        "--disable-sync",
+        "--mute-audio",
+        "--no-first-run",
+    ):
+        options.add_argument(arg)
+    options.add_experimental_option("prefs", {
+        "profile.managed_default_content_settings.images": 2,
+        "profile.default_content_setting_values.notifications": 2,
+        "profile.managed_default_content_settings.media_stream": 2,
+        "profile.managed_default_content_settings.geolocation": 2,
+    })
+    return options
+
+
+def apply_lean_blocking(driver: Any) -> None:
+    """通过 CDP 拦截字体 / 图片 / 媒体与第三方统计脚本（对该标签页后续所有导航生效）。"""
+
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS + [f"*{h}*" for h in BLOCKED_HOSTS]})
+    except Exception as e:
+        logger.warning("failed to install CDP request blocking: %s", e)
+
+
+def capture_chrome_options() -> Any:
+    """BROWSER_LEAN=false 时 lean 下载器使用：完整加载页面，但保留 performance 日志。"""
+
+    return default_chrome_options(capture=True)
+
+
+_PROFILES: Dict[str, Callable[[], Any]] = {
+    "default": default_chrome_options,
+    "lean": lean_chrome_options,
+    "capture": capture_chrome_options,
+}
+
+
+class _PooledDriver:
+    """池中的一个 Chrome 实例及其使用计数。"""
+
+    def __init__(self, driver: Any) -> None:
+        self.driver = driver
+        self.pages: int = 0
+        self.created_at: float = time.monotonic()
+
+    def heap_mb(self) -> Optional[float]:
+        try:
+            used = self.driver.execute_script("return (performance.memory && performance.memory.usedJSHeapSize) || null")
+        except Exception:
+            return None
+        return float(used) / (1024 * 1024) if used else None
+
+
+class DriverPool:
+    """懒启动、可租借、定期回收的 Chrome 驱动池（线程安全）。"""
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        recycle_pages: Optional[int] = None,
+        recycle_heap_mb: Optional[float] = None,
+        profile: str = "default",
+    ) -> None:
+        self.size = max(1, int(size if size is not None else _env_number("BROWSER_POOL_SIZE", 2)))
+        self.recycle_pages = int(recycle_pages if recycle_pages is not None else _env_number("BROWSER_RECYCLE_PAGES", 50))
+        self.recycle_heap_mb = float(recycle_heap_mb if recycle_heap_mb is not None else _env_number("BROWSER_RECYCLE_HEAP_MB", 768))
+        self.profile = profile
+        self.options_factory = _PROFILES[profile]
+        self._idle: List[_PooledDriver] = []
+        self._leased: int = 0
+        self._cond = threading.Condition()
+        self._closed = False
+        self.launched: int = 0
+
+    def _launch(self) -> _PooledDriver:
+        from selenium import webdriver
+
+        t0 = time.perf_counter()
+        driver = webdriver.Chrome(options=self.options_factory())
+        if self.profile == "lean":
+            apply_lean_blocking(driver)
+        self.launched += 1
+        logger.info("browser pool (%s) launched Chrome #%d in %.3fs", self.profile, self.launched, time.perf_counter() - t0)
+        return _PooledDriver(driver)
+
+    def acquire(self, cancel_token: Optional[CancellationToken] = None) -> _PooledDriver:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("browser pool already shut down")
+                if self._idle:
+                    self._leased += 1
+                    return self._idle.pop()
+                if self._leased < self.size:
+                    self._leased += 1
+                    break
+                if cancel_token is not None and cancel_token.cancelled():
+                    raise CancelledError("operation cancelled while waiting for a browser")
+                self._cond.wait(0.2)
+        try:
+            return self._launch()
+        except Exception:
+            with self._cond:
+                self._leased -= 1
+                self._cond.notify()
+            raise
+
+    def _reset(self, pooled: _PooledDriver) -> bool:
+        """清理上一个租户留下的状态；失败说明驱动已不可用。"""
+
+        driver = pooled.driver
+        try:
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(handles[0])
+            driver.switch_to.default_content()
+            driver.delete_all_cookies()
+            driver.get("about:blank")
+            return True
+        except Exception as e:
+            logger.warning("browser reset failed, discarding driver: %s", e)
+            return False
+
+    def _should_recycle(self, pooled: _PooledDriver) -> bool:
+        if pooled.pages >= self.recycle_pages:
+            logger.info("recycling Chrome after %d pages", pooled.pages)
+            return True
+        heap = pooled.heap_mb()
+        if heap is not None and heap > self.recycle_heap_mb:
+            logger.info("recycling Chrome, JS heap %.0f MB exceeds %.0f MB", heap, self.recycle_heap_mb)
+            return True
+        return False
+
+    def release(self, pooled: _PooledDriver) -> None:
+        keep = not self._closed and not self._should_recycle(pooled) and self._reset(pooled)
+        if not keep:
+            _quit_quietly(pooled.driver)
+        with self._cond:
+            self._leased -= 1
+            if keep and not self._closed:
+                self._idle.append(pooled)
+            self._cond.notify()
+
+    def shutdown(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            _quit_quietly(pooled.driver)
+        if idle:
+            logger.info("browser pool shut down (%d Chrome closed, %d launched in total)", len(idle), self.launched)
+
+
+def _quit_quietly(driver: Any) -> None:
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+class DriverLease:
+    """下载器持有的驱动句柄：首次使用时借出，`quit()` 时归还，之后再次使用会重新借出。
+
+    其余属性（get / find_element / execute_script / switch_to / page_source ...）原样转发给
+    底层 WebDriver，因此可以直接传给 `WebDriverWait`。
+    """
+
+    def __init__(self, pool: Optional["DriverPool"] = None, cancel_token: Optional[CancellationToken] = None, profile: str = "default") -> None:
+        self._pool = pool
+        self._profile = profile
+        self._pooled: Optional[_PooledDriver] = None
+        self.cancel_token = cancel_token
+
+    @property
+    def driver(self) -> Any:
+        if self._pooled is None:
+            pool = self._pool or get_driver_pool(self._profile)
+            self._pool = pool
+            self._pooled = pool.acquire(self.cancel_token)
+        return self._pooled.driver
+
+    @property
+    def active(self) -> bool:
+        return self._pooled is not None
+
+    def get(self, url: str) -> None:
+        driver = self.driver
+        assert self._pooled is not None
+        self._pooled.pages += 1
+        driver.get(url)
+
+    def quit(self) -> None:
+        pooled, self._pooled = self._pooled, None
+        if pooled is not None and self._pool is not None:
+            self._pool.release(pooled)
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.driver, name)
+
+    def __enter__(self) -> "DriverLease":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.quit()
+
+
+_POOLS: Dict[str, DriverPool] = {}
+_POOL_LOCK = threading.Lock()
+
+
+def get_driver_pool(profile: str = "default") -> DriverPool:
+    if profile == "lean" and not lean_enabled():
+        profile = "capture"
+    with _POOL_LOCK:
+        pool = _POOLS.get(profile)
+        if pool is None or pool._closed:
+            pool = DriverPool(profile=profile)
+            _POOLS[profile] = pool
+        return pool
+
+
+def lease_driver(cancel_token: Optional[CancellationToken] = None, profile: str = "default") -> DriverLease:
+    """返回一个尚未绑定浏览器的租约；构造本身不会启动 Chrome。
+
+    profile="lean" 供只需要 DOM 的下载器使用（见模块说明）。
+    """
+
+    if profile not in _PROFILES:
+        raise ValueError(f"unknown browser profile: {profile}")
+    return DriverLease(cancel_token=cancel_token, profile=profile)
+
+
+def shutdown_driver_pool() -> None:
+    """关闭池中所有浏览器（运行结束时调用；进程退出时也会自动调用）。"""
+
+    with _POOL_LOCK:
+        pools = list(_POOLS.values())
+    for pool in pools:
+        pool.shutdown()
+
+
+atexit.register(shutdown_driver_pool)
@@ -4,17 +4,17 @@
 from __future__ import annotations
 from datetime import date
 import os
-import time
 import pandas as pd
 from typing import Any, Dict, Optional
-from pathlib import Path
+from urllib.parse import urljoin
 import logging
 
-from selenium import webdriver
+
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from downloaders.archive import archive_file
+from downloaders.browser import lease_driver
 from downloaders.common import (
     CSV_DATA_FOLDER,
     CancelledError,
@@ -22,6 +22,11 @@ from downloaders.common import (
     DatabaseConverter,
     DataDownloader,
 )
+from downloaders.download_manager import DownloadJob, atomic_move
+from downloaders.file_fetch import FileFetcher
+from downloaders.htmlparse import xpath_first
+from downloaders.impersonate import get_impersonated_session
+from downloaders.waits import PageWaiter
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +38,6 @@ class CINDownloader(DataDownloader):
         self.json_dict : dict = json_dict
 
         # path
-        self.download_path = Path.home() / "Downloads"
         self.csv_folder_path = CSV_DATA_FOLDER
         self.table_folder_path = os.path.join(self.csv_folder_path, "A_TABLE_DATA")
 
@@ -41,6 +45,10 @@ class CINDownloader(DataDownloader):
         self.end_year = date.today().year
         self.end_month = date.today().month
 
+        # 条件下载层：按内容哈希判断 nowcast 文件是否变化
+        self.fetcher = FileFetcher()
+        self.cancel_token: Optional[CancellationToken] = None
+
     def _quarter(self, end_month):
         '''Used in Cross_series, inflation_nowcasting, file_name matching
         用在cross_series 模块，用于匹配下载的文件'''
@@ -56,63 +64,94 @@ class CINDownloader(DataDownloader):
             case _:
                 return 0
 
+    def _static_nowcast_href(self, session) -> Optional[str]:
+        """不启动浏览器，直接请求 nowcasting 页面解析季度下载按钮的链接；按钮由脚本渲染时返回 None。"""
+        try:
+            html = session.get_text(self.url)
+        except Exception as e:
+            logger.warning("CIN static fetch of %s failed: %s", self.url, e)
+            return None
+        href = xpath_first(html, "//*[@id='btn-NowcastDownload-quarter']/@href")
+        return urljoin(self.url, href) if href and not href.startswith(("#", "javascript")) else None
+
+    def _browser_download(self, key, job, xlsx_file, force, check_cancel):
+        """浏览器兜底：打开页面滚动加载后取按钮直链，没有直链时点击下载到 job 的临时目录并等待文件落地。"""
+        driver = lease_driver(self.cancel_token)
+        try:
+            driver.get(self.url)
+            WebDriverWait(driver, 10).until(
+                lambda d: d.execute_script("return document.readyState") == "complete"
+            )
+            # 滚动触发懒加载，直接等待下载按钮可点击
+            for _ in range(5):
+                driver.execute_script("window.scrollBy(0, 500);")
+            waiter = PageWaiter(driver, 20, "CIN nowcast", check_cancel)
+            button = waiter.clickable((By.XPATH, '//*[@id="btn-NowcastDownload-quarter"]'), "download button")
+            waiter.report()
+            href = button.get_attribute("href") or ""
+            if href.startswith("http"):
+                # 按钮带直链时直接条件下载到临时目录，不依赖浏览器下载
+                return self.fetcher.fetch(key, href, xlsx_file, force=force, cancel_token=self.cancel_token)
+            try:
+                job.attach(driver)
+                driver.execute_script("arguments[0].click();", button)
+                # 等待文件落地且大小稳定（最多 30 秒）
+                downloaded = job.wait(timeout=30, check_cancel=check_cancel)
+            finally:
+                job.detach(driver)  # 驱动归还共享池前恢复默认下载行为
+            if downloaded is None:
+                logger.error("Failed to download Cleveland inflation data")
+                return None
+            if downloaded != xlsx_file:
+                atomic_move(downloaded, xlsx_file)
+            return self.fetcher.observe(key, xlsx_file, force=force)
+        finally:
+            driver.quit()
+
     def _inflation_nowcasting(self, data_name, check_cancel):
         check_cancel()
-        driver = webdriver.Chrome()
 
         # path variables
         folder_path = os.path.join(self.table_folder_path, data_name)  # 文件夹地址
         os.makedirs(folder_path, exist_ok=True)  # 确保创建文件夹
 
         filename = f"QuarterlyAnnualizedPercentChange-{self.end_year}-q{str(self._quarter(self.end_month))}.csv"  # 文件名
-        xlsx_file = self.download_path / filename  # 下载的文件的自身地址
         target_location_path = os.path.join(folder_path, f"{data_name}.csv")  # 转移后xlsx文件
-
-        # 删除重复文件名称的旧版excel file
-        for f in [xlsx_file, target_location_path]:
-            try:
-                os.remove(f)
-                time.sleep(0.3)
-            except Exception as e:
-                pass
-
-        # download data
-        driver.get(self.url)
-        WebDriverWait(driver, 10).until(
-            lambda d: d.execute_script("return document.readyState") == "complete"
-        )
-        for _ in range(5):
-            driver.execute_script("window.scrollBy(0, 500);")
-            time.sleep(1.2)  # 等待内容加载
-        button = WebDriverWait(driver, 8).until(
-            EC.element_to_be_clickable((By.XPATH, '//*[@id="btn-NowcastDownload-quarter"]'))
-        )
-        driver.execute_script("arguments[0].click();", button)
-
-        for _ in range(30):  # maximum waiting for 30 seconds
-            if xlsx_file.exists():
-                break
-            else:
-                time.sleep(1)
-
-        if xlsx_file.exists():
-            # 确保目标目录存在
-            #xlsx_file.rename(target_location_path)
-            if os.name == 'nt':
-                os.system("move " + str(xlsx_file) + " " + str(target_location_path))
-            else:
-                os.system("mv " + str(xlsx_file) + " " + str(target_location_path))
-            driver.quit()
-
-            # 修改csv，需要用pd转换成df，因为table模块会默认删除一列
-            df = pd.read_csv(target_location_path)
-            df.insert(0, '', '')
-            df.to_csv(target_location_path, index=False)
-
-        else:
-            logger.error("Failed to download Cleveland inflation data")
-            driver.quit()
-            return
+        key = f"cin/{data_name}"
+        force = not os.path.exists(target_location_path)
+
+        # 下载到本任务独立的临时目录（目标 csv 保留，内容未变化时直接沿用），退出时清理
+        with DownloadJob("cin") as job:
+            xlsx_file = job.path / filename  # 下载的文件的自身地址
+
+            # download data：优先静态解析下载链接（impersonate 后端），拿不到时再启动浏览器
+            session = get_impersonated_session("cin")
+            href = self._static_nowcast_href(session) if session is not None else None
+            result = None
+            if href:
+                try:
+                    result = self.fetcher.fetch(key, href, xlsx_file, force=force, cancel_token=self.cancel_token, session=session)
+                except CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning("CIN static download of %s failed, falling back to browser: %s", href, e)
+            if result is None:
+                result = self._browser_download(key, job, xlsx_file, force, check_cancel)
+                if result is None:
+                    return
+
+            if not result.changed:
+                logger.info("%s unchanged since last download (%s), skip parsing", data_name, result.status)
+                return
+
+            atomic_move(xlsx_file, target_location_path)
+        archive_file("cin", data_name, target_location_path)
+
+        # 修改csv，需要用pd转换成df，因为table模块会默认删除一列
+        df = pd.read_csv(target_location_path)
+        df.insert(0, '', '')
+        df.to_csv(target_location_path, index=False)
+        self.fetcher.mark_processed(result)
 
     def to_db(
             self,
@@ -122,6 +161,7 @@ class CINDownloader(DataDownloader):
     ) -> None:
 
         token = cancel_token
+        self.cancel_token = token
         def _check_cancel() -> None:
             if token is not None:
                 token.raise_if_cancelled()
@@ -4,14 +4,17 @@
 
 - HTTP 与 yfinance 的重试封装
 - 数据写入 SQLite 的 `DatabaseConverter`
-- 下载器抽象基类 `DataDownloader`
+- 下载器抽象基类 `DataDownloader`，以及分阶段的 `PipelineDownloader`（FRED / BLS / BEA / YF）
 
 后续每个具体来源的下载器在独立文件中实现，只需从本模块导入上述组件。
 """
 
 from __future__ import annotations
 
+import json
 import logging
+import os
+import queue
 import random
 import re
 import sqlite3
@@ -19,21 +22,30 @@ import threading
 import time
 from abc import ABC, abstractmethod
 from datetime import date, datetime, timedelta
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 import requests
 import yfinance as yf
 
+from downloaders.series import CompactSeries
+
 # 基础路径（downloaders 目录）与共享 CSV 输出目录
 DOWNLOADERS_ROOT = Path(__file__).resolve().parent
 CSV_DATA_FOLDER = DOWNLOADERS_ROOT.parent / "csv"
+# 下载相关的本地状态与缓存（探测水位、缓存文件等），可随时整体删除
+CACHE_FOLDER = DOWNLOADERS_ROOT.parent / "cache"
 
 # 全局 DB 写锁，避免并发写入 SQLite 导致数据丢失或锁冲突
 DB_WRITE_LOCK = threading.Lock()
 
+# 写库接受的序列数据：原始 DataFrame（经 _format_converter 规范化）或已规范化的紧凑序列
+SeriesData = Union[pd.DataFrame, CompactSeries]
+
 # 模块级 logger（与异步日志模块配合使用）
 logger = logging.getLogger(__name__)
 
@@ -87,6 +99,522 @@ def _sleep_with_cancel(delay: Optional[float], cancel_token: Optional[Cancellati
 		time.sleep(min(0.1, remaining))
 
 
+def load_json_state(path: Path) -> Dict[str, Any]:
+	"""读取 JSON 状态文件；不存在或损坏时返回空字典。"""
+
+	try:
+		with open(path, "r", encoding="utf-8") as f:
+			data = json.load(f)
+		return data if isinstance(data, dict) else {}
+	except FileNotFoundError:
+		return {}
+	except Exception as e:
+		logger.warning("state file %s unreadable, ignored: %s", path, e)
+		return {}
+
+
+def save_json_state(path: Path, data: Dict[str, Any]) -> None:
+	"""原子写入 JSON 状态文件（先写临时文件再 os.replace）。"""
+
+	try:
+		path.parent.mkdir(parents=True, exist_ok=True)
+		tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+		tmp.write_text(json.dumps(data, indent=1, ensure_ascii=False), encoding="utf-8")
+		os.replace(tmp, path)
+	except Exception as e:
+		logger.error("Failed to save state file %s: %s", path, e)
+
+
+class RateLimiter:
+	"""线程安全的令牌桶限速器：rate 为每秒令牌数，burst 为桶容量。"""
+
+	def __init__(self, rate: float, burst: int = 1) -> None:
+		self.rate: float = float(rate)
+		self.burst: float = float(max(1, burst))
+		self._tokens: float = self.burst
+		self._updated: float = time.monotonic()
+		self._lock = threading.Lock()
+
+	def _reserve(self) -> float:
+		"""取走一个令牌，返回需要等待的秒数（令牌可为负，表示已预约）。"""
+
+		with self._lock:
+			now = time.monotonic()
+			self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+			self._updated = now
+			self._tokens -= 1.0
+			if self._tokens >= 0:
+				return 0.0
+			return -self._tokens / self.rate
+
+	def acquire(self, cancel_token: Optional["CancellationToken"] = None) -> None:
+		_sleep_with_cancel(self._reserve(), cancel_token)
+
+	def pause(self, seconds: float) -> None:
+		"""服务器要求等待（429 / Retry-After）时调用：清空令牌桶，使所有线程在 seconds 秒内都拿不到令牌。"""
+
+		with self._lock:
+			now = time.monotonic()
+			self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+			self._updated = now
+			self._tokens = min(self._tokens, 0.0) - float(seconds) * self.rate
+
+
+# 各 API 主机的请求速率上限（每秒请求数, 突发容量）
+# FRED: 120 次/分钟；BLS v2: 50 次/10 秒
+_HOST_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+	"api.stlouisfed.org": (2.0, 4),
+	"api.bls.gov": (5.0, 5),
+}
+_HOST_LIMITERS: Dict[str, RateLimiter] = {}
+_HOST_LIMITERS_LOCK = threading.Lock()
+
+
+def url_host(url: str) -> str:
+	return (urlsplit(url).hostname or "").lower()
+
+
+# 未配置限速的主机在首次被限流时按此默认值创建限速器，以便共享服务器给出的暂停时间
+_DEFAULT_HOST_RATE: Tuple[float, int] = (10.0, 10)
+
+
+def get_host_limiter(url: str, create: bool = False) -> Optional[RateLimiter]:
+	"""返回该 URL 所属主机的共享限速器。
+
+	未配置限速且此前未被限流的主机返回 None；create=True 时按默认速率创建。
+	"""
+
+	host = url_host(url)
+	with _HOST_LIMITERS_LOCK:
+		limiter = _HOST_LIMITERS.get(host)
+		if limiter is None:
+			limits = _HOST_RATE_LIMITS.get(host) or (_DEFAULT_HOST_RATE if create else None)
+			if limits is None:
+				return None
+			limiter = RateLimiter(*limits)
+			_HOST_LIMITERS[host] = limiter
+		return limiter
+
+
+class CircuitOpenError(RuntimeError):
+	"""主机处于熔断状态时快速失败，不再发出请求。"""
+
+
+class HTTPClientError(Exception):
+	"""不可重试的 4xx 响应（参数错误、无权限、资源不存在等）。"""
+
+
+class CircuitBreaker:
+	"""按主机的熔断器（closed → open → half-open）。
+
+	连续失败 `failure_threshold` 次后打开，期间所有请求立即抛出 CircuitOpenError；
+	冷却 `cooldown` 秒后进入半开状态，只放行一个探测请求：成功则关闭，失败则重新打开。
+	"""
+
+	def __init__(self, name: str, failure_threshold: int = 5, cooldown: float = 60.0) -> None:
+		self.name: str = name
+		self.failure_threshold: int = max(1, int(failure_threshold))
+		self.cooldown: float = float(cooldown)
+		self._failures: int = 0
+		self._opened_at: Optional[float] = None
+		self._probing: bool = False
+		self._lock = threading.Lock()
+
+	@property
+	def state(self) -> str:
+		with self._lock:
+			if self._opened_at is None:
+				return "closed"
+			return "half-open" if time.monotonic() - self._opened_at >= self.cooldown else "open"
+
+	def before_request(self) -> bool:
+		"""放行请求前检查熔断状态；返回 True 表示本次请求是半开状态下的探测请求。
+
+		探测请求必须以 record_success / record_failure / release_probe 之一结算，
+		否则 `_probing` 保持为 True，该主机会一直拒绝请求。
+		"""
+
+		with self._lock:
+			if self._opened_at is None:
+				return False
+			remaining = self.cooldown - (time.monotonic() - self._opened_at)
+			if remaining > 0 or self._probing:
+				raise CircuitOpenError(f"circuit open for {self.name} (retry in {max(remaining, 0.0):.0f}s)")
+			self._probing = True
+		logger.info("circuit half-open for %s, sending probe request", self.name)
+		return True
+
+	def release_probe(self, reopen: bool = False) -> None:
+		"""结算未得出结论的探测请求（被限流、被取消或放弃）。
+
+		reopen=True 时重新计时冷却（主机仍在限流）；否则只清除探测标记，下一个请求可再次探测。
+		已经由 record_success / record_failure 结算的探测不受影响。
+		"""
+
+		with self._lock:
+			if not self._probing:
+				return
+			self._probing = False
+			if reopen and self._opened_at is not None:
+				self._opened_at = time.monotonic()
+		if reopen:
+			logger.info("circuit probe for %s was throttled, staying open for %.0fs", self.name, self.cooldown)
+
+	def record_success(self) -> None:
+		with self._lock:
+			was_open = self._opened_at is not None
+			self._failures = 0
+			self._opened_at = None
+			self._probing = False
+		if was_open:
+			logger.info("circuit closed for %s", self.name)
+
+	def record_failure(self) -> None:
+		with self._lock:
+			self._failures += 1
+			reopen = self._probing
+			self._probing = False
+			if reopen or (self._opened_at is None and self._failures >= self.failure_threshold):
+				self._opened_at = time.monotonic()
+				tripped = True
+			else:
+				tripped = False
+			failures = self._failures
+		if tripped:
+			logger.warning("circuit opened for %s after %d consecutive failures (cooldown %.0fs)", self.name, failures, self.cooldown)
+
+
+class RetryBudget:
+	"""一次运行内所有重试共享的预算：每次重试（非首次尝试）消耗一个单位，用尽后不再重试。"""
+
+	def __init__(self, total: int) -> None:
+		self.total: int = max(0, int(total))
+		self._used: int = 0
+		self._lock = threading.Lock()
+
+	def take(self) -> bool:
+		with self._lock:
+			if self._used >= self.total:
+				return False
+			self._used += 1
+			return True
+
+	def remaining(self) -> int:
+		with self._lock:
+			return self.total - self._used
+
+
+def _env_number(name: str, default: float) -> float:
+	try:
+		return float(os.environ.get(name, "") or default)
+	except ValueError:
+		return default
+
+
+_BREAKERS: Dict[str, CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+_RETRY_BUDGET: Optional[RetryBudget] = None
+
+
+def get_circuit_breaker(host: str) -> CircuitBreaker:
+	"""返回该主机共享的熔断器（阈值 CIRCUIT_FAILURES，冷却 CIRCUIT_COOLDOWN_SECONDS）。"""
+
+	with _BREAKERS_LOCK:
+		breaker = _BREAKERS.get(host)
+		if breaker is None:
+			breaker = CircuitBreaker(
+				host,
+				failure_threshold=int(_env_number("CIRCUIT_FAILURES", 5)),
+				cooldown=_env_number("CIRCUIT_COOLDOWN_SECONDS", 60.0),
+			)
+			_BREAKERS[host] = breaker
+		return breaker
+
+
+def get_retry_budget() -> RetryBudget:
+	global _RETRY_BUDGET
+	with _BREAKERS_LOCK:
+		if _RETRY_BUDGET is None:
+			_RETRY_BUDGET = RetryBudget(int(_env_number("RETRY_BUDGET", 200)))
+		return _RETRY_BUDGET
+
+
+def reset_retry_state() -> None:
+	"""新一轮下载开始时调用：重置重试预算、关闭所有熔断器并清空限流统计。"""
+
+	global _RETRY_BUDGET
+	with _BREAKERS_LOCK:
+		_RETRY_BUDGET = None
+		_BREAKERS.clear()
+	with _THROTTLE_LOCK:
+		_THROTTLE_STATS.clear()
+
+
+CONCURRENCY_STATE_FILE = CACHE_FOLDER / "concurrency.json"
+
+# 各主机的初始并发（尚无历史学习结果时使用）
+_HOST_INITIAL_CONCURRENCY: Dict[str, int] = {
+	"api.stlouisfed.org": 4,
+	"api.bls.gov": 2,
+	"apps.bea.gov": 3,
+	"yfinance": 1,
+}
+
+
+class AIMDController:
+	"""按主机的自适应并发控制（加性增、乘性减）。
+
+	- 每成功完成 `limit` 个请求且延迟未明显劣化（EWMA 不超过历史最低的 3 倍）时，limit + 1；
+	- 遇到 429 或超时时 limit 减半（1 秒内只减一次，避免同一波失败连续减半）；
+	- 其他错误只清零成功计数。
+	线程池大小（*_WORKERS 或默认值）只是上限，实际在途请求数由 limit 控制。
+	"""
+
+	def __init__(self, name: str, initial: float = 4, minimum: int = 1, maximum: int = 16) -> None:
+		self.name: str = name
+		self.minimum: int = max(1, int(minimum))
+		self.maximum: int = max(self.minimum, int(maximum))
+		self._limit: float = float(min(max(initial, self.minimum), self.maximum))
+		self._in_flight: int = 0
+		self._successes: int = 0
+		self._latency_ewma: Optional[float] = None
+		self._latency_min: Optional[float] = None
+		self._last_decrease: float = 0.0
+		self._cond = threading.Condition()
+
+	@property
+	def limit(self) -> int:
+		return max(self.minimum, int(self._limit))
+
+	def acquire(self, cancel_token: Optional[CancellationToken] = None) -> None:
+		with self._cond:
+			while self._in_flight >= self.limit:
+				if cancel_token is not None and cancel_token.cancelled():
+					raise CancelledError("operation cancelled while waiting for a request slot")
+				self._cond.wait(0.1)
+			self._in_flight += 1
+
+	def release(self, outcome: str, latency: Optional[float] = None) -> None:
+		"""outcome: ok | throttled | timeout | error"""
+
+		with self._cond:
+			self._in_flight = max(0, self._in_flight - 1)
+			if outcome == "ok":
+				healthy = True
+				if latency is not None:
+					self._latency_min = latency if self._latency_min is None else min(self._latency_min, latency)
+					self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+					healthy = self._latency_ewma <= 3.0 * max(self._latency_min, 0.05)
+				if healthy:
+					self._successes += 1
+					if self._successes >= self.limit and self._limit < self.maximum:
+						self._limit += 1.0
+						self._successes = 0
+						logger.debug("concurrency for %s raised to %d", self.name, self.limit)
+				else:
+					self._successes = 0
+			elif outcome in ("throttled", "timeout"):
+				now = time.monotonic()
+				if now - self._last_decrease >= 1.0:
+					self._limit = max(float(self.minimum), self._limit * 0.5)
+					self._last_decrease = now
+					logger.warning("concurrency for %s cut to %d after %s", self.name, self.limit, outcome)
+				self._successes = 0
+			else:
+				self._successes = 0
+			self._cond.notify_all()
+
+
+_CONTROLLERS: Dict[str, AIMDController] = {}
+_CONTROLLERS_LOCK = threading.Lock()
+
+
+def adaptive_concurrency_enabled() -> bool:
+	return os.environ.get("ADAPTIVE_CONCURRENCY", "true").strip().lower() not in ("0", "false", "no")
+
+
+def get_concurrency_controller(host: str) -> Optional[AIMDController]:
+	"""返回该主机共享的 AIMD 控制器；初始值取上次运行学到的 limit（cache/concurrency.json）。"""
+
+	if not adaptive_concurrency_enabled():
+		return None
+	with _CONTROLLERS_LOCK:
+		controller = _CONTROLLERS.get(host)
+		if controller is None:
+			learned = load_json_state(CONCURRENCY_STATE_FILE).get(host)
+			initial = learned if isinstance(learned, (int, float)) else _HOST_INITIAL_CONCURRENCY.get(host, 4)
+			controller = AIMDController(host, initial=initial, maximum=int(_env_number("ADAPTIVE_MAX_CONCURRENCY", 16)))
+			_CONTROLLERS[host] = controller
+		return controller
+
+
+def concurrency_limit(host: str) -> Optional[int]:
+	controller = get_concurrency_controller(host)
+	return controller.limit if controller is not None else None
+
+
+def save_concurrency_state() -> None:
+	"""把本进程学到的各主机 limit 合并写回 cache/concurrency.json。"""
+
+	with _CONTROLLERS_LOCK:
+		learned = {host: c.limit for host, c in _CONTROLLERS.items()}
+	if not learned:
+		return
+	state = load_json_state(CONCURRENCY_STATE_FILE)
+	state.update(learned)
+	save_json_state(CONCURRENCY_STATE_FILE, state)
+
+
+class host_slot:
+	"""上下文管理器：占用主机的一个并发名额，退出时按结果反馈给 AIMD 控制器。
+
+	用法::
+
+		with host_slot("apps.bea.gov", cancel_token) as slot:
+			data = fetch()
+			slot.outcome = "ok"
+	未设置 outcome 时，正常退出记为 ok，超时异常记为 timeout，其余异常记为 error。
+	"""
+
+	def __init__(self, host: str, cancel_token: Optional[CancellationToken] = None) -> None:
+		self.controller = get_concurrency_controller(host)
+		self.cancel_token = cancel_token
+		self.outcome: Optional[str] = None
+		self._t0: float = 0.0
+
+	def __enter__(self) -> "host_slot":
+		if self.controller is not None:
+			self.controller.acquire(self.cancel_token)
+		self._t0 = time.perf_counter()
+		return self
+
+	def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+		if self.controller is None:
+			return
+		outcome = self.outcome
+		if outcome is None:
+			if exc_type is None:
+				outcome = "ok"
+			elif issubclass(exc_type, requests.exceptions.Timeout) or "Timeout" in exc_type.__name__:
+				outcome = "timeout"
+			else:
+				outcome = "error"
+		self.controller.release(outcome, time.perf_counter() - self._t0)
+
+
+class ThrottledError(Exception):
+	"""服务器要求的等待时间超过 RETRY_AFTER_MAX_SECONDS，放弃本次请求。"""
+
+
+_THROTTLE_MIN_WAIT = 5.0   # 429 且未给出 Retry-After 时的最短等待（秒）
+_THROTTLE_STATS: Dict[str, Dict[str, float]] = {}
+_THROTTLE_LOCK = threading.Lock()
+
+
+def parse_retry_after(headers: Any) -> Optional[float]:
+	"""解析 Retry-After（秒数或 HTTP 日期）以及常见的限流重置头，返回需要等待的秒数。"""
+
+	if not headers:
+		return None
+	value = headers.get("Retry-After")
+	if value:
+		value = str(value).strip()
+		try:
+			return max(0.0, float(value))
+		except ValueError:
+			try:
+				when = parsedate_to_datetime(value)
+				return max(0.0, when.timestamp() - time.time())
+			except (TypeError, ValueError):
+				pass
+	# RateLimit-Reset / X-RateLimit-Reset：秒数或 epoch 时间戳
+	for name in ("RateLimit-Reset", "X-RateLimit-Reset", "X-Rate-Limit-Reset"):
+		value = headers.get(name)
+		if not value:
+			continue
+		try:
+			reset = float(value)
+		except ValueError:
+			continue
+		return max(0.0, reset - time.time()) if reset > 1e9 else max(0.0, reset)
+	return None
+
+
+def _rate_limit_exhausted(headers: Any) -> bool:
+	for name in ("RateLimit-Remaining", "X-RateLimit-Remaining", "X-Rate-Limit-Remaining"):
+		value = headers.get(name) if headers else None
+		if value is not None:
+			try:
+				return float(value) <= 0
+			except ValueError:
+				return False
+	return False
+
+
+def _record_throttle(host: str, kind: str, wait: float) -> None:
+	with _THROTTLE_LOCK:
+		entry = _THROTTLE_STATS.setdefault(host, {"throttled": 0, "server_errors": 0, "proactive_pauses": 0, "wait_seconds": 0.0})
+		entry[kind] = entry.get(kind, 0) + 1
+		entry["wait_seconds"] = round(entry.get("wait_seconds", 0.0) + wait, 3)
+
+
+def throttle_stats() -> Dict[str, Dict[str, float]]:
+	"""本次运行中各主机的限流 / 服务端错误次数与累计等待时间。"""
+
+	with _THROTTLE_LOCK:
+		return {host: dict(entry) for host, entry in _THROTTLE_STATS.items()}
+
+
+def _server_backoff(url: str, status: Optional[int], headers: Any, fallback: float, transient: float) -> Optional[float]:
+	"""根据服务器信号决定下一次重试前的等待时间。
+
+	- 429：优先 Retry-After / 重置头，否则至少等待 _THROTTLE_MIN_WAIT 秒；同时暂停该主机的共享限速器；
+	- 5xx：属于瞬时错误，带 Retry-After 时照办，否则使用较短的指数退避（transient）；
+	- 其他：返回 None，沿用调用方的默认退避（fallback）。
+	"""
+
+	if status is None:
+		return None
+	host = url_host(url)
+	retry_after = parse_retry_after(headers)
+	if retry_after is not None and retry_after > _env_number("RETRY_AFTER_MAX_SECONDS", 120.0):
+		_record_throttle(host, "throttled", 0.0)
+		raise ThrottledError(f"{host} asked to retry after {retry_after:.0f}s, giving up")
+	if status == 429:
+		wait = retry_after if retry_after is not None else max(fallback, _THROTTLE_MIN_WAIT)
+		limiter = get_host_limiter(url, create=True)
+		if limiter is not None:
+			limiter.pause(wait)
+		_record_throttle(host, "throttled", wait)
+		logger.warning("HTTP 429 from %s, backing off %.1fs", host, wait)
+		return wait
+	if status >= 500:
+		wait = retry_after if retry_after is not None else transient
+		if retry_after is not None:
+			limiter = get_host_limiter(url, create=True)
+			if limiter is not None:
+				limiter.pause(wait)
+		_record_throttle(host, "server_errors", wait)
+		return wait
+	return None
+
+
+def _note_rate_limit_headers(url: str, headers: Any) -> None:
+	"""成功响应中若提示配额已用尽，提前暂停该主机的限速器，避免下一批请求撞上 429。"""
+
+	if not _rate_limit_exhausted(headers):
+		return
+	wait = parse_retry_after(headers)
+	if not wait:
+		return
+	wait = min(wait, _env_number("RETRY_AFTER_MAX_SECONDS", 120.0))
+	limiter = get_host_limiter(url, create=True)
+	if limiter is not None:
+		limiter.pause(wait)
+	_record_throttle(url_host(url), "proactive_pauses", wait)
+	logger.info("rate limit exhausted for %s, pausing %.1fs", url_host(url), wait)
+
+
 def _exponential_backoff_delays(max_attempts: int, base: float = 0.5, factor: float = 2.0, jitter: float = 0.25) -> List[float]:
 	"""生成指数退避延时序列（带抖动）。"""
 
@@ -98,31 +626,127 @@ def _exponential_backoff_delays(max_attempts: int, base: float = 0.5, factor: fl
 	return delays
 
 
-def http_get_with_retry(url: str, *, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, timeout: float = 30.0, max_attempts: int = 4, cancel_token: Optional[CancellationToken] = None) -> requests.Response:
-	"""带重试的 HTTP GET。"""
+def _slot_outcome(status: int) -> str:
+	if status == 429:
+		return "throttled"
+	return "error" if status >= 500 else "ok"
+
+
+def _http_cache_lookup(method: str, url: str, use_cache: bool, cache_ttl: Optional[float], *, params: Any = None, data: Any = None, json_data: Any = None) -> Tuple[Any, Optional[str], Any, bool]:
+	"""查询 HTTP 响应缓存（`downloaders.http_cache`）。
+
+	Returns:
+		(cache, key, entry, fresh) —— 缓存关闭时 cache/key/entry 为 None；
+		fresh 为 True 表示条目仍在 TTL 内，可直接返回。
+	"""
+
+	if not use_cache:
+		return None, None, None, False
+	from downloaders.http_cache import get_http_cache, make_cache_key, ttl_for
+
+	cache = get_http_cache()
+	if cache is None:
+		return None, None, None, False
+	key = make_cache_key(method, url, params=params, data=data, json_data=json_data)
+	entry = cache.get(key)
+	if entry is None:
+		return cache, key, None, False
+	ttl = ttl_for(url) if cache_ttl is None else float(cache_ttl)
+	return cache, key, entry, entry.age() < ttl
+
+
+def _http_cache_store(cache: Any, key: Optional[str], resp: requests.Response, cacheable: Optional[Callable[[requests.Response], bool]]) -> None:
+	if cache is None or key is None:
+		return
+	cache.count("misses")
+	try:
+		if cacheable is None or cacheable(resp):
+			cache.put(key, resp)
+	except Exception as e:
+		logger.warning("HTTP cache store failed for %s: %s", resp.url, e)
+
+
+def http_get_with_retry(url: str, *, params: Optional[Dict[str, Any]] = None, headers: Optional[Dict[str, str]] = None, timeout: float = 30.0, max_attempts: int = 4, cancel_token: Optional[CancellationToken] = None, use_cache: bool = True, cache_ttl: Optional[float] = None, cacheable: Optional[Callable[[requests.Response], bool]] = None, session: Any = None) -> requests.Response:
+	"""带重试的 HTTP GET。
+
+	`use_cache=True` 时先查询磁盘响应缓存：TTL 内直接返回；过期条目携带 ETag /
+	Last-Modified 发起条件请求，304 视为命中。`cache_ttl` 覆盖按主机的默认 TTL
+	（0 表示总是重新验证），`cacheable(resp)` 返回 False 的响应不写入缓存。
+	`session` 提供 `get(url, params=, headers=, timeout=)` 时用它代替 `requests.get`
+	（例如 `downloaders.impersonate` 的 curl_cffi 会话）。
+	"""
+
+	send = session.get if session is not None else requests.get
+	cache, key, entry, fresh = _http_cache_lookup("GET", url, use_cache, cache_ttl, params=params)
+	if fresh:
+		cache.count("hits")
+		logger.info("HTTP GET %s served from cache (age %.0fs)", url, entry.age())
+		return entry.to_response()
+	if entry is not None:
+		headers = {**(headers or {}), **entry.validators()}
 
 	delays = _exponential_backoff_delays(max_attempts)
+	transient_delays = delays
+	breaker = get_circuit_breaker(url_host(url))
+	budget = get_retry_budget()
 	last_exc: Optional[Exception] = None
 	for i, delay in enumerate(delays, start=1):
+		server_wait: Optional[float] = None
+		throttled = False
 		if cancel_token is not None:
 			cancel_token.raise_if_cancelled()
+		probe = breaker.before_request()
 		try:
-			t0 = time.perf_counter()
-			resp = requests.get(url, params=params, headers=headers, timeout=timeout)
-			dt = time.perf_counter() - t0
-			status = getattr(resp, "status_code", None)
-			logger.info("HTTP GET %s attempt=%d status=%s in %.3fs", url, i, status, dt)
-			if resp.ok:
-				return resp
-			if status is not None and 400 <= int(status) < 500 and int(status) in {400, 401, 403, 404, 405, 406, 410, 422}:
-				raise Exception(f"non-retriable client error: status={status}")
-			last_exc = Exception(f"status={status}")
-		except Exception as e:
-			last_exc = e
-			logger.warning("HTTP GET %s attempt=%d failed: %s", url, i, e)
+			# 每次尝试重新获取：被限流后才创建的限速器也能生效
+			limiter = get_host_limiter(url)
+			if limiter is not None:
+				limiter.acquire(cancel_token)
+			try:
+				t0 = time.perf_counter()
+				with host_slot(url_host(url), cancel_token) as slot:
+					resp = send(url, params=params, headers=headers, timeout=timeout)
+					slot.outcome = _slot_outcome(resp.status_code)
+				dt = time.perf_counter() - t0
+				status = getattr(resp, "status_code", None)
+				logger.info("HTTP GET %s attempt=%d status=%s in %.3fs", url, i, status, dt)
+				if status == 304 and entry is not None:
+					breaker.record_success()
+					cache.touch(key)
+					cache.count("revalidated")
+					return entry.to_response()
+				if resp.ok:
+					breaker.record_success()
+					_note_rate_limit_headers(url, resp.headers)
+					_http_cache_store(cache, key, resp, cacheable)
+					return resp
+				if status is not None and 400 <= int(status) < 500 and int(status) in {400, 401, 403, 404, 405, 406, 410, 422}:
+					# 主机可达，只是请求本身有误：不计入熔断，也不重试
+					breaker.record_success()
+					raise HTTPClientError(f"non-retriable client error: status={status}")
+				throttled = status == 429
+				server_wait = _server_backoff(url, status, resp.headers, float(delay), transient_delays[i - 1])
+				last_exc = Exception(f"status={status}")
+			except (HTTPClientError, CancelledError):
+				raise
+			except ThrottledError:
+				throttled = True
+				raise
+			except Exception as e:
+				last_exc = e
+				logger.warning("HTTP GET %s attempt=%d failed: %s", url, i, e)
+			if not throttled:
+				# 429 说明主机健康、只是在限流，不计入熔断
+				breaker.record_failure()
+		finally:
+			if probe:
+				# 被限流、取消或 ThrottledError 时探测未经 record_* 结算，这里兜底
+				breaker.release_probe(reopen=throttled)
 		if i < max_attempts:
+			if not budget.take():
+				logger.warning("retry budget exhausted, giving up on %s after %d attempts", url, i)
+				break
 			try:
-				_sleep_with_cancel(delay, cancel_token)
+				_sleep_with_cancel(delay if server_wait is None else server_wait, cancel_token)
 			except CancelledError:
 				raise
 	if cancel_token is not None:
@@ -130,32 +754,84 @@ def http_get_with_retry(url: str, *, params: Optional[Dict[str, Any]] = None, he
 	raise Exception(f"GET {url} failed after {max_attempts} attempts: {last_exc}")
 
 
-def http_post_with_retry(url: str, *, data: Any = None, json_data: Any = None, headers: Optional[Dict[str, str]] = None, timeout: float = 30.0, max_attempts: int = 4, delay_seconds: Optional[float] = None, cancel_token: Optional[CancellationToken] = None) -> requests.Response:
-	"""带重试的 HTTP POST（支持固定间隔或指数退避）。"""
+def http_post_with_retry(url: str, *, data: Any = None, json_data: Any = None, headers: Optional[Dict[str, str]] = None, timeout: float = 30.0, max_attempts: int = 4, delay_seconds: Optional[float] = None, cancel_token: Optional[CancellationToken] = None, use_cache: bool = True, cache_ttl: Optional[float] = None, cacheable: Optional[Callable[[requests.Response], bool]] = None) -> requests.Response:
+	"""带重试的 HTTP POST（支持固定间隔或指数退避）。
+
+	缓存语义同 `http_get_with_retry`；缓存键包含规范化后的请求体（剔除 registrationKey 等密钥）。
+	"""
 
-	delays = [delay_seconds] * max_attempts if delay_seconds is not None else _exponential_backoff_delays(max_attempts)
+	cache, key, entry, fresh = _http_cache_lookup("POST", url, use_cache, cache_ttl, data=data, json_data=json_data)
+	if fresh:
+		cache.count("hits")
+		logger.info("HTTP POST %s served from cache (age %.0fs)", url, entry.age())
+		return entry.to_response()
+	if entry is not None:
+		headers = {**(headers or {}), **entry.validators()}
+
+	transient_delays = _exponential_backoff_delays(max_attempts)
+	delays = [delay_seconds] * max_attempts if delay_seconds is not None else transient_delays
+	breaker = get_circuit_breaker(url_host(url))
+	budget = get_retry_budget()
 	last_exc: Optional[Exception] = None
 	for i, delay in enumerate(delays, start=1):
+		server_wait: Optional[float] = None
+		throttled = False
 		if cancel_token is not None:
 			cancel_token.raise_if_cancelled()
+		probe = breaker.before_request()
 		try:
-			t0 = time.perf_counter()
-			resp = requests.post(url, data=data, json=json_data, headers=headers, timeout=timeout)
-			dt = time.perf_counter() - t0
-			status = getattr(resp, "status_code", None)
-			logger.info("HTTP POST %s attempt=%d status=%s in %.3fs", url, i, status, dt)
-			if resp.ok:
-				return resp
-			if status is not None and 400 <= int(status) < 500 and int(status) in {400, 401, 403, 404, 405, 406, 410, 422}:
-				raise Exception(f"non-retriable client error: status={status}")
-			last_exc = Exception(f"status={status}")
-		except Exception as e:
-			last_exc = e
-			logger.warning("HTTP POST %s attempt=%d failed: %s", url, i, e)
+			# 每次尝试重新获取：被限流后才创建的限速器也能生效
+			limiter = get_host_limiter(url)
+			if limiter is not None:
+				limiter.acquire(cancel_token)
+			try:
+				t0 = time.perf_counter()
+				with host_slot(url_host(url), cancel_token) as slot:
+					resp = requests.post(url, data=data, json=json_data, headers=headers, timeout=timeout)
+					slot.outcome = _slot_outcome(resp.status_code)
+				dt = time.perf_counter() - t0
+				status = getattr(resp, "status_code", None)
+				logger.info("HTTP POST %s attempt=%d status=%s in %.3fs", url, i, status, dt)
+				if status == 304 and entry is not None:
+					breaker.record_success()
+					cache.touch(key)
+					cache.count("revalidated")
+					return entry.to_response()
+				if resp.ok:
+					breaker.record_success()
+					_note_rate_limit_headers(url, resp.headers)
+					_http_cache_store(cache, key, resp, cacheable)
+					return resp
+				if status is not None and 400 <= int(status) < 500 and int(status) in {400, 401, 403, 404, 405, 406, 410, 422}:
+					# 主机可达，只是请求本身有误：不计入熔断，也不重试
+					breaker.record_success()
+					raise HTTPClientError(f"non-retriable client error: status={status}")
+				throttled = status == 429
+				server_wait = _server_backoff(url, status, resp.headers, float(delay), transient_delays[i - 1])
+				last_exc = Exception(f"status={status}")
+			except (HTTPClientError, CancelledError):
+				raise
+			except ThrottledError:
+				throttled = True
+				raise
+			except Exception as e:
+				last_exc = e
+				logger.warning("HTTP POST %s attempt=%d failed: %s", url, i, e)
+			if not throttled:
+				# 429 说明主机健康、只是在限流，不计入熔断
+				breaker.record_failure()
+		finally:
+			if probe:
+				# 被限流、取消或 ThrottledError 时探测未经 record_* 结算，这里兜底
+				breaker.release_probe(reopen=throttled)
 		if i < max_attempts:
+			if not budget.take():
+				logger.warning("retry budget exhausted, giving up on %s after %d attempts", url, i)
+				break
+			wait = float(delay) if server_wait is None else server_wait
 			try:
-				logger.info("Retrying POST in %.1fs (attempt %d/%d)", float(delay), i + 1, max_attempts)
-				_sleep_with_cancel(delay, cancel_token)
+				logger.info("Retrying POST in %.1fs (attempt %d/%d)", wait, i + 1, max_attempts)
+				_sleep_with_cancel(wait, cancel_token)
 			except CancelledError:
 				raise
 			except Exception:
@@ -165,37 +841,89 @@ def http_post_with_retry(url: str, *, data: Any = None, json_data: Any = None, h
 	raise Exception(f"POST {url} failed after {max_attempts} attempts: {last_exc}")
 
 
+def _yf_rate_limited(symbol: str, exc: Optional[BaseException] = None) -> bool:
+	"""判断 yfinance 是否因 Yahoo 限流而失败。
+
+	yf.download 会吞掉异常并返回空表，错误信息记录在 `yf.shared._ERRORS`；直接抛出时看异常类型。
+	"""
+
+	if exc is not None:
+		return type(exc).__name__ == "YFRateLimitError" or "Too Many Requests" in str(exc)
+	try:
+		errors = getattr(getattr(yf, "shared", None), "_ERRORS", None) or {}
+		message = str(errors.get(symbol) or errors.get(symbol.upper()) or "")
+	except Exception:
+		return False
+	return "RateLimit" in message or "Too Many Requests" in message
+
+
 def yf_download_with_retry(symbol: str, *, start: str, end: str, interval: str = "1d", max_attempts: int = 5, cancel_token: Optional[CancellationToken] = None) -> pd.DataFrame:
-	"""yfinance.download 包装器（带指数退避与限流容错）。"""
+	"""yfinance.download 包装器（带指数退避与限流容错）。
+
+	Yahoo 限流（YFRateLimitError）按 429 处理：槽位记为 throttled，不计入熔断。
+	"""
 
 	delays = _exponential_backoff_delays(max_attempts=max_attempts, base=1.0, factor=2.0, jitter=0.5)
 	last_err: Optional[Exception] = None
+	breaker = get_circuit_breaker("yfinance")
+	budget = get_retry_budget()
 
 	for i, dly in enumerate(delays, start=1):
+		throttled = False
 		if cancel_token is not None:
 			cancel_token.raise_if_cancelled()
+		probe = breaker.before_request()
 		try:
-			t0 = time.perf_counter()
-			df = pd.DataFrame(
-				yf.download(
-					symbol,
-					start=start,
-					end=end,
-					interval=interval,
-					auto_adjust=False,
-					progress=False,
-					threads=False,
-				)
-			)
-			dt = time.perf_counter() - t0
-			logger.info("YF GET %s attempt=%d rows=%d in %.3fs", symbol, i, len(df), dt)
-			if not df.empty:
-				return df
-			last_err = Exception("empty dataframe")
-		except Exception as e:
-			last_err = e
-			logger.warning("YF GET %s attempt=%d failed: %s", symbol, i, getattr(e, "message", str(e)))
+			try:
+				t0 = time.perf_counter()
+				with host_slot("yfinance", cancel_token) as slot:
+					try:
+						df = pd.DataFrame(
+							yf.download(
+								symbol,
+								start=start,
+								end=end,
+								interval=interval,
+								auto_adjust=False,
+								progress=False,
+								threads=False,
+							)
+						)
+					except Exception as e:
+						throttled = _yf_rate_limited(symbol, e)
+						if throttled:
+							slot.outcome = "throttled"
+						raise
+					if df.empty:
+						throttled = _yf_rate_limited(symbol)
+						slot.outcome = "throttled" if throttled else "error"
+					else:
+						slot.outcome = "ok"
+				dt = time.perf_counter() - t0
+				logger.info("YF GET %s attempt=%d rows=%d in %.3fs", symbol, i, len(df), dt)
+				if not df.empty:
+					breaker.record_success()
+					return df
+				last_err = Exception("rate limited" if throttled else "empty dataframe")
+			except CancelledError:
+				raise
+			except Exception as e:
+				last_err = e
+				logger.warning("YF GET %s attempt=%d failed: %s", symbol, i, getattr(e, "message", str(e)))
+			if throttled:
+				# yfinance 不暴露响应头：被限流时至少等待 _THROTTLE_MIN_WAIT 秒；限流不计入熔断
+				dly = max(dly, _THROTTLE_MIN_WAIT)
+				_record_throttle("yfinance", "throttled", dly)
+				logger.warning("Yahoo rate limit for %s, backing off %.1fs", symbol, dly)
+			else:
+				breaker.record_failure()
+		finally:
+			if probe:
+				breaker.release_probe(reopen=throttled)
 		if i < max_attempts:
+			if not budget.take():
+				logger.warning("retry budget exhausted, giving up on %s after %d attempts", symbol, i)
+				break
 			try:
 				_sleep_with_cancel(dly, cancel_token)
 			except CancelledError:
@@ -212,6 +940,14 @@ class DatabaseConverter:
 		"sep": 9, "oct": 10, "nov": 11, "dec": 12
 	}
 	end_date: date = date.today()
+	# 可选的帧接收器：设置后 write_into_db 不再直接写库，而是把规范化后的 (date, value) 帧交给它。
+	# 常驻 worker 进程借此把解析结果回传父进程，由父进程的单一写线程落库（见 worker_pool.py）。
+	frame_sink: Optional[Callable[..., Any]] = None
+	# 写库成功后的回调列表：listener(data_name, obs_dates, start_date)
+	write_listeners: List[Callable[[str, List[str], Optional[str]], None]] = []
+	# 写库确认处理器：kind -> handler(ack)。ack 是随帧传递的可序列化字典，只在该帧真正落库后执行，
+	# 经 frame_sink 转交时随帧一起回传，由实际写库的进程执行（如 FRED 探测水位）。
+	write_acks: Dict[str, Callable[[Dict[str, Any]], None]] = {}
 
 	def __init__(self, db_file: str = "data.db") -> None:
 		self.db_file: str = db_file
@@ -391,6 +1127,28 @@ class DatabaseConverter:
 			logger.warning(f"fallback in _format_converter failed: {e}")
 			return df
 
+	def _ffill_tails(self) -> None:
+		"""把每一列最后一个非空值向后填充到表尾（新追加的日期行）。
+
+		刷新计划器 / FRED 探测跳过的序列本次不写库，新追加到今天的日期行在这些列上为 NULL；
+		与 write_into_db 逐日填充到今天的规则一致，这里对每列执行一次 UPDATE 补齐尾部。
+		"""
+		cursor = self.cursor
+		columns = [str(r[1]) for r in cursor.execute("PRAGMA table_info('Time_Series')").fetchall() if str(r[1]) != "date"]
+		t0 = time.perf_counter()
+		filled = 0
+		for column in columns:
+			if not _RE_SAFE_IDENT.fullmatch(column):
+				continue
+			cursor.execute(
+				f"UPDATE Time_Series SET {column} = ("
+				f"SELECT t.{column} FROM Time_Series t WHERE t.{column} IS NOT NULL ORDER BY t.date DESC LIMIT 1"
+				f") WHERE {column} IS NULL AND date > ("
+				f"SELECT MAX(t.date) FROM Time_Series t WHERE t.{column} IS NOT NULL)"
+			)
+			filled += max(cursor.rowcount, 0)
+		logger.info("Time_Series forward-filled %d trailing cells over %d columns (%.3fs)", filled, len(columns), time.perf_counter() - t0)
+
 	def _create_ts_sheet(self, start_date: str) -> sqlite3.Cursor:
 		cursor = self.cursor
 		logger.debug("ensure Time_Series table exists (start_date=%s)", start_date)
@@ -461,6 +1219,7 @@ class DatabaseConverter:
 							"INSERT OR IGNORE INTO Time_Series (date) VALUES (?)",
 							rows_append
 						)
+						self._ffill_tails()
 						self.conn.commit()
 						logger.info("Time_Series table appended %d future date rows (%.3fs)", len(rows_append), time.perf_counter() - t0_fwd)
 				return cursor
@@ -509,48 +1268,81 @@ class DatabaseConverter:
 			logger.error("Failed to ensure PRIMARY KEY on Time_Series: %s", e)
 			self.conn.rollback()
 
+	@staticmethod
+	def _to_compact(df: SeriesData, data_name: str, is_pct_data: bool) -> Optional[CompactSeries]:
+		"""写库输入 -> 去重排序后的紧凑序列；DataFrame 先经 _format_converter 规范化。"""
+		if isinstance(df, CompactSeries):
+			return df.rename(data_name).dedup()
+		df_fmt = DatabaseConverter._format_converter(df, data_name, is_pct_data)
+		if df_fmt.empty or "date" not in df_fmt.columns or data_name not in df_fmt.columns:
+			return None
+		return CompactSeries.from_frame(df_fmt, data_name).dedup()
+
+	@staticmethod
+	def run_ack(ack: Optional[Dict[str, Any]]) -> None:
+		"""执行一次写库确认；未注册的 kind 与处理器异常只记日志。"""
+		if not ack:
+			return
+		handler = DatabaseConverter.write_acks.get(str(ack.get("kind")))
+		if handler is None:
+			logger.warning("no write ack handler for %s", ack.get("kind"))
+			return
+		try:
+			handler(ack)
+		except Exception as e:
+			logger.warning("write ack %s failed: %s", ack.get("kind"), e)
+
 	def write_into_db(
 		self,
-		df: pd.DataFrame,
+		df: SeriesData,
 		data_name: str,
 		start_date: str = None,
 		is_time_series: bool = False,
 		is_pct_data: bool = False,
 		overwrite_existing: bool = True,
-		only_fill_null: bool = False
-	):
+		only_fill_null: bool = False,
+		ack: Optional[Dict[str, Any]] = None
+	) -> Optional[CompactSeries]:
+		"""写入 Time_Series 的一列；返回 [start_date, 今天] 的逐日紧凑序列（导出 CSV 时再转为表格）。
+
+		ack 为写库确认（见 `write_acks`），写入成功后执行；交给 frame_sink 时随帧转交。
+		"""
+		sink = DatabaseConverter.frame_sink
+		if sink is not None and is_time_series and not df.empty:
+			# 解析/规范化在当前进程完成（CPU 密集部分），写库交给接收器
+			series = DatabaseConverter._to_compact(df, data_name, is_pct_data)
+			if series is None:
+				logger.error("%s reformat produced empty/invalid dataframe, skip forwarding", data_name)
+				return None
+			return sink(
+				series,
+				data_name,
+				start_date=start_date,
+				is_pct_data=is_pct_data,
+				overwrite_existing=overwrite_existing,
+				only_fill_null=only_fill_null,
+				ack=ack,
+			)
 		with DB_WRITE_LOCK:
 			t_all = time.perf_counter()
 			self._create_ts_sheet(start_date=start_date)
 			self._ensure_ts_primary_key()
 			cursor = self.cursor
 			try:
-				logger.info("write_into_db start: data=%s, is_time_series=%s, shape=%s", data_name, is_time_series, tuple(df.shape))
+				logger.info("write_into_db start: data=%s, is_time_series=%s, points=%d", data_name, is_time_series, len(df))
 				if df.empty:
 					logger.error(f"{data_name} is empty, FAILED INSERT, locate in write_into_db")
 				else:
 					if is_time_series:
 						t0 = time.perf_counter()
-						df_fmt: pd.DataFrame = DatabaseConverter._format_converter(df, data_name, is_pct_data)
-						logger.debug("%s after format: columns=%s, shape=%s", data_name, list(df_fmt.columns), tuple(df_fmt.shape))
-						if df_fmt.empty or "date" not in df_fmt.columns:
+						series = DatabaseConverter._to_compact(df, data_name, is_pct_data)
+						if series is None:
 							logger.error("%s reformat produced empty/invalid dataframe, skip writing", data_name)
 							return
-						df_fmt = df_fmt.copy()
-						df_fmt["date"] = pd.to_datetime(df_fmt["date"], errors="coerce")
-						df_fmt = df_fmt.dropna(subset=["date"]).drop_duplicates(subset=["date"], keep="last")
-						df_fmt["date"] = df_fmt["date"].dt.strftime("%Y-%m-%d")
-
-						all_dates = pd.date_range(start=start_date, end=date.today(), freq="D")
-						df_full = pd.DataFrame({"date": [d.strftime("%Y-%m-%d") for d in all_dates]})
-						df_full = df_full.merge(df_fmt, on="date", how="left")
-						if df_full[data_name].notna().any():
-							mask = df_full[data_name].notna().to_numpy(dtype=bool, copy=False)
-							first_valid_pos = int(np.flatnonzero(mask)[0])
-							if pd.isna(df_full.iloc[0][data_name]):
-								first_valid_value = df_full.iloc[first_valid_pos][data_name]
-								df_full.loc[df_full.index[:first_valid_pos + 1], data_name] = first_valid_value
-						df_full[data_name] = df_full[data_name].ffill()
+						logger.debug("%s after format: %d points", data_name, len(series))
+
+						# 逐日展开并向前填充（第一个观测值之前用它回填），全部在 NumPy 数组上完成
+						full = series.align(start_date, date.today())
 
 						if not _RE_SAFE_IDENT.fullmatch(data_name):
 							logger.error("Invalid column name '%s', abort writing", data_name)
@@ -570,32 +1362,25 @@ class DatabaseConverter:
 							except sqlite3.Error:
 								pass
 
-						# 向量化构建待更新行：
-						# 1) 先用布尔掩码过滤掉 NaN 行（原循环中 `if pd.isna(v): continue`）；
-						# 2) 当需要跳过已有非空值时，再用一次基于 existing_map 的向量过滤，
-						#    取代原先的逐行 `if ds in existing_map ...` 判断。
-						# 仅在最终压缩后的小数组上构造元组列表，大幅减少 Python 循环开销。
-						sub = df_full[["date", data_name]]
-						mask = sub[data_name].notna().to_numpy(dtype=bool, copy=False)
+						# 向量化构建待更新行：过滤 NaN，需要跳过已有非空值时再按日期集合过滤，
+						# 只在最终压缩后的小数组上构造元组列表。
+						dates_arr = full.date_strings()
+						mask = ~np.isnan(full.values)
 						if existing_map and (only_fill_null or not overwrite_existing):
 							# 构造「已有非空值的日期集合」用于向量过滤
 							skip_dates = {
 								d for d, v in existing_map.items() if v is not None
 							}
 							if skip_dates:
-								date_arr = sub["date"].to_numpy()
 								keep = np.fromiter(
-									(str(d) not in skip_dates for d in date_arr),
-									count=len(date_arr),
+									(str(d) not in skip_dates for d in dates_arr),
+									count=len(dates_arr),
 									dtype=bool,
 								)
 								mask &= keep
 						if mask.any():
-							filtered = sub[mask]
-							dates_arr = filtered["date"].astype(str).to_numpy()
-							vals_arr = filtered[data_name].astype(float).to_numpy()
 							update_rows: List[Tuple[float, str]] = list(
-								zip(vals_arr.tolist(), dates_arr.tolist())
+								zip(full.values[mask].tolist(), dates_arr[mask].tolist())
 							)
 						else:
 							update_rows = []
@@ -612,14 +1397,20 @@ class DatabaseConverter:
 							'overwrite' if overwrite_existing else 'no_overwrite',
 							only_fill_null,
 							len(update_rows),
-							(time.perf_counter() - t0),
+							(t_sql - t0),
 							(time.perf_counter() - t_sql),
 							(time.perf_counter() - t0)
 						)
-						rtn_df = df_full[["date", data_name]].copy()
-						logger.debug("%s returns 2 cols shape=%s", data_name, tuple(rtn_df.shape))
+						# 通知写库监听者（如刷新计划器），传入本次实际观测到的日期
+						obs_dates = series.dropna().date_strings().tolist()
+						for listener in list(DatabaseConverter.write_listeners):
+							try:
+								listener(data_name, obs_dates, start_date)
+							except Exception as e:
+								logger.warning("write listener failed for %s: %s", data_name, e)
+						DatabaseConverter.run_ack(ack)
 						logger.info("write_into_db finished: data=%s (%.3fs)", data_name, time.perf_counter() - t_all)
-						return rtn_df
+						return full
 
 			except Exception as e:
 				logger.error(f"FAILED to write into database, in method write_into_db, since {e}")
@@ -631,5 +1422,295 @@ class DataDownloader(ABC):
 	"""下载器抽象基类。"""
 
 	@abstractmethod
-	def to_db(self, return_csv: bool = False, max_workers: Optional[int] = None, cancel_token: Optional["CancellationToken"] = None) -> Optional[Dict[str, pd.DataFrame]]:
+	def to_db(self, return_csv: bool = False, max_workers: Optional[int] = None, cancel_token: Optional["CancellationToken"] = None) -> Optional[Dict[str, Path]]:
+		"""下载并写库；return_csv 时返回 {配置名: CSV 路径}（逐日数据不随返回值保留在内存中）。"""
+		raise NotImplementedError
+
+
+_PIPELINE_DONE = object()  # 阶段结束标记
+
+
+class PipelineStage:
+	"""流水线中一个阶段的计数与耗时：busy 为执行本阶段函数的时间，blocked 为下游队列满时等待的时间。"""
+
+	def __init__(self, name: str, workers: int) -> None:
+		self.name = name
+		self.workers = workers
+		self.ok = 0
+		self.failed = 0
+		self.busy = 0.0
+		self.blocked = 0.0
+		self.max_backlog = 0
+		self._lock = threading.Lock()
+
+	def record(self, ok: bool, busy: float) -> None:
+		with self._lock:
+			if ok:
+				self.ok += 1
+			else:
+				self.failed += 1
+			self.busy += busy
+
+	def record_put(self, blocked: float, backlog: int) -> None:
+		with self._lock:
+			self.blocked += blocked
+			self.max_backlog = max(self.max_backlog, backlog)
+
+	def summary(self) -> Dict[str, Any]:
+		return {
+			"workers": self.workers,
+			"ok": self.ok,
+			"failed": self.failed,
+			"busy_seconds": round(self.busy, 3),
+			"blocked_seconds": round(self.blocked, 3),
+			"max_backlog": self.max_backlog,
+		}
+
+	def __str__(self) -> str:
+		return (
+			f"{self.name} x{self.workers}: {self.ok} ok / {self.failed} failed, "
+			f"busy {self.busy:.2f}s, blocked {self.blocked:.2f}s, backlog<={self.max_backlog}"
+		)
+
+
+class PipelineDownloader(DataDownloader):
+	"""分阶段的 API 下载器：fetch（网络）→ parse（CPU）→ write（写库），阶段之间用有界队列连接。
+
+	- 每个阶段有自己的线程数：fetch 为 `<SOURCE>_WORKERS`（或 max_workers），parse 为
+	  `<SOURCE>_PARSE_WORKERS`，write 固定 1 个（写库本身由 DB_WRITE_LOCK 串行化）；
+	- 队列容量 `PIPELINE_QUEUE_SIZE`（默认 8）：下游处理不过来时上游阻塞（背压），已下载未写库的帧数量有上限；
+	- 子类只实现 `fetch()` 与 `parse()`，返回 None 表示该序列失败（由子类记录原因）；
+	  `prepare()` / `write_ack()` / `after_write()` / `finish()` 为可选钩子；
+	- 每次运行结束记录各阶段的成功 / 失败数、忙碌与阻塞时间，保存在 `pipeline_stats`。
+	"""
+
+	source: str = "PIPELINE"
+	host: str = ""
+	default_fetch_workers: int = 4
+	default_parse_workers: int = 2
+	write_workers: int = 1
+
+	json_dict: Dict[str, Dict[str, Any]]
+	start_date: str
+	pipeline_stats: Dict[str, Dict[str, Any]] = {}
+
+	@abstractmethod
+	def fetch(self, table_name: str, table_config: Dict[str, Any], cancel_token: Optional[CancellationToken]) -> Any:
+		"""下载一个序列的原始数据（网络阶段）。"""
 		raise NotImplementedError
+
+	@abstractmethod
+	def parse(self, table_name: str, table_config: Dict[str, Any], raw: Any) -> Optional[SeriesData]:
+		"""原始数据 -> 待写库的 DataFrame 或 CompactSeries（CPU 阶段，不访问网络）。"""
+		raise NotImplementedError
+
+	def prepare(
+		self,
+		items: List[Tuple[str, Dict[str, Any]]],
+		workers: int,
+		cancel_token: Optional[CancellationToken],
+	) -> List[Tuple[str, Dict[str, Any]]]:
+		"""运行前筛选需要下载的条目。"""
+		return items
+
+	def write(self, table_name: str, table_config: Dict[str, Any], df: SeriesData) -> Optional[CompactSeries]:
+		return DatabaseConverter().write_into_db(
+			df=df,
+			data_name=table_config["name"],
+			start_date=self.start_date,
+			is_time_series=True,
+			is_pct_data=table_config["needs_pct"],
+			ack=self.write_ack(table_name, table_config),
+		)
+
+	def write_ack(self, table_name: str, table_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+		"""随帧传递的写库确认（见 `DatabaseConverter.write_acks`），在该序列真正落库后执行。
+
+		与 `after_write()` 不同，设置了 frame_sink 时由实际写库的一方（worker 池父进程）执行。
+		"""
+		return None
+
+	def after_write(self, table_name: str, table_config: Dict[str, Any]) -> None:
+		"""单个序列在本进程写库成功后调用（在写线程中）；帧交给 frame_sink 时不调用。"""
+
+	def finish(self) -> None:
+		"""运行结束（包括取消与失败）时调用。"""
+
+	@staticmethod
+	def _env_workers(name: str, default: int) -> int:
+		raw = os.environ.get(name)
+		return int(raw) if raw and raw.isdigit() and int(raw) > 0 else default
+
+	def to_db(
+		self,
+		return_csv: bool = False,
+		max_workers: Optional[int] = None,
+		cancel_token: Optional[CancellationToken] = None,
+	) -> Optional[Dict[str, Path]]:
+		"""返回 return_csv 时为 {配置名: CSV 路径}；CSV 在写库完成后从数据库流式导出。"""
+		written: Dict[str, str] = {}
+		items = list(self.json_dict.items())
+		if not items:
+			return {} if return_csv else None
+
+		fetch_workers = max_workers or self._env_workers(f"{self.source}_WORKERS", self.default_fetch_workers)
+		try:
+			items = self.prepare(items, fetch_workers, cancel_token)
+			if items:
+				written = self._run_pipeline(items, fetch_workers, cancel_token)
+		finally:
+			self.finish()
+
+		if not return_csv:
+			return None
+		if not written or DatabaseConverter.frame_sink is not None:
+			# 帧交给接收器时由接收方（如 worker 池的写线程）落库并导出
+			return {}
+		if cancel_token is not None:
+			cancel_token.raise_if_cancelled()
+		from downloaders.csv_export import export_store_csv
+
+		return export_store_csv(written.items(), self.start_date, wide_name=self.source.lower())
+
+	def _write_one(self, table_name: str, table_config: Dict[str, Any], df: SeriesData, token: Optional[CancellationToken]) -> Optional[str]:
+		"""写入一个序列，成功时返回其列名（只记录名称，逐日数据不留在内存中）。"""
+		if token is not None:
+			token.raise_if_cancelled()
+		final_result = self.write(table_name, table_config, df)
+		if DatabaseConverter.frame_sink is None:
+			if final_result is None:
+				return None
+			self.after_write(table_name, table_config)
+		# 设置了 frame_sink 时 write_into_db 把帧转交接收器并返回 None：转交即视为本阶段成功，
+		# 落库是否成功由接收方确认（write_ack）
+		logger.info("%s Successfully extracted! rows=%d", table_name, len(df))
+		return table_config["name"]
+
+	def _run_pipeline(
+		self,
+		items: List[Tuple[str, Dict[str, Any]]],
+		fetch_workers: int,
+		token: Optional[CancellationToken],
+	) -> Dict[str, str]:
+		fetch_workers = max(1, min(fetch_workers, len(items)))
+		parse_workers = max(1, min(self._env_workers(f"{self.source}_PARSE_WORKERS", self.default_parse_workers), len(items)))
+		queue_size = max(1, int(_env_number("PIPELINE_QUEUE_SIZE", 8)))
+		stages = {
+			"fetch": PipelineStage("fetch", fetch_workers),
+			"parse": PipelineStage("parse", parse_workers),
+			"write": PipelineStage("write", self.write_workers),
+		}
+		todo: "queue.Queue[Tuple[str, Dict[str, Any]]]" = queue.Queue()
+		for item in items:
+			todo.put(item)
+		raw_q: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+		write_q: "queue.Queue[Any]" = queue.Queue(maxsize=queue_size)
+		abort = threading.Event()
+		cancel_errors: List[CancelledError] = []
+		results: Dict[str, str] = {}
+
+		logger.info(
+			"%s pipeline: %d tasks (fetch=%d parse=%d write=%d queue=%d, adaptive limit=%s)",
+			self.source, len(items), fetch_workers, parse_workers, self.write_workers, queue_size,
+			concurrency_limit(self.host) if self.host else None,
+		)
+
+		def _stopped() -> bool:
+			return abort.is_set() or (token is not None and token.cancelled())
+
+		def _put(q: "queue.Queue[Any]", item: Any, stage: Optional[PipelineStage]) -> bool:
+			t0 = time.perf_counter()
+			while not _stopped():
+				try:
+					q.put(item, timeout=0.2)
+				except queue.Full:
+					continue
+				if stage is not None:
+					stage.record_put(time.perf_counter() - t0, q.qsize())
+				return True
+			return False
+
+		def _get(q: "queue.Queue[Any]") -> Any:
+			while not _stopped():
+				try:
+					return q.get(timeout=0.2)
+				except queue.Empty:
+					continue
+			return _PIPELINE_DONE
+
+		def _step(stage: PipelineStage, table_name: str, func: Callable[..., Any], *args: Any) -> Any:
+			t0 = time.perf_counter()
+			try:
+				out = func(*args)
+			except CancelledError as e:
+				cancel_errors.append(e)
+				abort.set()
+				return None
+			except Exception as e:
+				logger.error("%s %s FAILED for %s: %s", self.source, stage.name, table_name, e)
+				out = None
+			stage.record(out is not None, time.perf_counter() - t0)
+			return out
+
+		def fetch_loop() -> None:
+			while not _stopped():
+				try:
+					table_name, table_config = todo.get_nowait()
+				except queue.Empty:
+					return
+				raw = _step(stages["fetch"], table_name, self.fetch, table_name, table_config, token)
+				if raw is not None:
+					_put(raw_q, (table_name, table_config, raw), stages["fetch"])
+
+		def parse_loop() -> None:
+			while True:
+				item = _get(raw_q)
+				if item is _PIPELINE_DONE:
+					return
+				table_name, table_config, raw = item
+				df = _step(stages["parse"], table_name, self.parse, table_name, table_config, raw)
+				if df is not None:
+					_put(write_q, (table_name, table_config, df), stages["parse"])
+
+		def write_loop() -> None:
+			while True:
+				item = _get(write_q)
+				if item is _PIPELINE_DONE:
+					return
+				table_name, table_config, df = item
+				column = _step(stages["write"], table_name, self._write_one, table_name, table_config, df, token)
+				if column is not None:
+					results[table_name] = column
+
+		def _start(target: Callable[[], None], name: str, n: int) -> List[threading.Thread]:
+			threads = [threading.Thread(target=target, name=f"{self.source}-{name}-{i}", daemon=True) for i in range(n)]
+			for t in threads:
+				t.start()
+			return threads
+
+		t_all = time.perf_counter()
+		fetchers = _start(fetch_loop, "fetch", fetch_workers)
+		parsers = _start(parse_loop, "parse", parse_workers)
+		writers = _start(write_loop, "write", self.write_workers)
+		# 上游全部结束后再向下游发送结束标记（每个消费者一个）
+		for t in fetchers:
+			t.join()
+		for _ in parsers:
+			_put(raw_q, _PIPELINE_DONE, None)
+		for t in parsers:
+			t.join()
+		for _ in writers:
+			_put(write_q, _PIPELINE_DONE, None)
+		for t in writers:
+			t.join()
+
+		self.pipeline_stats = {name: stage.summary() for name, stage in stages.items()}
+		logger.info(
+			"%s pipeline finished in %.3fs | %s",
+			self.source, time.perf_counter() - t_all, " | ".join(str(stage) for stage in stages.values()),
+		)
+		if cancel_errors:
+			raise cancel_errors[0]
+		if token is not None:
+			token.raise_if_cancelled()
+		return results
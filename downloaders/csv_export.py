@@ -0,0 +1,244 @@
+"""从数据库流式导出时间序列 CSV，不在内存中保留整段逐日数据帧。
+
+以前 `return_csv=True` 时每个下载器把 `write_into_db` 返回的逐日帧全部留在 `df_dict` 里，
+运行结束后再逐个 `to_csv`。现在写库只记录序列名，导出时直接从 `Time_Series` 表按列读取：
+
+- `StoreCsvExporter.export_series()` —— `fetchmany` 分块读取一列并逐块写出，文件格式与原先的
+  `to_csv(index=True)` 相同（空表头的行号列 + date + 数据列）；
+- `export_many()` —— 多个序列并行导出（每个线程独立的 SQLite 连接）；
+- `export_wide()` —— 所有序列按日期对齐写入一个宽表文件；
+- `export_store_csv()` —— 下载器使用的入口：默认提交到后台线程，下载流程不等待导出完成。
+
+先写临时文件再 `os.replace`，读到的 CSV 总是完整的。环境变量：
+    CSV_EXPORT_BACKGROUND —— 是否在后台线程导出（默认 true）；
+    CSV_EXPORT_GZIP       —— 输出 .csv.gz（默认 false）；
+    CSV_EXPORT_WIDE       —— 额外写出按数据源合并的宽表 `csv/A_WIDE_DATA/<source>.csv`（默认 false）。
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import logging
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from downloaders.common import CSV_DATA_FOLDER, _RE_SAFE_IDENT
+
+logger = logging.getLogger(__name__)
+
+WIDE_DATA_FOLDER = CSV_DATA_FOLDER / "A_WIDE_DATA"
+
+# (文件名, Time_Series 中的列名)：文件以配置键命名，列以数据名命名
+ExportItem = Tuple[str, str]
+
+
+def _flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).strip().lower() not in ("0", "false", "no")
+
+
+def csv_export_background() -> bool:
+    return _flag("CSV_EXPORT_BACKGROUND", "true")
+
+
+def csv_gzip_enabled() -> bool:
+    return _flag("CSV_EXPORT_GZIP", "false")
+
+
+def csv_wide_enabled() -> bool:
+    return _flag("CSV_EXPORT_WIDE", "false")
+
+
+class StoreCsvExporter:
+    """按列从 SQLite 的 Time_Series 表分块导出 CSV。"""
+
+    def __init__(
+        self,
+        db_file: str = "data.db",
+        folder: Path = CSV_DATA_FOLDER,
+        compress: Optional[bool] = None,
+        chunk_rows: int = 5000,
+    ) -> None:
+        self.db_file = db_file
+        self.folder = Path(folder)
+        self.compress = csv_gzip_enabled() if compress is None else compress
+        self.chunk_rows = chunk_rows
+
+    def csv_path(self, file_name: str) -> Path:
+        suffix = ".csv.gz" if self.compress else ".csv"
+        return self.folder / file_name / f"{file_name}{suffix}"
+
+    def _open_out(self, path: Path) -> IO[str]:
+        if self.compress:
+            return gzip.open(path, "wt", encoding="utf-8", newline="")
+        return open(path, "w", encoding="utf-8", newline="")
+
+    def _stream(self, path: Path, sql: str, params: Sequence[Any], header: List[str], numbered: bool) -> int:
+        """执行查询并分块写出到 path（先写临时文件再替换），返回数据行数。"""
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".part")
+        rows_written = 0
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        try:
+            cursor = conn.execute(sql, params)
+            with self._open_out(tmp) as f:
+                writer = csv.writer(f)
+                writer.writerow(header)
+                while True:
+                    chunk = cursor.fetchmany(self.chunk_rows)
+                    if not chunk:
+                        break
+                    if numbered:
+                        writer.writerows([rows_written + i, *row] for i, row in enumerate(chunk))
+                    else:
+                        writer.writerows(chunk)
+                    rows_written += len(chunk)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+        finally:
+            conn.close()
+        os.replace(tmp, path)
+        return rows_written
+
+    @staticmethod
+    def _range(start_date: Optional[str], end_date: Optional[str]) -> Tuple[str, str]:
+        return start_date or "0000-01-01", end_date or date.today().isoformat()
+
+    def export_series(
+        self,
+        file_name: str,
+        column: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Optional[Path]:
+        """导出一列到 `csv/<file_name>/<file_name>.csv`；失败时记日志并返回 None。"""
+
+        if not _RE_SAFE_IDENT.fullmatch(column):
+            logger.error("Invalid column name '%s', skip CSV export", column)
+            return None
+        path = self.csv_path(file_name)
+        start, end = self._range(start_date, end_date)
+        t0 = time.perf_counter()
+        try:
+            n = self._stream(
+                path,
+                f"SELECT date, {column} FROM Time_Series WHERE date >= ? AND date <= ? ORDER BY date",
+                (start, end),
+                ["", "date", column],
+                numbered=True,
+            )
+        except Exception as err:
+            logger.error("%s FAILED DOWNLOAD CSV from store, since %s", file_name, err)
+            return None
+        logger.info("%s saved to %s Successfully! (%d rows, %.3fs)", file_name, path, n, time.perf_counter() - t0)
+        return path
+
+    def export_many(
+        self,
+        items: Sequence[ExportItem],
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Path]:
+        """并行导出多个序列，返回 {文件名: 路径}（失败的序列不在结果中）。"""
+
+        if not items:
+            return {}
+        workers = max(1, min(max_workers or 4, len(items)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="csv-export") as ex:
+            paths = list(ex.map(lambda it: self.export_series(it[0], it[1], start_date, end_date), items))
+        return {file_name: path for (file_name, _), path in zip(items, paths) if path is not None}
+
+    def export_wide(
+        self,
+        columns: Sequence[str],
+        path: Path,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+    ) -> Optional[Path]:
+        """把多列按日期对齐写入一个宽表（date + 各列），同样分块流式写出。"""
+
+        columns = [c for c in dict.fromkeys(columns) if _RE_SAFE_IDENT.fullmatch(c)]
+        if not columns:
+            return None
+        if self.compress and not str(path).endswith(".gz"):
+            path = Path(f"{path}.gz")
+        start, end = self._range(start_date, end_date)
+        t0 = time.perf_counter()
+        try:
+            n = self._stream(
+                Path(path),
+                f"SELECT date, {', '.join(columns)} FROM Time_Series WHERE date >= ? AND date <= ? ORDER BY date",
+                (start, end),
+                ["date", *columns],
+                numbered=False,
+            )
+        except Exception as err:
+            logger.error("FAILED to export wide CSV %s, since %s", path, err)
+            return None
+        logger.info("wide CSV %s saved: %d series x %d rows (%.3fs)", path, len(columns), n, time.perf_counter() - t0)
+        return Path(path)
+
+    def run(self, items: Sequence[ExportItem], start_date: Optional[str], wide_name: Optional[str] = None) -> Dict[str, Path]:
+        paths = self.export_many(items, start_date)
+        if wide_name and csv_wide_enabled():
+            self.export_wide([column for _, column in items], WIDE_DATA_FOLDER / f"{wide_name}.csv", start_date)
+        return paths
+
+
+_EXPORT_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_EXPORT_LOCK = threading.Lock()
+
+
+def _get_export_executor() -> ThreadPoolExecutor:
+    global _EXPORT_EXECUTOR
+    with _EXPORT_LOCK:
+        if _EXPORT_EXECUTOR is None:
+            # 单个调度线程：各次导出按提交顺序执行，单次导出内部再按序列并行
+            _EXPORT_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="csv-export-bg")
+        return _EXPORT_EXECUTOR
+
+
+def export_store_csv(
+    items: Iterable[ExportItem],
+    start_date: Optional[str],
+    wide_name: Optional[str] = None,
+) -> Dict[str, Path]:
+    """导出刚写库的序列；后台模式下立即返回（进程退出或 `shutdown_csv_export()` 时等待完成）。
+
+    返回 {文件名: CSV 路径}；后台模式下为将要写出的路径。
+    """
+
+    items = list(items)
+    if not items:
+        return {}
+    exporter = StoreCsvExporter()
+    if not csv_export_background():
+        return exporter.run(items, start_date, wide_name)
+    future: Future = _get_export_executor().submit(exporter.run, items, start_date, wide_name)
+    future.add_done_callback(_log_failure)
+    return {file_name: exporter.csv_path(file_name) for file_name, _ in items}
+
+
+def _log_failure(future: Future) -> None:
+    err = future.exception()
+    if err is not None:
+        logger.error("background CSV export failed: %s", err)
+
+
+def shutdown_csv_export(wait: bool = True) -> None:
+    """等待排队中的后台导出完成并释放线程。"""
+
+    global _EXPORT_EXECUTOR
+    with _EXPORT_LOCK:
+        executor, _EXPORT_EXECUTOR = _EXPORT_EXECUTOR, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
@@ -3,25 +3,87 @@
 from __future__ import annotations
 import logging
 import os
-import time
-from typing import Any, Dict, Optional
-import pandas as pd
-from datetime import date
 from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from datetime import date
+from urllib.parse import urljoin
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from downloaders.archive import archive_file
+from downloaders.browser import lease_driver
 from downloaders.common import (
     CancelledError,
     CancellationToken,
     DataDownloader,
 )
+from downloaders.download_manager import DownloadJob, atomic_move
+from downloaders.file_fetch import FetchResult, FileFetcher
+from downloaders.htmlparse import has_class, parse_html, xpath_first, xpath_nodes
+from downloaders.impersonate import get_impersonated_session
+from downloaders.sheet_cache import stream_sheet
 
 logger = logging.getLogger(__name__)
+
+# 数据名 -> (原始文件名, 数据页表格中的行号, sheet 名称)
+_DFM_TABLES: Dict[str, Tuple[str, int, str]] = {
+    "Unadj_Dallas_Federal_Manu_Index": ("index.xlsx", 1, "Index"),
+    "Adj_Dallas_Federal_Manu_Index": ("index_sa.xlsx", 2, "Indexes Seasonally Adjusted"),
+}
+
+# 读取时直接跳过的列（预期值、细分项等）
+_COLUMNS_TO_DROP = (
+    "Fcapu",
+    "Fgro",
+    "Fvshp",
+    "Dtm",
+    "Fdtm",
+    "Ffgi",
+    "Fwgs",
+    "Fnemp",
+    "Avgwk",
+    "Favgwk",
+    "Fcexp",
+    "Fcolk",
+    "Fbact",
+    "Uncr",
+)
+_COLUMN_NAMES = [
+    "Date",
+    "Production",
+    "Future production",
+    "Capacity utilization",
+    "New orders",
+    "Future new orders",
+    "Growth rate of orders",
+    "Unfilled orders",
+    "Future unfilled orders",
+    "Shipments",
+    "Finished goods inventories",
+    "Prices paid for raw material",
+    "Future prices paid for raw material",
+    "Prices received for finished goods",
+    "Future prices received for finished goods",
+    "Wage and benefits",
+    "Employment",
+    "Capex",
+    "Company outlook",
+    "General business activity",
+]
+_FIRST_ROW = 150  # 之前的早期数据不展示
+
+
+def convert_index_file(xlsx_path: str, sheet_name: str, csv_path: str) -> int:
+    """流式读取 index 文件中需要的列与行（末尾尚无数值的月份在读取时去掉），改列名后写出 csv，返回行数。"""
+    df = stream_sheet(xlsx_path, sheet_name, drop=_COLUMNS_TO_DROP, start_row=_FIRST_ROW)
+    if len(df.columns) != len(_COLUMN_NAMES):
+        raise ValueError(f"unexpected columns in {sheet_name}: {list(df.columns)}")
+    df.columns = _COLUMN_NAMES  # rename columns
+    df.to_csv(csv_path)
+    return len(df)
+
 class DFMDownloader(DataDownloader):
     '''show table data and first line data
     由于细分数据太多，因此ts当中只展示第一列的数据
@@ -39,7 +101,6 @@ class DFMDownloader(DataDownloader):
         self.url_2 : str = f"https://www.dallasfed.org/research/surveys/tmos/{self.year}/{self.year_last_two_digit}{int(self.month)-1:02d}#tab-data"
 
         # file path info
-        self.download_path = Path.home() / "Downloads"  # 下载文件夹的文件夹地址
         self.current_file_path = os.path.dirname(os.path.abspath(__file__))
         self.csv_folder = os.path.join(self.current_file_path, "..", "csv", "A_TABLE_DATA")
 
@@ -47,296 +108,171 @@ class DFMDownloader(DataDownloader):
         # 合并 exists+makedirs 为一次 makedirs(exist_ok=True)，减少文件系统 stat 调用
         os.makedirs(self.csv_folder, exist_ok=True)
 
-        # driver
-        options = Options()
-        options.add_argument("--headless")
-        options.add_argument("--disable-gpu")
-        self.driver = webdriver.Chrome(options = options)
-
-    def _remove_last_space(self, df : pd.DataFrame)-> pd.DataFrame:
-        """Remove last space in dataframe, 下载的数据最后可能有空值，所以要去除"""
-        if len(df) > 1144:  # 确保数据足够长，避免切片越界
-            df = df.iloc[150:-1044]
-        else:
-            df = df.iloc[150:]  # 如果行数太少，只去掉前100行
-        return df
-
-    def _dallas_manufacture_index_unadj_get_data(self, file_name : str, check_cancel = None):
-        """No seasonal adjustments data"""
-        check_cancel()
+        # 条件下载层：记录 index 文件的校验信息，未变化时跳过下载后的解析
+        self.fetcher = FileFetcher()
+        self.cancel_token: Optional[CancellationToken] = None
 
-        # local data folder path
-        downloaded_file = None
-        dallas_data_folder_path = os.path.join(os.path.join(self.csv_folder, file_name))
-        os.makedirs(dallas_data_folder_path, exist_ok=True)  # 创建本数据文件夹
-        raw_data_name = "index.xlsx"  # 原始文件的文件名
-        xlsx_file = self.download_path / raw_data_name  # 下载的文件的自身地址
-        target_location_path = os.path.join(dallas_data_folder_path, raw_data_name)  # 转移后xlsx文件
-        final_csv_location_path = os.path.join(dallas_data_folder_path, f"{file_name}.csv")  # 转移后修改表头的最终csv
+        # driver：只有静态页面拿不到链接时才从共享驱动池借出浏览器
+        self.driver = lease_driver()
+
+    def _remove_raw_file(self, path: str) -> None:
+        if os.path.exists(path):
+            os.remove(path)
 
-        # 删除重复文件名称的旧版excel file
-        for file in [xlsx_file, target_location_path, final_csv_location_path]:
+    def _static_index_href(self, session, row: int) -> Optional[str]:
+        """不启动浏览器，直接请求数据页并解析第 row 行的 index 文件链接；拿不到时返回 None。"""
+        for url in [self.url_1, self.url_2]:
+            try:
+                resp = session.get(url, timeout=30)
+            except Exception as e:
+                logger.warning("DFM static fetch of %s failed: %s", url, e)
+                return None
+            if resp.status_code == 404:
+                continue
+            if resp.status_code != 200:
+                return None
+            tree = parse_html(resp.text)
+            if xpath_nodes(tree, f"//h1{has_class('dal-headline')}[contains(., 'HTTP Error 404')]"):
+                continue
+            rows = xpath_nodes(tree, "//*[@id='tmos-historicaldata']//table[not(preceding-sibling::table)]//tbody//tr")
+            if len(rows) < row:
+                return None
+            href = xpath_first(rows[row - 1], ".//td//a/@href")
+            return urljoin(url, href) if href is not None else None
+        return None
+
+    def _download_index_file(
+            self, raw_data_name: str, row: int, target_location_path: str, force: bool, check_cancel
+    ) -> Optional[FetchResult]:
+        """打开当月（不存在则上月）的数据页，定位第 row 行的 index 文件链接并下载。
+        优先用 impersonate 会话静态解析页面；链接带 href 时直接条件请求（ETag / Last-Modified），
+        否则退回浏览器点击下载，再按内容哈希判断是否变化。"""
+        key = f"dfm/{raw_data_name}"
+
+        session = get_impersonated_session("dfm")
+        if session is not None:
             check_cancel()
-            if os.path.exists(file):
+            href = self._static_index_href(session, row)
+            if href:
                 try:
-                    os.remove(file)
-                    time.sleep(0.3)
+                    return self.fetcher.fetch(key, href, target_location_path, force=force, cancel_token=self.cancel_token, session=session)
+                except CancelledError:
+                    raise
                 except Exception as e:
-                    pass
+                    logger.warning("DFM static download of %s failed, falling back to browser: %s", href, e)
 
-        # download data
         try:
+            driver = self.driver
             for url in [self.url_1, self.url_2]:
                 check_cancel()
-                self.driver.get(url)
-                WebDriverWait(self.driver, 10).until(
+                driver.get(url)
+                WebDriverWait(driver, 10).until(
                     lambda d: d.execute_script("return document.readyState") == "complete"
                 )
-                if self.driver.find_elements(By.XPATH, '//h1[@class="dal-headline" and contains(text(), "HTTP Error 404")]'):
+                if driver.find_elements(By.XPATH, '//h1[@class="dal-headline" and contains(text(), "HTTP Error 404")]'):
                     continue
 
-                button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, '//*[@id="tmos-historicaldata"]/table[1]/tbody/tr[1]/td/a/strong'))
+                link = WebDriverWait(driver, 5).until(
+                    EC.element_to_be_clickable((By.XPATH, f'//*[@id="tmos-historicaldata"]/table[1]/tbody/tr[{row}]/td/a'))
                 )
-                button.click()  # press the download button
-
-                for _ in range(30):  # maximum waiting for 30 seconds
-                    if xlsx_file.exists():
-                        break
-                    else:
-                        time.sleep(1)
-                        check_cancel()
-
-                if xlsx_file.exists():
-                    # 确保目标目录存在
-                    if os.name == 'nt':
-                        os.system("move " + str(xlsx_file) + " " + str(target_location_path))
-                    else:
-                        os.system("mv " + str(xlsx_file) + " " + str(target_location_path))
-                    downloaded_file = target_location_path#xlsx_file.rename(target_location_path)
-                    break
-                else:
-                    logger.error("Failed to download data of Dallas manufacture index")
-                    return
+                href = link.get_attribute("href") or ""
+                if href.startswith("http"):
+                    return self.fetcher.fetch(key, href, target_location_path, force=force, cancel_token=self.cancel_token)
+
+                # 下载写入本任务独立的临时目录，不再经过共享的 ~/Downloads
+                with DownloadJob("dfm") as job:
+                    job.attach(driver)
+                    link.click()  # press the download button
+                    # 等待文件落地且大小稳定（最多 30 秒）
+                    downloaded = job.wait(timeout=30, check_cancel=check_cancel)
+                    if downloaded is not None:
+                        atomic_move(downloaded, target_location_path)
+                        return self.fetcher.observe(key, target_location_path, force=force)
+                logger.error("Failed to download data of Dallas manufacture index")
+                return None
 
+        except CancelledError:
+            raise
         except Exception as e:
             logger.error(f"Failed to download data of Dallas manufacture index, error is {e}")
-            return
-
-        # change column name
-        time.sleep(0.3)
-        try:
-            df = pd.read_excel(downloaded_file, sheet_name="Index")
-        except:
-            logger.error("Failed to read downloaded file, probably error 404 from web")
-            return
+            return None
+        logger.error("Dallas manufacture index page not found for %s or %s", self.url_1, self.url_2)
+        return None
 
-        # remove useless columns and rename columns
+    def _prepare_index_file(self, file_name: str, check_cancel) -> Optional[Tuple[str, str, str, FetchResult]]:
+        """下载一个 index 文件；需要重新解析时返回 (xlsx 路径, sheet 名称, csv 路径, 下载结果)。"""
         check_cancel()
-        columns_to_drop= [
-            "Fcapu",
-            "Fgro",
-            "Fvshp",
-            "Dtm",
-            "Fdtm",
-            "Ffgi",
-            "Fwgs",
-            "Fnemp",
-            "Avgwk",
-            "Favgwk",
-            "Fcexp",
-            "Fcolk",
-            "Fbact",
-            "Uncr"
-        ]
-        df.drop(columns=columns_to_drop, axis=1, inplace=True)
-        df.columns = [
-            "Date",
-            "Production",
-            "Future production",
-            "Capacity utilization",
-            "New orders",
-            "Future new orders",
-            "Growth rate of orders",
-            "Unfilled orders",
-            "Future unfilled orders",
-            "Shipments",
-            "Finished goods inventories",
-            "Prices paid for raw material",
-            "Future prices paid for raw material",
-            "Prices received for finished goods",
-            "Future prices received for finished goods",
-            "Wage and benefits",
-            "Employment",
-            "Capex",
-            "Company outlook",
-            "General business activity"
-        ]   # rename columns
-        df = self._remove_last_space(df)
-        df.to_csv(final_csv_location_path)
-
-        # 去除raw data文件
-        if os.path.exists(os.path.join(dallas_data_folder_path, raw_data_name)):
-            os.remove(os.path.join(dallas_data_folder_path, raw_data_name))
-        return
-
-    def _dallas_manufacture_index_adj_get_data(self, file_name : str, check_cancel = None):
-        """有季调的制造业指数，通常是数据网站给的数据
-        include seasonal adjustments"""
-        downloaded_file = None
-
-        # path variables
-        check_cancel()
-        dallas_data_folder_path = os.path.join(os.path.join(self.csv_folder, file_name))
-        os.makedirs(dallas_data_folder_path, exist_ok=True)  # 创建本数据文件夹
-        raw_data_name = "index_sa.xlsx"
-        xlsx_file = self.download_path / raw_data_name
-        target_location_path = os.path.join(dallas_data_folder_path, raw_data_name)
-        final_csv_location_path = os.path.join(dallas_data_folder_path, f"{file_name}.csv")
+        raw_data_name, row, sheet_name = _DFM_TABLES[file_name]
 
-        # 删除重复文件名称的旧版excel file
-        for file in [xlsx_file, target_location_path, final_csv_location_path]:
-            check_cancel()
-            if os.path.exists(file):
-                try:
-                    os.remove(file)
-                    time.sleep(0.3)
-                except Exception as e:
-                    pass
-
-        # download data
-        try:
-            for url in [self.url_1, self.url_2]:
-                check_cancel()
-                self.driver.get(url)
-                time.sleep(1)
-                if self.driver.find_elements(By.XPATH, '//h1[@class="dal-headline" and contains(text(), "HTTP Error 404")]'):
-                    continue
-                button = WebDriverWait(self.driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, '//*[@id="tmos-historicaldata"]/table[1]/tbody/tr[2]/td/a/strong'))
-                )
-                button.click()  # press the download button
-
-                # maximum waiting for 30 seconds
-                for _ in range(30):
-                    if xlsx_file.exists():
-                        break
-                    else:
-                        time.sleep(1)
-                        check_cancel()
-
-                # 将下载的xlsx移动位置并重命名
-                if xlsx_file.exists():
-                    if os.name == 'nt':
-                        os.system("move " + str(xlsx_file) + " " + str(target_location_path))
-                    else:
-                        os.system("mv " + str(xlsx_file) + " " + str(target_location_path))
-                    downloaded_file = target_location_path#xlsx_file.rename(target_location_path)
-                    break
-                else:
-                    logger.error("Failed to download data of Dallas manufacture index")
-                    return
-
-        except Exception as e:
-            logger.error(f"Failed to download data of Dallas manufacture index, error is {e}")
-            return
-
-        # change column name
-        check_cancel()
-        time.sleep(0.3)
-        try:
-            df = pd.read_excel(downloaded_file, sheet_name="Indexes Seasonally Adjusted")
-        except:
-            logger.error("Failed to read downloaded file, probably error 404 from web")
-            return
+        # local data folder path
+        dallas_data_folder_path = os.path.join(self.csv_folder, file_name)
+        os.makedirs(dallas_data_folder_path, exist_ok=True)  # 创建本数据文件夹
+        target_location_path = os.path.join(dallas_data_folder_path, raw_data_name)  # 转移后xlsx文件
+        final_csv_location_path = os.path.join(dallas_data_folder_path, f"{file_name}.csv")  # 转移后修改表头的最终csv
 
-        # remove useless columns and rename columns
-        check_cancel()
-        columns_to_drop= [
-            "Fcapu",
-            "Fgro",
-            "Fvshp",
-            "Dtm",
-            "Fdtm",
-            "Ffgi",
-            "Fwgs",
-            "Fnemp",
-            "Avgwk",
-            "Favgwk",
-            "Fcexp",
-            "Fcolk",
-            "Fbact",
-            "Uncr"
-        ]
-        df.drop(columns=columns_to_drop, axis=1, inplace=True)
-        df.columns = [
-            "Date",
-            "Production",
-            "Future production",
-            "Capacity utilization",
-            "New orders",
-            "Future new orders",
-            "Growth rate of orders",
-            "Unfilled orders",
-            "Future unfilled orders",
-            "Shipments",
-            "Finished goods inventories",
-            "Prices paid for raw material",
-            "Future prices paid for raw material",
-            "Prices received for finished goods",
-            "Future prices received for finished goods",
-            "Wage and benefits",
-            "Employment",
-            "Capex",
-            "Company outlook",
-            "General business activity"
-        ]   # rename columns
-        df = self._remove_last_space(df)
-        df.to_csv(final_csv_location_path)
-
-        # 去除raw data文件
-        if os.path.exists(os.path.join(dallas_data_folder_path, raw_data_name)):
-            os.remove(os.path.join(dallas_data_folder_path, raw_data_name))
-        return
+        # 下载文件（未变化且 csv 已存在时跳过解析）
+        result = self._download_index_file(
+            raw_data_name, row, target_location_path,
+            force=not os.path.exists(final_csv_location_path),
+            check_cancel=check_cancel,
+        )
+        if result is None:
+            return None
+        if not result.changed:
+            logger.info("%s unchanged since last download (%s), skip parsing", file_name, result.status)
+            self._remove_raw_file(target_location_path)
+            return None
+        archive_file("dfm", file_name, os.fspath(result.path))
+        return os.fspath(result.path), sheet_name, final_csv_location_path, result
 
     def to_db(
             self,
             return_csv = False,   # None time series data should directly download csv
             max_workers: Optional[int] = None,
             cancel_token: Optional[CancellationToken] = None,
-    ) -> Optional[Dict[str, pd.DataFrame]]:
+    ) -> Optional[Dict[str, Path]]:
 
         token = cancel_token
+        self.cancel_token = token
+        self.driver.cancel_token = token
 
         def _check_cancel() -> None:
             if token is not None:
                 token.raise_if_cancelled()
 
+        # 先依次下载（共用一个浏览器），再逐个解析。解析是 openpyxl 的纯 Python 流式读取，受 GIL 限制，
+        # 线程并行没有收益；worker 池中的进程是 daemon，也不能再开子进程，因此顺序执行
+        pending: Dict[str, Tuple[str, str, str, FetchResult]] = {}
         try:
             # 构造循环，遍历传入的json并依次处理
             for table_name, table_config in self.json_dict.items():
                 _check_cancel()
                 data_name = table_config["name"]
-                if data_name == "Unadj_Dallas_Federal_Manu_Index":
-                    self._dallas_manufacture_index_unadj_get_data(
-                        file_name = data_name,
-                        check_cancel = _check_cancel
-                    )
-                elif data_name == "Adj_Dallas_Federal_Manu_Index":
-                    self._dallas_manufacture_index_adj_get_data(
-                        file_name = data_name,
-                        check_cancel = _check_cancel
-                    )
-                else:
-                    logger.error(f"dfm data failed to identified, line 308, {data_name} is not supported")
+                if data_name not in _DFM_TABLES:
+                    logger.error(f"dfm data failed to identified, {data_name} is not supported")
+                    continue
+                prepared = self._prepare_index_file(data_name, _check_cancel)
+                if prepared is not None:
+                    pending[data_name] = prepared
 
         except CancelledError:
             raise
         finally:
+            self.driver.quit()
+
+        if not pending:
+            return None
+        for data_name, (xlsx_path, sheet_name, csv_path, result) in pending.items():
+            _check_cancel()
             try:
-                self.driver.quit()
-            except:
-                pass
+                rows = convert_index_file(xlsx_path, sheet_name, csv_path)
+            except Exception as e:
+                logger.error(f"Failed to read downloaded file of {data_name}, probably error 404 from web: {e}")
+                continue
+            logger.info("%s: wrote %d rows", data_name, rows)
+            self.fetcher.mark_processed(result)
+            # 去除raw data文件
+            self._remove_raw_file(xlsx_path)
 
         return None
 
@@ -0,0 +1,131 @@
+"""浏览器下载管理：每个下载任务一个独立的临时目录，替代共享的 `~/Downloads`。
+
+以前 DFM / CIN 点击下载后都去 `~/Downloads` 里找固定文件名，多个数据源并行时会互相删除、
+误认对方的文件，用户自己的下载也会被波及。现在：
+
+- `DownloadJob(label)` 在 `cache/downloads/` 下创建独立目录，`attach(driver)` 通过 CDP
+  `Browser.setDownloadBehavior` 把该浏览器的下载重定向到这个目录（驱动来自共享池，启动参数无法按任务区分，
+  因此在运行时设置）；
+- `wait()` 等待目录中出现下载完成的文件：没有 `.crdownload` 临时文件且大小在 settle 秒内不再变化；
+- `atomic_move()` 在进程内用 `os.replace` 原子地移动到目标位置（跨文件系统时先复制到目标目录再替换）；
+- `detach()` / 退出时恢复浏览器的默认下载行为，退出时删除临时目录。
+"""
+
+from __future__ import annotations
+
+import errno
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+
+from downloaders.common import CACHE_FOLDER, CancellationToken
+
+logger = logging.getLogger(__name__)
+
+DOWNLOAD_ROOT = CACHE_FOLDER / "downloads"
+
+# 浏览器下载过程中的临时文件后缀
+_PARTIAL_SUFFIXES = (".crdownload", ".part", ".tmp")
+_POLL = 0.1
+
+
+def atomic_move(src: os.PathLike[str] | str, dst: os.PathLike[str] | str) -> None:
+    """把 src 原子地放到 dst（覆盖已有文件）。"""
+
+    try:
+        os.replace(src, dst)
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+        # 跨文件系统：先复制到目标目录中的临时文件，再在同一文件系统内替换
+        tmp = f"{os.fspath(dst)}.part"
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+        os.remove(src)
+
+
+class DownloadJob:
+    """一次浏览器下载的独立目录；用作上下文管理器，退出时清理。"""
+
+    def __init__(self, label: str, root: Path = DOWNLOAD_ROOT) -> None:
+        self.label = label
+        root.mkdir(parents=True, exist_ok=True)
+        self.path = Path(tempfile.mkdtemp(prefix=f"{label}-", dir=root))
+        self._drivers: List[Any] = []
+
+    def attach(self, driver: Any) -> None:
+        """让 driver 的下载写入本任务目录。"""
+
+        params = {"behavior": "allow", "downloadPath": str(self.path), "eventsEnabled": True}
+        try:
+            driver.execute_cdp_cmd("Browser.setDownloadBehavior", params)
+        except Exception:
+            # 旧版 Chrome 只支持页面级命令
+            driver.execute_cdp_cmd("Page.setDownloadBehavior", {"behavior": "allow", "downloadPath": str(self.path)})
+        self._drivers.append(driver)
+
+    def _completed(self, name: Optional[str]) -> Optional[Path]:
+        entries = list(self.path.iterdir())
+        if any(p.name.endswith(_PARTIAL_SUFFIXES) for p in entries):
+            return None
+        files = [p for p in entries if p.is_file() and (name is None or p.name == name)]
+        return max(files, key=lambda p: p.stat().st_mtime) if files else None
+
+    def wait(
+        self,
+        name: Optional[str] = None,
+        timeout: float = 30.0,
+        check_cancel: Optional[Callable[[], None]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        settle: float = 0.3,
+    ) -> Optional[Path]:
+        """等待下载完成并返回文件路径（name 为 None 时接受任意文件名）；超时返回 None。"""
+
+        t0 = time.monotonic()
+        deadline = t0 + timeout
+        last: Optional[Tuple[Path, int]] = None
+        stable_since = 0.0
+        while time.monotonic() < deadline:
+            if check_cancel is not None:
+                check_cancel()
+            if cancel_token is not None:
+                cancel_token.raise_if_cancelled()
+            found = self._completed(name)
+            if found is not None:
+                size = found.stat().st_size
+                now = time.monotonic()
+                if last != (found, size):
+                    last, stable_since = (found, size), now
+                elif size > 0 and now - stable_since >= settle:
+                    logger.info("%s download %s finished in %.2fs", self.label, found.name, now - t0)
+                    return found
+            time.sleep(_POLL)
+        logger.error("%s download did not finish within %.0fs", self.label, timeout)
+        return None
+
+    def detach(self, driver: Any) -> None:
+        """恢复 driver 的默认下载行为；驱动归还共享池之前调用。"""
+
+        if driver in self._drivers:
+            self._drivers.remove(driver)
+        if not getattr(driver, "active", True):
+            return  # 池租约已归还，不要为了恢复设置重新借出浏览器
+        try:
+            driver.execute_cdp_cmd("Browser.setDownloadBehavior", {"behavior": "default"})
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        for driver in list(self._drivers):
+            self.detach(driver)
+        shutil.rmtree(self.path, ignore_errors=True)
+
+    def __enter__(self) -> "DownloadJob":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
@@ -2,34 +2,59 @@
 
 import os
 import logging
-import time
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from downloaders.browser import lease_driver
 from downloaders.common import (
     CSV_DATA_FOLDER,
     CancellationToken,
     DataDownloader,
 )
+from downloaders.htmlparse import has_class, parse_html, xpath_nodes, xpath_strings
+from downloaders.netcapture import NetworkCapture, capture_enabled, find_records, json_body, pick, to_number
+from downloaders.waits import PageWaiter
 
 logger = logging.getLogger(__name__)
 
+# 成交量 / 持仓量图表的数据接口
+_EM_XHR_PATTERN = r"cmegroup\.com/CmeWS/"
+_EM_FIELDS = (r"date$", r"volume$", r"open.?interest$")
+
+
+def _volume_records(response: Optional[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """从捕获的接口响应中找出按日的成交量 / 持仓量记录"""
+    return find_records(json_body(response), *_EM_FIELDS)
+
+
+def _volume_records_to_df(records: List[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+    """接口记录 -> 与页面解析相同列结构的 df；数值直接取自 JSON，不再由 SVG 路径换算"""
+    date_key, volume_key, oi_key = _EM_FIELDS
+    df = pd.DataFrame({
+        "date": [str(pick(r, date_key, "")) for r in records],
+        "volume": [to_number(pick(r, volume_key)) for r in records],
+        "open_interest": [to_number(pick(r, oi_key)) for r in records],
+    }).dropna(subset=["volume", "open_interest"])
+    if df.empty:
+        return None
+    parsed = pd.to_datetime(df["date"], errors="coerce")
+    if parsed.notna().all():
+        df = df.iloc[parsed.argsort(kind="stable")]
+    df = df.tail(30).reset_index(drop=True)
+    df.insert(0, "empty", df["date"])  # 这一列会在table里面统一删除
+    return df
+
 class EMDownloader(DataDownloader):
     def __init__(
             self, json_dict: Dict[str, Dict[str, Any]], api_key: str, request_year: int
     ):
         self.json_dict = json_dict
         self.url_half = "https://www.cmegroup.com/markets/equities/nasdaq/e-mini-nasdaq-100"
-        options = Options()
-        options.add_argument("--disable-gpu")
-        self.driver = webdriver.Chrome(options = options)
+        self.driver = lease_driver(profile="lean")  # 共享驱动池，首次使用时才借出浏览器
 
     def _emini_future_vol_open_interest(self, file_name: str, check_cancel):
         """Emini开仓量与持仓数据"""
@@ -37,6 +62,10 @@ class EMDownloader(DataDownloader):
         try:
             check_cancel()
             self.driver.maximize_window()
+            capture = None
+            if capture_enabled():
+                capture = NetworkCapture(self.driver, _EM_XHR_PATTERN)
+                capture.reset()
             self.driver.get(url)
 
             # click cookie button
@@ -49,12 +78,27 @@ class EMDownloader(DataDownloader):
                 pass
 
             check_cancel()
+            # 滚动触发图表懒加载，然后等待柱体、持仓线与参考表格都已渲染
+            waiter = PageWaiter(self.driver, 30, "EM volume", check_cancel)
             for _ in range(3):
                 self.driver.execute_script("window.scrollBy(0, 500);")
-                time.sleep(1.2)  # 等待内容加载，滚动间隔
-
-            html = self.driver.page_source
-            soup = BeautifulSoup(html, "lxml")
+            if capture is not None:
+                # 图表数据接口的 JSON 可以直接使用，无需等待 SVG 渲染
+                response = capture.wait(waiter, "volume response", accept=lambda r: _volume_records(r) is not None, timeout=15)
+                records = _volume_records(response)
+                df = _volume_records_to_df(records) if records else None
+                if df is not None:
+                    waiter.report()
+                    self._save_file(df, file_name, check_cancel=check_cancel)
+                    return
+                logger.info("CME volume response not captured, parsing chart SVG instead")
+            waiter.element((By.CSS_SELECTOR, "path.bb-shape-0.bb-bar-0"), "bar chart")
+            waiter.element((By.CSS_SELECTOR, "path.open-interest-line"), "open interest line")
+            waiter.element((By.CSS_SELECTOR, "div.main-table-wrapper td"), "reference table")
+            waiter.report()
+
+            # lxml 解析后只用 XPath 取柱体、持仓线、坐标轴日期与参考表格
+            tree = parse_html(self.driver.page_source)
             error_text = "并没有找到td名称的tag // Failed to find td tag"
             index = 0
 
@@ -70,12 +114,11 @@ class EMDownloader(DataDownloader):
         check_cancel()
         try:
             while True:
-                boxes = soup.select(f'path.bb-shape-{index}.bb-bar-{index}')
+                boxes = xpath_strings(tree, f"//path{has_class(f'bb-shape-{index}', f'bb-bar-{index}')}/@d")
                 if not boxes:
                     break  # 没有更多的 bar，则退出
 
-                for box in boxes:
-                    d_attr = box.get("d")
+                for d_attr in boxes:
                     parts = d_attr.split("V")
 
                     y_top = float(parts[1].split()[0][0:11])  # 顶部Y（第一个V之后）
@@ -91,8 +134,7 @@ class EMDownloader(DataDownloader):
         # get line (open interest data)
         check_cancel()
         try:
-            line = soup.find("path", class_ = "bb-shape bb-shape bb-line bb-line-futureOi open-interest-line")
-            d = line.get("d")
+            d = xpath_strings(tree, "//path[@class='bb-shape bb-shape bb-line bb-line-futureOi open-interest-line']/@d")[0]
             parts = d.split(",")
             bottom = float(243.201)
 
@@ -107,13 +149,10 @@ class EMDownloader(DataDownloader):
         # get date
         check_cancel()
         try:
-            g = soup.find_all("g", class_ = "tick")
-            if g:
-                for tag in g:
-                    date = tag.find("tspan")
-                    if date:
-                        dates = date.get_text()
-                        date_list.append(dates)
+            for tag in xpath_nodes(tree, f"//g{has_class('tick')}"):
+                date = tag.xpath("(.//tspan)[1]")
+                if date:
+                    date_list.append(date[0].text_content())
         except Exception as e:
             logger.error(error_text + "// DATE")
             print(error_text + "// DATE")
@@ -122,11 +161,11 @@ class EMDownloader(DataDownloader):
         # get reference data
         check_cancel()
         try:
-            ref = soup.find("div", class_ = "main-table-wrapper")
+            ref = xpath_nodes(tree, f"(//div{has_class('main-table-wrapper')})[1]")
             if ref:
-                td_num = ref.find_all("td")
-                vol = float(td_num[0].get_text().replace(",",""))
-                open_interest = float(td_num[9].get_text().replace(",",""))
+                td_num = ref[0].xpath(".//td")
+                vol = float(td_num[0].text_content().replace(",",""))
+                open_interest = float(td_num[9].text_content().replace(",",""))
             else:
                 raise Exception("REFERENCE DATA报错")
         except Exception as e:
@@ -189,10 +228,14 @@ class EMDownloader(DataDownloader):
                 token.raise_if_cancelled()
 
         token = cancel_token
-        for table_name, table_config in self.json_dict.items():
-            _check_cancel()
-            data_name = table_config["name"]
-            self._emini_future_vol_open_interest(data_name, check_cancel=_check_cancel)
+        self.driver.cancel_token = token
+        try:
+            for table_name, table_config in self.json_dict.items():
+                _check_cancel()
+                data_name = table_config["name"]
+                self._emini_future_vol_open_interest(data_name, check_cancel=_check_cancel)
+        finally:
+            self.driver.quit()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,152 @@
+"""整文件数据源（NYF / DFM / CIN）的条件下载层。
+
+每个远端文件按 key 记录校验信息（ETag、Last-Modified、大小、内容 SHA-256）以及最近一次
+「成功解析」时的内容哈希，状态保存在 `cache/file_fetch.json`：
+
+- 能拿到文件直链时用 `fetch()`：携带 If-None-Match / If-Modified-Since 发起条件请求，
+  304 或内容哈希与上次解析时相同都视为未变化，调用方可同时跳过下载后的解析；
+- 只能通过浏览器点击下载时用 `observe()`：文件落地后按内容哈希判断是否变化；
+- 解析并写出结果后调用 `mark_processed()`，之后相同内容不再重复解析。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from downloaders.common import (
+    CACHE_FOLDER,
+    CancellationToken,
+    http_get_with_retry,
+    load_json_state,
+    save_json_state,
+)
+
+logger = logging.getLogger(__name__)
+
+FILE_FETCH_STATE = CACHE_FOLDER / "file_fetch.json"
+
+
+def _sha256_file(path: os.PathLike[str] | str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class FetchResult:
+    """一次条件下载 / 观测的结果。
+
+    status:
+        downloaded   —— 新内容（或被强制下载），需要解析
+        unchanged    —— 下载了，但内容哈希与上次解析时相同
+        not_modified —— 服务器返回 304，本地没有写入新文件
+    """
+
+    def __init__(self, key: str, path: str, status: str, sha256: Optional[str]) -> None:
+        self.key = key
+        self.path = path
+        self.status = status
+        self.sha256 = sha256
+
+    @property
+    def changed(self) -> bool:
+        return self.status == "downloaded"
+
+
+class FileFetcher:
+    """记录远端文件校验信息、跳过未变化文件的下载与解析。"""
+
+    def __init__(self, state_file: Path = FILE_FETCH_STATE) -> None:
+        self.state_file = Path(state_file)
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Any]] = load_json_state(self.state_file)
+
+    def _entry(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            return dict(self._state.get(key, {}))
+
+    def _update(self, key: str, **fields: Any) -> None:
+        with self._lock:
+            self._state.setdefault(key, {}).update(fields)
+            snapshot = dict(self._state)
+        save_json_state(self.state_file, snapshot)
+
+    def _status_for(self, entry: Dict[str, Any], sha: str, force: bool) -> str:
+        return "unchanged" if not force and sha == entry.get("processed_sha") else "downloaded"
+
+    def fetch(
+        self,
+        key: str,
+        url: str,
+        dest: os.PathLike[str] | str,
+        *,
+        force: bool = False,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: float = 60.0,
+        cancel_token: Optional[CancellationToken] = None,
+        session: Any = None,
+    ) -> FetchResult:
+        """条件下载 url 到 dest（原子替换）。
+
+        force=True 时不发送校验头（例如解析产物已被删除，需要重新生成）。
+        session 为 `downloaders.impersonate` 的会话时以浏览器指纹发起请求。
+        """
+
+        dest = os.fspath(dest)
+        entry = self._entry(key)
+        req_headers = dict(headers or {})
+        if not force and entry.get("processed_sha") and entry.get("url") == url:
+            if entry.get("etag"):
+                req_headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                req_headers["If-Modified-Since"] = entry["last_modified"]
+
+        resp = http_get_with_retry(url, headers=req_headers, timeout=timeout, cancel_token=cancel_token, use_cache=False, session=session)
+        if resp.status_code == 304:
+            logger.info("%s not modified since %s", key, entry.get("last_modified") or entry.get("etag"))
+            self._update(key, checked_at=time.time())
+            return FetchResult(key, dest, "not_modified", entry.get("sha256"))
+
+        body = resp.content
+        sha = hashlib.sha256(body).hexdigest()
+        os.makedirs(os.path.dirname(dest) or ".", exist_ok=True)
+        tmp = f"{dest}.part"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, dest)
+        self._update(
+            key,
+            url=url,
+            etag=resp.headers.get("ETag"),
+            last_modified=resp.headers.get("Last-Modified"),
+            size=len(body),
+            sha256=sha,
+            checked_at=time.time(),
+        )
+        status = self._status_for(entry, sha, force)
+        logger.info("%s fetched %d bytes (%s)", key, len(body), status)
+        return FetchResult(key, dest, status, sha)
+
+    def observe(self, key: str, path: os.PathLike[str] | str, *, force: bool = False) -> FetchResult:
+        """浏览器下载落地后调用：按内容哈希判断文件是否变化。"""
+
+        path = os.fspath(path)
+        sha = _sha256_file(path)
+        entry = self._entry(key)
+        self._update(key, size=os.path.getsize(path), sha256=sha, checked_at=time.time())
+        status = self._status_for(entry, sha, force)
+        logger.info("%s observed %s (%s)", key, path, status)
+        return FetchResult(key, path, status, sha)
+
+    def mark_processed(self, result: FetchResult) -> None:
+        """解析并写出结果后调用，记录已处理的内容哈希。"""
+
+        if result.sha256:
+            self._update(result.key, processed_sha=result.sha256, processed_at=time.time())
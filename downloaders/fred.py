@@ -6,142 +6,249 @@ from __future__ import annotations
 
 import logging
 import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-import numpy as np
-import pandas as pd
 from dotenv import load_dotenv
 
+from downloaders.archive import archive_raw
 from downloaders.common import (
-    CSV_DATA_FOLDER,
+    CACHE_FOLDER,
     CancelledError,
     CancellationToken,
     DatabaseConverter,
-    DataDownloader,
+    PipelineDownloader,
     http_get_with_retry,
+    load_json_state,
+    save_json_state,
 )
+from downloaders.series import CompactSeries
 
 logger = logging.getLogger(__name__)
 
+# fred_probe.json 的读-改-写在同一进程内串行化（探测线程、写库线程与 worker 池写线程）
+_PROBE_STATE_LOCK = threading.Lock()
 
-class FREDDownloader(DataDownloader):
+
+def parse_fred_observations(data: Dict[str, Any], table_config: Dict[str, Any]) -> CompactSeries:
+    """把 `fred/series/observations` 的 JSON 转为紧凑序列：原值，或 needs_pct 时的环比变化率。
+
+    不访问网络，在线下载与 `downloaders.reprocess` 离线重建共用。
+    """
+
+    observations = data.get("observations", [])
+    if not observations:
+        raise Exception("empty observations")
+    series = CompactSeries.from_strings(
+        table_config.get("name", ""),
+        [obs.get("date") for obs in observations],
+        [obs.get("value") for obs in observations],  # "." 等缺失值记为 NaN
+    )
+    if table_config.get("needs_pct", False):   # 查找needs_pct，如果不存在返回false
+        series = series.pct_change()
+    if table_config.get("needs_cleaning", False):
+        series = series.ffill()
+    return series
+
+
+class FREDFreshnessProbe:
+    """拉取观测值之前的轻量探测：比较 series 元数据的 `last_updated` 与本地水位。
+
+    - 每个序列一次小请求（`fred/series`），经共享限速器发出；
+    - 探测结果在 `FRED_PROBE_TTL_SECONDS`（默认 900 秒）内复用，期内重复运行不发请求；
+    - 水位（watermark）= 上次成功写库时的 `last_updated`，只有二者不同才下载观测值；
+      水位由写库确认（`commit_probe_watermark`）在观测值真正落库后推进，worker 池模式下由父进程执行；
+    - 探测失败、数据库缺列或请求了更早的起始日期时一律视为需要下载（fail-open）。
+    """
+
+    url: str = "https://api.stlouisfed.org/fred/series"
+    state_file = CACHE_FOLDER / "fred_probe.json"
+
+    def __init__(self, api_key: str, start_date: str) -> None:
+        self.api_key: str = api_key
+        self.start_date: str = start_date
+        self.ttl: float = float(os.environ.get("FRED_PROBE_TTL_SECONDS", "900") or 900)
+        self._state: Dict[str, Dict[str, Any]] = load_json_state(self.state_file)
+        self._probed: Dict[str, Optional[str]] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def enabled() -> bool:
+        return os.environ.get("FRED_PROBE", "true").strip().lower() not in ("0", "false", "no")
+
+    @staticmethod
+    def _existing_columns() -> Set[str]:
+        try:
+            conn = sqlite3.connect("data.db")
+            try:
+                rows = conn.execute("PRAGMA table_info('Time_Series')").fetchall()
+            finally:
+                conn.close()
+            return {str(r[1]) for r in rows}
+        except sqlite3.Error:
+            return set()
+
+    def _last_updated(self, series_id: str, token: Optional[CancellationToken]) -> Optional[str]:
+        entry = self._state.get(series_id, {})
+        if entry.get("last_updated") and time.time() - float(entry.get("probed_at", 0)) < self.ttl:
+            return str(entry["last_updated"])
+        params = {"series_id": series_id, "api_key": self.api_key, "file_type": "json"}
+        try:
+            resp = http_get_with_retry(FREDFreshnessProbe.url, params=params, timeout=15.0, max_attempts=2, cancel_token=token, use_cache=False)
+            seriess = resp.json().get("seriess", [])
+            last_updated = str(seriess[0]["last_updated"]) if seriess else None
+        except CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("FRED probe %s failed, will download: %s", series_id, e)
+            return None
+        with self._lock:
+            entry = self._state.setdefault(series_id, {})
+            entry["last_updated"] = last_updated
+            entry["probed_at"] = time.time()
+        return last_updated
+
+    def filter_changed(
+        self,
+        items: List[Tuple[str, Dict[str, Any]]],
+        workers: int,
+        token: Optional[CancellationToken] = None,
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """返回需要重新下载观测值的条目。"""
+
+        columns = self._existing_columns()
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as ex:
+            probed = list(ex.map(lambda it: self._last_updated(str(it[1]["code"]), token), items))
+        changed: List[Tuple[str, Dict[str, Any]]] = []
+        for (table_name, cfg), last_updated in zip(items, probed):
+            series_id = str(cfg["code"])
+            self._probed[series_id] = last_updated
+            entry = self._state.get(series_id, {})
+            stored_start = entry.get("start_date")
+            if (
+                last_updated is None
+                or entry.get("watermark") != last_updated
+                or cfg.get("name") not in columns
+                or not stored_start
+                or self.start_date < stored_start
+            ):
+                changed.append((table_name, cfg))
+        logger.info(
+            "FRED probe: %d/%d series changed since last fetch (%.3fs)",
+            len(changed), len(items), time.perf_counter() - t0,
+        )
+        self.save()
+        return changed
+
+    def ack(self, series_id: str) -> Optional[Dict[str, Any]]:
+        """该序列观测值的写库确认：落库后由 `commit_probe_watermark` 推进水位。"""
+
+        last_updated = self._probed.get(series_id)
+        if last_updated is None:
+            return None
+        return {"kind": "fred_probe", "series_id": series_id, "last_updated": last_updated, "start_date": self.start_date}
+
+    def save(self) -> None:
+        """只合并探测结果（last_updated / probed_at），水位以磁盘上已确认的为准。"""
+
+        with self._lock:
+            probed = {sid: dict(entry) for sid, entry in self._state.items()}
+        with _PROBE_STATE_LOCK:
+            state = load_json_state(self.state_file)
+            for series_id, entry in probed.items():
+                target = state.setdefault(series_id, {})
+                for key in ("last_updated", "probed_at"):
+                    if key in entry:
+                        target[key] = entry[key]
+            save_json_state(self.state_file, state)
+
+
+def commit_probe_watermark(ack: Dict[str, Any]) -> None:
+    """写库确认处理器：观测值已落库，把该序列的水位推进到探测时的 `last_updated`。"""
+
+    series_id = str(ack["series_id"])
+    start_date = str(ack["start_date"])
+    with _PROBE_STATE_LOCK:
+        state = load_json_state(FREDFreshnessProbe.state_file)
+        entry = state.setdefault(series_id, {})
+        entry["watermark"] = ack["last_updated"]
+        stored_start = entry.get("start_date")
+        entry["start_date"] = min(stored_start, start_date) if stored_start else start_date
+        save_json_state(FREDFreshnessProbe.state_file, state)
+
+
+DatabaseConverter.write_acks["fred_probe"] = commit_probe_watermark
+
+
+class FREDDownloader(PipelineDownloader):
     """圣路易斯联储（FRED）下载器。"""
 
     url: str = "https://api.stlouisfed.org/fred/series/observations"
+    source = "FRED"
+    host = "api.stlouisfed.org"
+    default_fetch_workers = min(12, (os.cpu_count() or 4) * 2)
 
     def __init__(self, json_dict: Dict[str, Dict[str, Any]], api_key: str, request_year: int):
         self.json_dict: Dict[str, Dict[str, Any]] = json_dict
         self.api_key: str = api_key
         self.start_date: str = f"{request_year}-01-01"
         self.end_date: str = str(date.today())
+        self.probe: Optional[FREDFreshnessProbe] = None
+        load_dotenv()
 
-    def to_db(
+    def prepare(
         self,
-        return_csv: bool = False,
-        max_workers: Optional[int] = None,
-        cancel_token: Optional[CancellationToken] = None,
-    ) -> Optional[Dict[str, pd.DataFrame]]:
-        df_dict: Dict[str, pd.DataFrame] = {}
-        items = list(self.json_dict.items())
+        items: List[Tuple[str, Dict[str, Any]]],
+        workers: int,
+        cancel_token: Optional[CancellationToken],
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        self.probe = None
+        if not FREDFreshnessProbe.enabled():
+            return items
+        self.probe = FREDFreshnessProbe(self.api_key, self.start_date)
+        items = self.probe.filter_changed(items, workers, cancel_token)
         if not items:
-            return df_dict if return_csv else None
-
-        token = cancel_token
-
-        def _check_cancel() -> None:
-            if token is not None:
-                token.raise_if_cancelled()
-
-        def worker(table_name: str, table_config: Dict[str, Any]) -> Tuple[str, Optional[pd.DataFrame]]:
-            _check_cancel()
-            try:
-                params = {
-                    "series_id": table_config["code"],
-                    "api_key": self.api_key,
-                    "observation_start": self.start_date,
-                    "observation_end": self.end_date,
-                    "file_type": "json",
-                }
-                log_params = {k: v for k, v in params.items() if k != "api_key"}
-                logger.info("FRED GET %s params=%s", FREDDownloader.url, log_params)
-                resp = http_get_with_retry(FREDDownloader.url, params=params, cancel_token=token)
-                data = resp.json()
-                df = pd.DataFrame(data.get("observations", []))
-                if df.empty:
-                    raise Exception("empty observations")
-                keep_cols = [c for c in df.columns if c in ("date", "value")]
-                df = df[keep_cols].copy()
-
-                if table_config.get("needs_pct", False):   # 查找needs_pct，如果不存在返回false
-                    df["value"] = pd.to_numeric(df["value"], errors="coerce")
-                    df["MoM_growth"] = df["value"].pct_change()
-                    if table_config.get("needs_cleaning", False):
-                        df["MoM_growth"] = df["MoM_growth"].ffill()
-                    df = df[["date", "MoM_growth"]]
-                else:
-                    df["value"] = df["value"].replace(".", np.nan)
-                    df["value"] = pd.to_numeric(df["value"], errors="coerce")
-                    if table_config.get("needs_cleaning", False):
-                        df["value"] = df["value"].ffill()
-                    df = df[["date", "value"]]
-
-                converter = DatabaseConverter()
-                _check_cancel()
-                final_result_df = converter.write_into_db(
-                    df=df,
-                    data_name=table_config["name"],
-                    start_date=self.start_date,
-                    is_time_series=True,
-                    is_pct_data=table_config["needs_pct"],
-                )
-                _check_cancel()
-                logger.info("%s Successfully extracted! rows=%d", table_name, len(df))
-                return table_name, final_result_df
-            except CancelledError:
-                raise
-            except Exception as e:
-                logger.error("%s FAILED EXTRACT DATA from FRED: %s", table_name, e)
-                return table_name, None
-
-        load_dotenv()
-        env_workers = os.environ.get("FRED_WORKERS")
-        workers = max_workers or (
-            int(env_workers) if env_workers and env_workers.isdigit() else min(12, (os.cpu_count() or 4) * 2)
+            logger.info("FRED all series unchanged since last fetch, nothing to download")
+        return items
+
+    def fetch(self, table_name: str, table_config: Dict[str, Any], cancel_token: Optional[CancellationToken]) -> Any:
+        params = {
+            "series_id": table_config["code"],
+            "api_key": self.api_key,
+            "observation_start": self.start_date,
+            "observation_end": self.end_date,
+            "file_type": "json",
+        }
+        log_params = {k: v for k, v in params.items() if k != "api_key"}
+        logger.info("FRED GET %s params=%s", FREDDownloader.url, log_params)
+        # 探测已确认序列有更新时跳过缓存 TTL，直接做条件请求
+        resp = http_get_with_retry(
+            FREDDownloader.url,
+            params=params,
+            cancel_token=cancel_token,
+            cache_ttl=0 if self.probe is not None else None,
         )
-        logger.info("FRED submitting %d tasks (workers=%d)", len(items), workers)
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-
-        with ThreadPoolExecutor(max_workers=workers) as ex:
-            future_map = {ex.submit(worker, tn, cfg): tn for tn, cfg in items}
-            try:
-                for fut in as_completed(future_map):
-                    _check_cancel()
-                    tn = future_map[fut]
-                    try:
-                        name, df = fut.result()
-                        if df is not None:
-                            df_dict[name] = df
-                    except CancelledError:
-                        logger.info("FRED task %s cancelled", tn)
-                        raise
-                    except Exception as e:
-                        logger.error("FRED future for %s raised: %s", tn, e)
-            finally:
-                if token is not None and token.cancelled():
-                    for fut in future_map:
-                        fut.cancel()
-
-        if return_csv and df_dict:
-            _check_cancel()
-            for name, df in df_dict.items():
-                try:
-                    data_folder_path = os.path.join(os.fspath(CSV_DATA_FOLDER), name)
-                    os.makedirs(data_folder_path, exist_ok=True)
-                    csv_path = os.path.join(data_folder_path, f"{name}.csv")
-                    df.to_csv(csv_path, index=True)
-                    logger.info("%s saved to %s Successfully!", name, csv_path)
-                except Exception as err:
-                    logger.error("%s FAILED DOWNLOAD CSV in method 'to_db', since %s", name, err)
-                    continue
-        return df_dict if return_csv else None
+        archive_raw("fred", table_config["name"], resp.content, "json", {
+            "data_name": table_config["name"],
+            "start_date": self.start_date,
+            "is_pct_data": table_config["needs_pct"],
+            "table_config": table_config,
+        })
+        return resp.json()
+
+    def parse(self, table_name: str, table_config: Dict[str, Any], raw: Any) -> Optional[CompactSeries]:
+        return parse_fred_observations(raw, table_config)
+
+    def write_ack(self, table_name: str, table_config: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        if self.probe is None:
+            return None
+        return self.probe.ack(str(table_config["code"]))
+
+    def finish(self) -> None:
+        if self.probe is not None:
+            self.probe.save()
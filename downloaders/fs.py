@@ -1,28 +1,64 @@
 '''Fx swap 外汇掉期数据'''
 
 from __future__ import annotations
-import time
 import logging
 import os
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional
 
 import pandas as pd
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from downloaders.browser import lease_driver
 from downloaders.common import (
     CSV_DATA_FOLDER,
     CancelledError,
     CancellationToken,
     DataDownloader,
 )
+from downloaders.htmlparse import FieldSpec, js_fields
+from downloaders.netcapture import NetworkCapture, capture_enabled, find_records, json_body, pick, to_number
+from downloaders.waits import PageWaiter, WaitTimeout
 
 logger = logging.getLogger(__name__)
 
+# 掉期点单元格的 data-value 拼接，用于判断表格是否已填充 / 已随货币对切换刷新
+_POINTS_SIGNATURE_JS = (
+    "return Array.from(document.querySelectorAll('#fx-sw-data td[data-name=points]'))"
+    ".map(function (td) { return td.getAttribute('data-value') || ''; }).join('|');"
+)
+_POINTS_READY_JS = (
+    "return Array.from(document.querySelectorAll('#fx-sw-data td[data-name=points]'))"
+    ".some(function (td) { return (td.getAttribute('data-value') || '').trim() !== ''; });"
+)
+
+# 掉期日期 / 掉期点 / 掉期远期汇率三列单元格（querySelectorAll 取 data-value）
+_SWAP_FIELDS: FieldSpec = {
+    "time": ("td[class='cell AC cell-first']", "data-value"),
+    "pips": ("td[class='cell AC'][data-name='points']", "data-value"),
+    "forex": ("td[class='cell AC'][data-name='swapAllPrc']", "data-value"),
+}
+
+# 掉期曲线表格由该站点的 XHR 接口填充；表格单元格的 data-name 与接口记录的字段名一致
+_FS_XHR_PATTERN = r"chinamoney\.com\.cn/(ags|dqs)/"
+
+
+def _swap_records(response: Optional[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+    """从捕获的接口响应中找出掉期曲线记录（含 points 与 swapAllPrc 字段）。"""
+    return find_records(json_body(response), r"^points$", r"^swapAllPrc$")
+
+
+def _records_to_df(records: List[Dict[str, Any]]) -> pd.DataFrame:
+    """接口记录 -> 与页面解析相同列结构的 df（数值直接取自 JSON）"""
+    df = pd.DataFrame({
+        "time_period": [str(pick(r, r"term|tenor|period", "")).strip() for r in records],
+        "pips": [to_number(pick(r, r"^points$")) for r in records],
+        "swap_forex": [to_number(pick(r, r"^swapAllPrc$")) for r in records],
+    })
+    df.insert(0, '', '') # 添加多余列，在table func中会统一删除
+    return df
+
 class FSDownloader(DataDownloader):
     """外汇掉期汇率数据，selenium实现"""
     def __init__(
@@ -30,8 +66,22 @@ class FSDownloader(DataDownloader):
     ):
         self.json_dict = json_dict
         self.url = r"https://www.chinamoney.com.cn/chinese/bkcurvfsw/"
-        options = Options()
-        self.driver = webdriver.Chrome(options = options)
+        self.driver = lease_driver(profile="lean")  # 共享驱动池，首次使用时才借出浏览器
+        self.capture: Optional[NetworkCapture] = None
+        self._records: Optional[List[Dict[str, Any]]] = None  # 当前货币对的接口记录（未捕获时为 None）
+
+    def _capture_records(self, waiter: PageWaiter, step: str) -> Optional[List[Dict[str, Any]]]:
+        """等待下一个含掉期曲线记录的接口响应；未开启捕获或超时返回 None。"""
+        if self.capture is None:
+            return None
+        response = self.capture.wait(waiter, step, accept=lambda r: _swap_records(r) is not None, timeout=10)
+        return _swap_records(response)
+
+    def _open_page(self) -> bool:
+        """打开掉期曲线页面并等待数据表出现（原先在构造函数中执行）。"""
+        if capture_enabled():
+            self.capture = NetworkCapture(self.driver, _FS_XHR_PATTERN)
+            self.capture.reset()
         self.driver.get(self.url)
 
         # initialize judgement
@@ -53,32 +103,28 @@ class FSDownloader(DataDownloader):
 
         if judgement is False:
             print("网页加载失败，请检查网络 // Failed to load webpage")
-            return
+            return False
 
-        time.sleep(2)  # 等待页面加载
+        # 优先等待接口响应；没有捕获到时等待掉期点数据填充表格
+        waiter = PageWaiter(self.driver, 15, "FS page")
+        self._records = self._capture_records(waiter, "swap curve response")
+        if self._records is None:
+            try:
+                waiter.js(_POINTS_READY_JS, "swap points")
+            except WaitTimeout as e:
+                logger.warning(f"Forex swap table not filled yet, continue: {e}")
+        return True
 
     def _swap_forward_fx_curve(self):
         '''封装的提取数据函数 // swap forex curve and future forex '''
+        if self._records:
+            return _records_to_df(self._records)
         try:
-            html = self.driver.page_source
-            soup = BeautifulSoup(html, "lxml")
-
-            time_list = []
-            pips_list = []
-            future_forex_list = []
-
-            # 获取数据
-            tds_time = soup.find_all("td", class_ = "cell AC cell-first")
-            for td in tds_time:  # 掉期日期
-                time_list.append(td.get("data-value", "").strip())
-
-            tds_pips = soup.find_all("td", class_ = "cell AC", attrs = {"data-name" : "points"})
-            for td in tds_pips:  # 掉期点
-                pips_list.append(td.get("data-value", "").strip())
-
-            tds_forex = soup.find_all("td", class_ = "cell AC", attrs = {"data-name" : "swapAllPrc"})
-            for td in tds_forex:   # 掉期远期汇率
-                future_forex_list.append(td.get("data-value", "").strip())
+            # 在浏览器内直接取三列单元格的 data-value，不再传回并解析整页 page_source
+            fields = js_fields(self.driver, _SWAP_FIELDS)
+            time_list = fields["time"]  # 掉期日期
+            pips_list = fields["pips"]  # 掉期点
+            future_forex_list = fields["forex"]  # 掉期远期汇率
 
             #整合data成df然后返回df
             df = pd.DataFrame({
@@ -103,14 +149,23 @@ class FSDownloader(DataDownloader):
             select_dropdown = WebDriverWait(self.driver, 8).until(
                 EC.element_to_be_clickable((By.XPATH, '//*[@id="fx-sw-curv-curr"]'))
             )
+            waiter = PageWaiter(self.driver, 15, "FS currency")
+            before = self.driver.execute_script(_POINTS_SIGNATURE_JS)
+            self._records = None
+            if self.capture is not None:
+                self.capture.poll()  # 丢弃上一个货币对的响应
             select_dropdown.click()
-            time.sleep(2)
 
-            option = WebDriverWait(self.driver, 8).until(
-                EC.element_to_be_clickable((By.XPATH, xpath))
-            )
+            option = waiter.clickable((By.XPATH, xpath), "currency option")
             option.click()
-            time.sleep(1)
+            # 切换货币对后等待新的接口响应；没有捕获到时等待掉期点数据刷新
+            self._records = self._capture_records(waiter, "swap curve response")
+            if self._records is None:
+                waiter.until(
+                    lambda d: (sig := d.execute_script(_POINTS_SIGNATURE_JS)) and sig != before,
+                    "swap points refreshed",
+                )
+            waiter.report()
         except Exception as e:
             logger.error(f"Failed to click btn in forex swap page, {e}")
             return
@@ -175,22 +230,27 @@ class FSDownloader(DataDownloader):
             if token is not None:
                 token.raise_if_cancelled()
 
-        for table_name, table_config in self.json_dict.items():
+        self.driver.cancel_token = token
+        try:
             _check_cancel()
-            data_name = table_config["name"]
-
-            if data_name == "USD_CNY_Forex_Swap":
-                self.usdcny_swap(data_name, _check_cancel)
-            elif data_name == "EUR_USD_Forex_Swap":
-                self.eurusd_swap(data_name, _check_cancel)
-            elif data_name == "USD_JPY_Forex_Swap":
-                self.usdjpy_swap(data_name, _check_cancel)
-            elif data_name == "GBP_USD_Forex_Swap":
-                self.gbpusd_swap(data_name, _check_cancel)
-            elif data_name == "AUD_USD_Forex_Swap":
-                self.audusd_swap(data_name, _check_cancel)
-
-        self.driver.quit()
+            if not self._open_page():
+                return
+            for table_name, table_config in self.json_dict.items():
+                _check_cancel()
+                data_name = table_config["name"]
+
+                if data_name == "USD_CNY_Forex_Swap":
+                    self.usdcny_swap(data_name, _check_cancel)
+                elif data_name == "EUR_USD_Forex_Swap":
+                    self.eurusd_swap(data_name, _check_cancel)
+                elif data_name == "USD_JPY_Forex_Swap":
+                    self.usdjpy_swap(data_name, _check_cancel)
+                elif data_name == "GBP_USD_Forex_Swap":
+                    self.gbpusd_swap(data_name, _check_cancel)
+                elif data_name == "AUD_USD_Forex_Swap":
+                    self.audusd_swap(data_name, _check_cancel)
+        finally:
+            self.driver.quit()
 
 
 
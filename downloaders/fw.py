@@ -1,30 +1,80 @@
 """CME FedWatch downloader implementation."""
 
 from __future__ import annotations
-import re
 import shutil
 import logging
-import random
 import os
-import time
-from typing import Any, Dict, Optional
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
 import pandas as pd
-from bs4 import BeautifulSoup
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 
+from downloaders.browser import lease_driver
 from downloaders.common import (
     CSV_DATA_FOLDER,
     CancelledError,
     CancellationToken,
     DataDownloader,
 )
+from downloaders.htmlparse import (
+    STRIPPED_STRINGS,
+    FieldSpec,
+    has_class,
+    js_fields,
+    js_fields_async,
+    parse_html,
+    stripped_strings,
+    xpath_nodes,
+    xpath_strings,
+)
+from downloaders.netcapture import TEXT_MIME_TYPES, NetworkCapture, capture_enabled, click_and_capture
+from downloaders.playwright_engine import get_playwright_engine, playwright_enabled
+from downloaders.waits import PageWaiter, WaitTimeout
 
 logger = logging.getLogger(__name__)
+
+# 点击会议按钮触发的 ASP.NET 局部回发（iframe 页面），响应只包含更新面板的 HTML 片段
+_FW_POSTBACK_PATTERN = r"quikstrike|fedwatch"
+# 片段中含有概率表格时才直接使用，否则回退到完整页面
+_FW_TABLE_MARKER = "number highlight"
+
+# 每个会议只需要三组字符串：会议日期按钮、利率区间、概率
+# 浏览器内用 querySelectorAll 取回（js_fields），已有 HTML 片段时用等价的 XPath
+_MEETING_FIELDS: FieldSpec = {
+    "dates": ("li[class*='do-mobile no-mobile']", STRIPPED_STRINGS),
+    "rates": ("td.center", None),
+    "nums": ("td[class='number highlight']", None),
+}
+_MEETING_XPATHS = {
+    "dates": "//li[contains(@class, 'do-mobile no-mobile')]",
+    "rates": f"//td{has_class('center')}",
+    "nums": "//td[@class='number highlight']",
+}
+
+
+def split_meeting(rates, nums):
+    """按原先逐会议 csv 的读取规则切出 (利率区间, 概率)：
+    利率单元格与概率单元格首尾相接后去掉前 3 个表头单元格，'Data as of' 之前为利率区间，
+    紧随其后的同样数量的单元格为对应概率"""
+    data = (list(rates) + list(nums))[3:]
+    marker = next((i for i, value in enumerate(data) if "Data as of" in value), None)
+    if marker is None:
+        raise ValueError("'Data as of' marker not found")
+    return data[:marker], data[marker + 1: marker * 2 + 1]
+
+
+def meeting_fields_from_html(original_html):
+    """从页面或回发片段的 HTML 中取出 dates / rates / nums 三组字符串"""
+    tree = parse_html(original_html)
+    return {
+        "dates": [stripped_strings(li) for li in xpath_nodes(tree, _MEETING_XPATHS["dates"])],
+        "rates": xpath_strings(tree, _MEETING_XPATHS["rates"]),
+        "nums": xpath_strings(tree, _MEETING_XPATHS["nums"]),
+    }
+
+
 class CMEfedWatchDownloader(DataDownloader):
     '''The probability of rate decision for future Fed meetings,
     use tables or integrate bar chart as means of visualizing data
@@ -45,63 +95,101 @@ class CMEfedWatchDownloader(DataDownloader):
         os.makedirs(self.cme_folder_path, exist_ok=True)
 
 
-        # create new webdriver
-        options = Options()
-        options.add_argument("--disable-blink-features=AutomationControlled")  # 无头浏览器
-        options.add_argument("--start-maximized")   # 全屏浏览器
-        self.driver = webdriver.Chrome(options=options)
-        self.total_df = pd.DataFrame()  # ism df
+        # 浏览器从共享驱动池中按需借出，构造时不启动 Chrome
+        self.driver = lease_driver(profile="lean")
+        self.cancel_token: Optional[CancellationToken] = None
+        self.date_list: List[str] = []
+        # 每个会议的 (利率区间, 概率) 字符串列表，按会议顺序收集在内存中，不再逐个写 csv
+        self.meetings: List[Tuple[List[str], List[str]]] = []
 
     def get_start_num(self, rate_str):
         """用于处理利率排序"""
         start_num = int(rate_str.split("-")[0].replace(",", ""))
         return start_num
 
-    def parse_single_file(self, file_path):
-        """单独处理每个抓取数据的csv的内部数据排序然后储存到一个字典当中，方便后续整理"""
-        df_raw = pd.read_csv(file_path, skiprows = 4, header = None)
-        df_raw.columns = ["index", "data"]
-        marker_row = df_raw[df_raw["data"].astype(str).str.contains('Data as of', na=False)].index[0]  # find marker row
+    def _store_meeting(self, index, fields, extract_dates, check_cancel):
+        """收集单个议息会议的利率区间与概率（fields 见 _MEETING_FIELDS），保存在 self.meetings 中"""
+        check_cancel()
+        # 提取按钮上的日期
+        if extract_dates:
+            self.date_list = [date.replace("月", "m") for date in fields["dates"]]
 
-        # create new df to store data
-        df_output = pd.DataFrame()
-        df_output["Rate"] = df_raw.iloc[:marker_row, 1].reset_index(drop=True)
-        df_output["Probabilities"] = df_raw.iloc[marker_row + 1: marker_row * 2 + 1, 1].reset_index(drop=True)
-        df_output.set_index("Rate")
+            # 由于抓取的数据出现日期错位，因此这里先添加一个无用内容标记，后续删除重复的数据
+            self.date_list.insert(0, "extra")
+            self.date_list.pop()
 
-        return df_output
+        check_cancel()
+        try:
+            self.meetings.append(split_meeting(fields["rates"], fields["nums"]))
+        except ValueError as e:
+            logger.error(f"fw.py _store_meeting, meeting {index} table not recognised: {e}")
+            return False
+        return True
+
+    async def _meeting_fields_async(self, page, index):
+        """Playwright：独立页面中打开 FedWatch，点击第 index 个会议并返回（iframe 内的）会议字段"""
+        await page.goto(self.url, wait_until="domcontentloaded")
+        try:
+            await page.locator('xpath=//*[@id="onetrust-accept-btn-handler"]').click(timeout=5000)
+        except Exception:
+            pass
+
+        frame = page.main_frame
+        try:
+            handle = await page.wait_for_selector('xpath=//*[@id="cmeIframe-jtxelq2f"]', timeout=3000)
+            frame = await handle.content_frame() or frame
+        except Exception:
+            pass
+
+        xpath = f'//*[@id="ctl00_MainContent_ucViewControl_IntegratedFedWatchTool_uccv_lvMeetings_ctrl{index}_lbMeeting"]'
+        element = await frame.wait_for_selector(f"xpath={xpath}", state="visible", timeout=8000)
+        # 第 0 个会议还需要页面上的日期列表，仍取完整页面；其余会议直接使用回发响应片段
+        if capture_enabled():
+            fragment = await click_and_capture(page, element, _FW_POSTBACK_PATTERN, 8000)  # 未捕获到响应时也已完成点击
+            if fragment is not None and index > 0 and _FW_TABLE_MARKER in fragment:
+                return meeting_fields_from_html(fragment)
+        else:
+            await element.evaluate("el => { el.scrollIntoView({block:'center'}); el.click(); }")
+        await element.wait_for_element_state("hidden", timeout=5000)  # 等待元素状态变化（回发后旧元素被替换）
+        await frame.wait_for_selector("xpath=//td[contains(@class, 'number')]", timeout=8000)
+        return await js_fields_async(frame, _MEETING_FIELDS)
+
+    def cme_get_data_concurrent(self, check_cancel = None):
+        """16 个会议各开一个页面并发抓取（PLAYWRIGHT_SOURCES 包含 fw 时使用），解析仍按会议顺序进行"""
+        check_cancel()
+        indexes = list(range(16))
+        results = get_playwright_engine().map_pages(
+            "cmegroup.com", self._meeting_fields_async, indexes,
+            labels=[f"meeting{i}" for i in indexes], cancel_token=self.cancel_token,
+        )
+        for index, fields in zip(indexes, results):
+            if fields is None:
+                logger.error(f"Failed to press button, meeting {index} was not loaded")
+                return
+            if not self._store_meeting(index, fields, index == 0, check_cancel):
+                return
 
     def cme_get_data(self, check_cancel = None):
         check_cancel()
         self.driver.get(self.url)
-        time.sleep(random.uniform(0.2, 1))
+        # 页面级等待共用一个预算；cookies 按钮与 iframe 不一定出现，只给较短的超时
+        waiter = PageWaiter(self.driver, 20, "FW page", check_cancel)
+        waiter.until(lambda d: d.execute_script("return document.readyState") != "loading", "document")
         date_include = False  # 后面会涉及到提取仅一次日期，所以这里先定义一个变量
 
         # click cookies button
         try:
-            cookies_button = WebDriverWait(self.driver, 5).until(
-                EC.element_to_be_clickable((By.XPATH, '//*[@id="onetrust-accept-btn-handler"]'))
-            )
-            cookies_button.click()
-        except:
+            waiter.clickable((By.XPATH, '//*[@id="onetrust-accept-btn-handler"]'), "cookies button", timeout=5).click()
+        except Exception:
             logger.info("提示：未识别到CME fedwatch cookies按钮，程序继续 // Notify: Cookies button haven't been identified but continued...")
-            pass
 
         # 有 iframe 的话，先切换
         check_cancel()
         try:
-            iframe = WebDriverWait(self.driver, 3).until(
-                EC.presence_of_element_located((By.XPATH, '//*[@id="cmeIframe-jtxelq2f"]'))
-            )
+            iframe = waiter.element((By.XPATH, '//*[@id="cmeIframe-jtxelq2f"]'), "iframe", timeout=3)
             self.driver.switch_to.frame(iframe)
-        except Exception:
+        except WaitTimeout:
             logger.info("提示：未识别到CME fedwatch iframe，程序继续 // Notify: Iframe haven't been identified but continued...")
-            pass
-
-        # 滚动页面以确保按钮加载
-        for i in range(2):
-            self.driver.execute_script("window.scrollBy(0, 500);")
-            time.sleep(0.2)
 
         # 定义按钮路径
         button_xpaths = [
@@ -109,57 +197,44 @@ class CMEfedWatchDownloader(DataDownloader):
             for i in range(16)
         ]
 
-        # 循环点击
+        # 滚动页面触发懒加载，等待第一个会议按钮出现（取代固定 sleep）
+        for _ in range(2):
+            self.driver.execute_script("window.scrollBy(0, 500);")
+        try:
+            waiter.element((By.XPATH, button_xpaths[0]), "meeting buttons", timeout=8)
+        except WaitTimeout:
+            logger.info("FedWatch meeting buttons not rendered yet, trying to click anyway")
+        waiter.report()
+
+        capture = None
+        if capture_enabled():
+            capture = NetworkCapture(self.driver, _FW_POSTBACK_PATTERN, mime_types=TEXT_MIME_TYPES, method="POST")
+
+        # 循环点击：每个会议一个等待预算（可点击 + 回发替换旧元素 + 回发响应）
         for index, xpath in enumerate(button_xpaths):
             try:
                 check_cancel()
-                element = WebDriverWait(self.driver, 8).until(
-                    EC.element_to_be_clickable((By.XPATH, xpath))
-                )
+                meeting_waiter = PageWaiter(self.driver, 15, "FW meeting", check_cancel)
+                element = meeting_waiter.clickable((By.XPATH, xpath), "clickable", timeout=8)
+                if capture is not None:
+                    capture.reset()
                 self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", element)
                 self.driver.execute_script("arguments[0].click();", element)
-                WebDriverWait(self.driver, 5).until(
-                    EC.staleness_of(element)  # 等待元素状态变化
-                )
-
-                # get data from html 获取html
-                original_html = self.driver.page_source
-                soup = BeautifulSoup(original_html, "lxml")
-
-                check_cancel()
-                # 提取按钮上的日期
-                keyword = "do-mobile no-mobile"
-                if date_include is False:
-                    pattern = re.compile(keyword)
-                    elements = soup.find_all("li", class_=pattern)
-                    self.date_list = [date.get_text(strip=True).replace("月", "m") for date in elements]
-
-                    # 由于抓取的数据出现日期错位，因此这里先添加一个无用内容标记，后续删除重复的数据
-                    self.date_list.insert(0, "extra")
-                    self.date_list.pop()
-                    date_include = True
-
-                check_cancel()
-                # interest rate range 提取利率区间
-                sheet_rate = soup.find_all("td", class_="center")
-                rates = [rate.text.strip() for rate in sheet_rate]
-                # probability 提取概率
-                sheet_num = soup.find_all("td", class_ = "number highlight")
-                nums = [num.text.strip() for num in sheet_num]
-
-                check_cancel()
-                self.total_df = pd.concat(
-                    [pd.DataFrame(rates),
-                     pd.DataFrame(nums)]
-                )
-
-                try:
-                    os.makedirs(self.cme_folder_path, exist_ok = True)
-                    csv_path = os.path.join(self.cme_folder_path, f"{self.date_list[index]}.csv")
-                    self.total_df.to_csv(csv_path, index = True)
-                except Exception as e:
-                    logger.info(f"fw.py line 163, Data download successfully but failed to download csv, save_to_csv报错，原因是{e}")
+                meeting_waiter.stale(element, "postback", timeout=5)  # 等待元素状态变化
+
+                # get data 获取数据：日期已提取后优先解析回发响应片段，否则在浏览器内直接取字段，不再传回整页 page_source
+                fields = None
+                if capture is not None and date_include:
+                    response = capture.wait(meeting_waiter, "postback response", accept=lambda r: _FW_TABLE_MARKER in r["text"], timeout=5)
+                    fields = meeting_fields_from_html(response["text"]) if response else None
+                if not fields or not fields["nums"]:
+                    fields = js_fields(self.driver, _MEETING_FIELDS)
+                if not self._store_meeting(index, fields, date_include is False, check_cancel):
+                    return
+                date_include = True
 
+            except CancelledError:
+                raise
             except Exception as e:
                 logger.error(f"Failed to press button, reason is {e}")
                 return
@@ -169,52 +244,46 @@ class CMEfedWatchDownloader(DataDownloader):
 
 
 
-    def cme_fed_watch(self, check_cancel = None)->pd.DataFrame:
+    def cme_fed_watch(self, check_cancel = None)->Optional[pd.DataFrame]:
         """final output function // 最后的引用方程"""
         check_cancel()
-        self.cme_get_data(check_cancel = check_cancel) # get data
-        df_storage_list = []
-        num = 1
-        for path in self.date_list:
-            csv_path = os.path.join(self.cme_folder_path, path + ".csv")
-
-            # 调用下载好的多个csv数据
-            df_storage_list.append(self.parse_single_file(csv_path))
-            num = num + 1
-        del df_storage_list[-1]           # 这里删除重复的数据
-
-        # 下一步处理dataframe list里面，第一列分布不均匀的问题
+        self.meetings = []
+        if playwright_enabled("fw"):
+            self.cme_get_data_concurrent(check_cancel = check_cancel) # get data
+        else:
+            self.cme_get_data(check_cancel = check_cancel) # get data
+        # 每个会议的数据对应 date_list[1:] 中的日期，最后一个会议是重复数据不使用
+        labels = self.date_list[1:]
+        meetings = self.meetings[:len(labels)]
+        if not labels or len(meetings) < len(labels):
+            logger.error(f"FedWatch collected {len(self.meetings)} meetings for {len(labels)} dates")
+            return None
+
+        # 概率只从字符串转换一次（百分数），空单元格视为缺失
+        check_cancel()
+        columns = []
+        for rates, probs in meetings:
+            values = np.full(len(rates), np.nan)
+            values[:len(probs)] = pd.to_numeric(pd.Series(probs, dtype=object).str.rstrip("%"), errors="coerce").to_numpy()[:len(rates)]
+            series = pd.Series(values, index=rates)
+            columns.append(series[~series.index.duplicated()])
+
+        # 所有会议按排序后的利率区间一次性对齐，缺失概率记为 0
         check_cancel()
         all_rates = sorted(
-            set(rate for df in df_storage_list for rate in df['Rate']),
+            set(rate for rates, _ in meetings for rate in rates),
             key=self.get_start_num
         )  # set 保留唯一值，sort排序
-        standard_index = pd.DataFrame({"Rate": all_rates})
-
-        check_cancel()
-        aligned_dfs = []
-        for df in df_storage_list:
-            df_merged = standard_index.merge(df, on='Rate', how='left')
-            df_merged['Probabilities'] = df_merged['Probabilities'].fillna("0.0%")
-            aligned_dfs.append(df_merged)
-
-        prob_dfs = [df.set_index("Rate")["Probabilities"] for df in aligned_dfs]
-        final_df = pd.concat(prob_dfs, axis=1).reset_index()
-        final_df.columns = ["Rate"] + self.date_list[1:]
+        probabilities = pd.concat(columns, axis=1, keys=range(len(labels))).reindex(all_rates).fillna(0.0)
 
-        check_cancel()
-        prob_cols = [col for col in final_df.columns if col != "Rate"]
-        for col in prob_cols:
-            final_df[col] = final_df[col].str.rstrip('%').astype(float) / 100
+        # 检查每行：是否至少有一个概率 > 0  // check each line
+        mask = (probabilities.to_numpy() > 0).any(axis=1)
 
-        # 检查每行：是否至少有一个概率列 > 0  // check each line
-        mask = (final_df[prob_cols] > 0).any(axis=1)
+        # 输出为百分比字符串
+        final_df = (probabilities.astype(str) + "%").rename_axis("Rate").reset_index()
+        final_df.columns = ["Rate"] + labels
         final_df = final_df[mask]
 
-        # 转回百分比字符串
-        for col in prob_cols:
-            final_df[col] = (final_df[col] * 100).astype(str) + '%'
-
         return final_df
 
 
@@ -223,10 +292,14 @@ class CMEfedWatchDownloader(DataDownloader):
             return_csv = False,   # None time series data should directly download csv
             max_workers: Optional[int] = None,
             cancel_token: Optional[CancellationToken] = None,
-    ) -> Optional[Dict[str, pd.DataFrame]]:
+    ) -> Optional[Dict[str, Path]]:
+        """FedWatch 是表格数据（不写入 Time_Series），表格生成后立即写出 csv，返回 {配置名: csv 路径}。"""
 
         return_csv = True
+        csv_paths: Dict[str, Path] = {}
         token = cancel_token
+        self.cancel_token = token
+        self.driver.cancel_token = token
 
         def _check_cancel() -> None:
             if token is not None:
@@ -259,30 +332,23 @@ class CMEfedWatchDownloader(DataDownloader):
                 # )
 
                 _check_cancel()
-                df_dict : dict = {}
-                df_dict[table_name] = df
-                if df_dict is None:
-                    logger.error("No data downloaded from ISM")
-                    return None
-
-                _check_cancel()
-                for name, df in df_dict.items():
-                    try:
-                        for file in os.listdir(self.cme_folder_path):
-                            # 先去除所有csv文件
-                            if file.endswith('.csv'):
-                                file_path = os.path.join(self.cme_folder_path, file)
-                                os.remove(file_path)
-
-                        # 再写入新的文件
-                        csv_path = os.path.join(self.cme_folder_path, f"{name}.csv")
-                        df.to_csv(csv_path, index=True)
-                        logger.info("%s saved to %s Successfully!", name, csv_path)
-                    except Exception as err:
-                        logger.error(
-                            "%s FAILED DOWNLOAD CSV in method 'to_db', since %s", name, err
-                        )
-                        continue
+                try:
+                    for file in os.listdir(self.cme_folder_path):
+                        # 先去除所有csv文件（上次的结果与旧版本遗留的逐会议 csv）
+                        if file.endswith('.csv'):
+                            file_path = os.path.join(self.cme_folder_path, file)
+                            os.remove(file_path)
+
+                    # 再写入新的文件
+                    csv_path = Path(self.cme_folder_path) / f"{table_name}.csv"
+                    df.to_csv(csv_path, index=True)
+                    csv_paths[table_name] = csv_path
+                    logger.info("%s saved to %s Successfully!", table_name, csv_path)
+                except Exception as err:
+                    logger.error(
+                        "%s FAILED DOWNLOAD CSV in method 'to_db', since %s", table_name, err
+                    )
+                    continue
 
         except CancelledError:
             raise
@@ -298,7 +364,7 @@ class CMEfedWatchDownloader(DataDownloader):
             except Exception:
                 pass
 
-        return df_dict if return_csv else None
+        return csv_paths if return_csv else None
 
 
 # testing
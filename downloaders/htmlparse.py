@@ -0,0 +1,108 @@
+"""定向解析：只取需要的节点，不再为多 MB 的页面构建完整的 BeautifulSoup 树。
+
+两种方式：
+- `xpath_strings()` / `xpath_nodes()` —— lxml（C 实现）解析 HTML 后直接执行 XPath，
+  用于已经拿到 HTML 的场景（静态请求、归档重放、XHR 返回的片段）；
+- `js_fields()` / `js_fields_async()` —— 在浏览器内用 `querySelectorAll` 一次取回若干组纯字符串，
+  不必把整页 `page_source` 传回 Python 再解析（Selenium 与 Playwright 各一个入口）。
+
+字段规格 spec 为 {名称: (CSS 选择器, 取值)}，取值为：
+    None             —— 元素文本（首尾去空白）；
+    STRIPPED_STRINGS —— 各文本节点去空白后直接拼接（等价于 BeautifulSoup 的 get_text(strip=True)）；
+    其他字符串       —— 属性名，取属性值（首尾去空白，缺失为空字符串）。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from lxml import etree
+from lxml import html as lxml_html
+
+STRIPPED_STRINGS = "::strings"
+
+FieldSpec = Dict[str, Tuple[str, Optional[str]]]
+
+_PARSER = lxml_html.HTMLParser(encoding="utf-8", remove_comments=True)
+
+# 函数体：参数 spec 见模块说明
+_FIELDS_JS_BODY = (
+    "var out = {};"
+    "Object.keys(spec).forEach(function (key) {"
+    "  var sel = spec[key][0], how = spec[key][1];"
+    "  out[key] = Array.from(document.querySelectorAll(sel)).map(function (el) {"
+    "    if (how === '" + STRIPPED_STRINGS + "') {"
+    "      var parts = [], walker = document.createTreeWalker(el, NodeFilter.SHOW_TEXT), node;"
+    "      while ((node = walker.nextNode())) { var t = node.nodeValue.trim(); if (t) { parts.push(t); } }"
+    "      return parts.join('');"
+    "    }"
+    "    if (how) { return (el.getAttribute(how) || '').trim(); }"
+    "    return (el.textContent || '').trim();"
+    "  });"
+    "});"
+    "return out;"
+)
+SELENIUM_FIELDS_JS = "var spec = arguments[0];" + _FIELDS_JS_BODY
+PLAYWRIGHT_FIELDS_JS = "(spec) => { " + _FIELDS_JS_BODY + " }"
+
+
+def parse_html(source: Any) -> Any:
+    """str / bytes -> lxml 根节点；已经是节点时原样返回，空文档返回 None。"""
+
+    if not isinstance(source, (str, bytes)):
+        return source
+    data = source.encode("utf-8") if isinstance(source, str) else source
+    if not data.strip():
+        return None
+    try:
+        return lxml_html.document_fromstring(data, parser=_PARSER)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def has_class(*classes: str) -> str:
+    """XPath 谓词：class 属性包含全部给定的类名（按空白分隔的完整类名匹配）。"""
+
+    return "".join(f"[contains(concat(' ', normalize-space(@class), ' '), ' {c} ')]" for c in classes)
+
+
+def stripped_strings(node: Any) -> str:
+    return "".join(s.strip() for s in node.itertext())
+
+
+def xpath_nodes(source: Any, xpath: str) -> List[Any]:
+    root = parse_html(source)
+    if root is None:
+        return []
+    return [r for r in root.xpath(xpath) if isinstance(r, etree._Element)]
+
+
+def xpath_strings(source: Any, xpath: str) -> List[str]:
+    """执行 XPath：元素结果取文本（首尾去空白），属性 / 文本结果取字符串。"""
+
+    root = parse_html(source)
+    if root is None:
+        return []
+    result = root.xpath(xpath)
+    if not isinstance(result, list):
+        return [str(result).strip()]
+    return [r.text_content().strip() if isinstance(r, etree._Element) else str(r).strip() for r in result]
+
+
+def xpath_first(source: Any, xpath: str, default: Optional[str] = None) -> Optional[str]:
+    values = xpath_strings(source, xpath)
+    return values[0] if values else default
+
+
+def js_fields(driver: Any, spec: FieldSpec) -> Dict[str, List[str]]:
+    """Selenium：一次 execute_script 按 spec 取回各组字符串（在当前 frame 中执行）。"""
+
+    result = driver.execute_script(SELENIUM_FIELDS_JS, {k: list(v) for k, v in spec.items()})
+    return {k: list(result.get(k) or []) for k in spec} if result else {k: [] for k in spec}
+
+
+async def js_fields_async(target: Any, spec: FieldSpec) -> Dict[str, List[str]]:
+    """Playwright：target 为 Page 或 Frame。"""
+
+    result = await target.evaluate(PLAYWRIGHT_FIELDS_JS, {k: list(v) for k, v in spec.items()})
+    return {k: list(result.get(k) or []) for k in spec} if result else {k: [] for k in spec}
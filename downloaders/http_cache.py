@@ -0,0 +1,256 @@
+"""On-disk HTTP response cache used by the retry helpers in `downloaders.common`.
+
+缓存位于 `cache/http/`：
+- 键 = 方法 + URL + 规范化参数（排序、剔除 api_key / registrationKey 等密钥字段）+ 规范化请求体；
+- 响应体经 zlib 压缩后按键名存为单独文件，元数据（ETag、Last-Modified、大小、访问时间）存于 SQLite 索引；
+- 每个数据源有独立 TTL（可用 `HTTP_CACHE_TTL_<SOURCE>` 覆盖），过期后优先用 ETag / Last-Modified 做条件请求；
+- 总大小超过 `HTTP_CACHE_MAX_MB` 时按最近访问时间（LRU）淘汰；
+- `stats()` 给出命中 / 未命中 / 重新验证 / 淘汰计数。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from downloaders.common import CACHE_FOLDER, url_host
+
+logger = logging.getLogger(__name__)
+
+# 参与缓存键计算时需要剔除的密钥字段（小写比较）
+SECRET_FIELDS = frozenset({"api_key", "apikey", "registrationkey", "userid", "key", "token", "access_token"})
+
+# 主机 -> 数据源名称（用于查找 HTTP_CACHE_TTL_<SOURCE>）与默认 TTL（秒）
+_HOST_SOURCES: Dict[str, Tuple[str, float]] = {
+    "api.stlouisfed.org": ("FRED", 3600.0),
+    "api.bls.gov": ("BLS", 6 * 3600.0),
+}
+_DEFAULT_TTL = 900.0
+
+# 只保存与解析相关的响应头，避免缓存 Set-Cookie 等会话信息
+_KEPT_HEADERS = ("content-type", "content-encoding", "etag", "last-modified", "date", "cache-control")
+
+
+def _scrub(obj: Any) -> Any:
+    if isinstance(obj, Mapping):
+        return {str(k): _scrub(v) for k, v in sorted(obj.items(), key=lambda kv: str(kv[0])) if str(k).lower() not in SECRET_FIELDS}
+    if isinstance(obj, (list, tuple)):
+        return [_scrub(v) for v in obj]
+    return obj if isinstance(obj, (int, float, bool)) or obj is None else str(obj)
+
+
+def _normalize_body(data: Any, json_data: Any) -> str:
+    if json_data is not None:
+        return json.dumps(_scrub(json_data), sort_keys=True)
+    if data is None:
+        return ""
+    raw = data.decode("utf-8", "replace") if isinstance(data, bytes) else data
+    if isinstance(raw, str):
+        try:
+            return json.dumps(_scrub(json.loads(raw)), sort_keys=True)
+        except ValueError:
+            return raw
+    return json.dumps(_scrub(raw), sort_keys=True)
+
+
+def make_cache_key(method: str, url: str, params: Optional[Mapping[str, Any]] = None, data: Any = None, json_data: Any = None) -> str:
+    """计算缓存键；密钥字段不参与计算，因此更换 API key 不会使缓存失效。"""
+
+    parts = [method.upper(), url, json.dumps(_scrub(params or {}), sort_keys=True), _normalize_body(data, json_data)]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def ttl_for(url: str) -> float:
+    source, default = _HOST_SOURCES.get(url_host(url), ("", _DEFAULT_TTL))
+    env = os.environ.get(f"HTTP_CACHE_TTL_{source}") if source else os.environ.get("HTTP_CACHE_TTL_DEFAULT")
+    try:
+        return float(env) if env else default
+    except ValueError:
+        return default
+
+
+class CachedEntry:
+    """一条缓存记录（元数据 + 解压后的响应体）。"""
+
+    def __init__(self, key: str, url: str, status: int, headers: Dict[str, str], body: bytes, stored_at: float) -> None:
+        self.key = key
+        self.url = url
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.stored_at = stored_at
+
+    def age(self) -> float:
+        return time.time() - self.stored_at
+
+    def validators(self) -> Dict[str, str]:
+        out: Dict[str, str] = {}
+        if self.headers.get("etag"):
+            out["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            out["If-Modified-Since"] = self.headers["last-modified"]
+        return out
+
+    def to_response(self) -> requests.Response:
+        resp = requests.Response()
+        resp._content = self.body  # type: ignore[attr-defined]
+        resp.status_code = self.status
+        resp.headers = CaseInsensitiveDict(self.headers)
+        resp.url = self.url
+        resp.reason = "OK"
+        resp.encoding = get_encoding_from_headers(resp.headers)
+        resp.from_cache = True  # type: ignore[attr-defined]
+        return resp
+
+
+class HTTPResponseCache:
+    """压缩存储、带 TTL 与 LRU 淘汰的 HTTP 响应缓存（线程安全，可多进程共享目录）。"""
+
+    def __init__(self, folder: os.PathLike[str] | str = CACHE_FOLDER / "http", max_bytes: Optional[int] = None) -> None:
+        self.folder = os.fspath(folder)
+        os.makedirs(self.folder, exist_ok=True)
+        if max_bytes is None:
+            try:
+                max_bytes = int(float(os.environ.get("HTTP_CACHE_MAX_MB", "512")) * 1024 * 1024)
+            except ValueError:
+                max_bytes = 512 * 1024 * 1024
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(os.path.join(self.folder, "index.db"), timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, url TEXT, status INTEGER, headers TEXT, "
+            "size INTEGER, stored_at REAL, last_access REAL)"
+        )
+        self._conn.commit()
+        self._stats: Dict[str, int] = {}
+        self.reset_stats()
+
+    # ---- 统计 ----
+    def reset_stats(self) -> None:
+        with self._lock:
+            self._stats = {"hits": 0, "misses": 0, "revalidated": 0, "stores": 0, "evictions": 0}
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self._stats[name] = self._stats.get(name, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            out: Dict[str, Any] = dict(self._stats)
+        lookups = out["hits"] + out["misses"] + out["revalidated"]
+        out["hit_ratio"] = round((out["hits"] + out["revalidated"]) / lookups, 3) if lookups else 0.0
+        return out
+
+    # ---- 读写 ----
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, key[:2], f"{key}.z")
+
+    def get(self, key: str) -> Optional[CachedEntry]:
+        with self._lock:
+            row = self._conn.execute("SELECT url, status, headers, stored_at FROM entries WHERE key=?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                body = zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            self._delete(key)
+            return None
+        with self._lock:
+            self._conn.execute("UPDATE entries SET last_access=? WHERE key=?", (time.time(), key))
+            self._conn.commit()
+        return CachedEntry(key, row[0], int(row[1]), json.loads(row[2] or "{}"), body, float(row[3]))
+
+    def put(self, key: str, resp: requests.Response) -> None:
+        headers = {h: resp.headers[h] for h in _KEPT_HEADERS if h in resp.headers}
+        blob = zlib.compress(resp.content, 6)
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(blob)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning("HTTP cache write failed for %s: %s", resp.url, e)
+            return
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, url, status, headers, size, stored_at, last_access) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, resp.url, int(resp.status_code), json.dumps(headers), len(blob), now, now),
+            )
+            self._conn.commit()
+        self.count("stores")
+        self._evict()
+
+    def touch(self, key: str) -> None:
+        """条件请求返回 304 后刷新存储时间，使条目重新进入有效期。"""
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE entries SET stored_at=?, last_access=? WHERE key=?", (now, now, key))
+            self._conn.commit()
+
+    def _delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key=?", (key,))
+            self._conn.commit()
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self) -> None:
+        with self._lock:
+            total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            victims = []
+            for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY last_access ASC"):
+                if total <= self.max_bytes:
+                    break
+                victims.append(key)
+                total -= int(size or 0)
+        for key in victims:
+            self._delete(key)
+            self.count("evictions")
+        if victims:
+            logger.info("HTTP cache evicted %d entries (LRU)", len(victims))
+
+
+_CACHE: Optional[HTTPResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+
+def cache_enabled() -> bool:
+    return os.environ.get("HTTP_CACHE", "true").strip().lower() not in ("0", "false", "no")
+
+
+def get_http_cache() -> Optional[HTTPResponseCache]:
+    """进程级共享缓存实例；`HTTP_CACHE=false` 或初始化失败时返回 None。"""
+
+    global _CACHE
+    if not cache_enabled():
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            try:
+                _CACHE = HTTPResponseCache()
+            except Exception as e:
+                logger.warning("HTTP cache disabled, failed to open: %s", e)
+                return None
+        return _CACHE
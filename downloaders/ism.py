@@ -4,29 +4,30 @@
 from __future__ import annotations
 import random
 import logging
-import os
 import time
+from pathlib import Path
 from typing import Any, Dict, Optional, Callable
 import pandas as pd
-from bs4 import BeautifulSoup
 
-from selenium import webdriver
 from selenium.common.exceptions import (
     NoSuchElementException
 )
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
+from downloaders.browser import lease_driver
 from downloaders.common import (
     CSV_DATA_FOLDER,
     CancelledError,
     CancellationToken,
     DataDownloader,
 )
+from downloaders.htmlparse import stripped_strings, xpath_nodes
+from downloaders.waits import PageWaiter
 
 logger = logging.getLogger(__name__)
+REPORT_TABLE_XPATH = "(//table[@class='table table-bordered table-hover table-responsive mb-4'])[1]"
 month_dict = {
     "1" : "january",
     "2" : "february",
@@ -57,11 +58,24 @@ class ISMDownloader(DataDownloader):
         self.json_dict: Dict[str, Dict[str, Any]] = json_dict
         self.total_df = pd.DataFrame()
 
-        # initialize driver 初始化driver
-        options = Options()
-        options.add_argument('--disable-gpu')
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        self.driver = webdriver.Chrome(options=options)
+        # initialize driver 初始化driver：共享驱动池，首次使用时才借出浏览器
+        self.driver = lease_driver()
+
+    def _wait_landing(self, check_cancel: Optional[Callable[[], None]] = None) -> None:
+        """等待入口页解析完成（替代固定 sleep），按钮本身由后续 WebDriverWait 等待。"""
+        waiter = PageWaiter(self.driver, 10, "ISM landing", check_cancel)
+        waiter.until(lambda d: d.execute_script("return document.readyState") != "loading", "document", raise_on_timeout=False)
+        waiter.report()
+
+    def _wait_report_table(self, check_cancel: Optional[Callable[[], None]] = None) -> None:
+        """等待报告表格渲染出数据行；超时不抛异常，交给 extractor 记录并跳过该月。"""
+        waiter = PageWaiter(self.driver, 15, "ISM report", check_cancel)
+        waiter.until(
+            lambda d: d.find_elements(By.XPATH, f"{REPORT_TABLE_XPATH}//tbody//tr/td"),
+            "report table",
+            raise_on_timeout=False,
+        )
+        waiter.report()
 
     def ism_manu_html_extractor(self, check_cancel: Optional[Callable[[], None]] = None):
         """global method, extract html"""
@@ -76,15 +90,15 @@ class ISMDownloader(DataDownloader):
         check_cancel()
 
         try:   # 有的时候，或者之后永远，都没法获得过去5个月的ism报告，所以要有跳过部分
-            soup = BeautifulSoup(html, 'lxml')
-            table = soup.find('table', class_='table table-bordered table-hover table-responsive mb-4')
-            rows = table.find('tbody').find_all('tr')
+            # lxml + XPath 只取报告表格，不构建整页 BeautifulSoup 树
+            table = xpath_nodes(html, REPORT_TABLE_XPATH)[0]
+            rows = table.xpath("(.//tbody)[1]//tr")
 
             col_values = []  # store values for future dataframe management
             for row in rows:
-                cells = row.find_all('td')
+                cells = row.xpath(".//td")
                 if cells:
-                    first_col_text = cells[0].get_text(strip=True)
+                    first_col_text = stripped_strings(cells[0])
                     col_values.append(first_col_text)  # append data into list
             df = pd.DataFrame([col_values])
             self.total_df = pd.concat([self.total_df, df], ignore_index=True)
@@ -105,7 +119,7 @@ class ISMDownloader(DataDownloader):
         # initialize : clear total_df and load html
         self.total_df = pd.DataFrame()
         self.driver.get(self.url)
-        time.sleep(2)  # wait loading
+        self._wait_landing(check_cancel)
 
         # click cookies button
         check_cancel()
@@ -148,6 +162,7 @@ class ISMDownloader(DataDownloader):
 
         # crawl current data
         check_cancel()
+        self._wait_report_table(check_cancel)
         self.ism_manu_html_extractor(check_cancel = check_cancel)  # Note: data are saved in self.total_df
 
         # get month list for other data crawling
@@ -170,7 +185,8 @@ class ISMDownloader(DataDownloader):
             new_url = f"https://www.ismworld.org/supply-management-news-and-reports/reports/ism-report-on-business/pmi/{month}/"
             check_cancel()
             self.driver.get(new_url)
-            time.sleep(random.uniform(0.2,0.9))  # wait loading
+            self._wait_report_table(check_cancel)
+            time.sleep(random.uniform(0.2,0.9))  # random pause to prevent IP ban
             self.ism_manu_html_extractor(check_cancel = check_cancel)
             if self.success_extract_or_not is True:
                 self.total_df.drop(columns=self.total_df.columns[-2:], axis=1, inplace=True)
@@ -204,7 +220,7 @@ class ISMDownloader(DataDownloader):
         # initialize : clear total_df and load html
         self.total_df = pd.DataFrame()
         self.driver.get(self.url)
-        time.sleep(2)  # wait loading
+        self._wait_landing(check_cancel)
 
         # click cookies button
         check_cancel()
@@ -244,6 +260,7 @@ class ISMDownloader(DataDownloader):
         #     pass
 
         # crawl current data
+        self._wait_report_table(check_cancel)
         self.ism_manu_html_extractor(check_cancel = check_cancel)  # Note: data are saved in self.total_df
 
         # get month list for other data crawling
@@ -267,7 +284,8 @@ class ISMDownloader(DataDownloader):
             new_url = f"https://www.ismworld.org/supply-management-news-and-reports/reports/ism-report-on-business/services/{month}/"
             check_cancel()
             self.driver.get(new_url)
-            time.sleep(random.uniform(0.2,0.9))  # wait loading
+            self._wait_report_table(check_cancel)
+            time.sleep(random.uniform(0.2,0.9))  # random pause to prevent IP ban
             self.ism_manu_html_extractor(check_cancel = check_cancel)
             if self.success_extract_or_not is True:
                 self.total_df.drop(columns=self.total_df.columns[-3:], axis=1, inplace=True)
@@ -319,12 +337,15 @@ class ISMDownloader(DataDownloader):
             return_csv = False,   # None time series data should directly download csv
             max_workers: Optional[int] = None,
             cancel_token: Optional[CancellationToken] = None,
-    ) -> Optional[Dict[str, pd.DataFrame]]:
-        # 输出格式dict[str, pd.Dataframe] 是数据名称与数据的df对应
+    ) -> Optional[Dict[str, Path]]:
+        # 输出格式 {数据名称: csv 路径}；ISM 是表格数据（不写入 Time_Series），每张表下载后立即写出 csv，
+        # 不在内存中累积
 
         # FORCE : None time series data should directly download csv
-        return_csv = True,
+        return_csv = True
         token = cancel_token
+        self.driver.cancel_token = token
+        csv_paths: Dict[str, Path] = {}
 
         def _check_cancel() -> None:
             if token is not None:
@@ -350,46 +371,21 @@ class ISMDownloader(DataDownloader):
                     )
                     continue
 
-                # # 调用write_to_db，尽管不用写入数据库但是需要它的下载顺序和console信息
-                # converter = DatabaseConverter()
-                # _check_cancel()
-                # converter.write_into_db(
-                #     df=df,
-                #     start_date = "2020-01-01",   # useless params but must need
-                #     data_name=table_config["name"],
-                #     is_time_series=False,
-                #     is_pct_data=False,
-                # )
-                # _check_cancel()
-
-                # 创建一个容器，结构是，数据名称：df
-                df_dict : dict = {}
-                df_dict[table_name] = df
-
-                if df_dict is None:
-                    logger.error("No data downloaded from ISM")
-                    return None
-
-                if return_csv and df_dict:
-                    # 如果需要下载csv，传入参数=True
-                    _check_cancel()
-                    for name, df in df_dict.items():
-                        # 先寻找table共有的文件夹，如果没有则创建
-                        try:
-                            table_data_folder_path = os.path.join(os.fspath(CSV_DATA_FOLDER), "A_TABLE_DATA")
-                            if not os.path.exists(table_data_folder_path):
-                                # 创建文件夹
-                                os.makedirs(table_data_folder_path, exist_ok=True)  # exist_ok 创建文件夹的时候，如果文件夹已经存在，则不报错
-                            data_folder_path = os.path.join(os.fspath(table_data_folder_path), name)
-                            os.makedirs(data_folder_path, exist_ok=True)
-                            csv_path = os.path.join(data_folder_path, f"{name}.csv")
-                            df.to_csv(csv_path, index=True)
-                            logger.info("%s saved to %s Successfully!", name, csv_path)
-                        except Exception as err:
-                            logger.error(
-                                "%s FAILED DOWNLOAD CSV in method 'to_db', since %s", name, err
-                            )
-                            continue
+                # 如果需要下载csv，传入参数=True；写出后不再保留 df
+                _check_cancel()
+                try:
+                    # 先寻找table共有的文件夹，如果没有则创建（exist_ok 文件夹已存在时不报错）
+                    data_folder_path = CSV_DATA_FOLDER / "A_TABLE_DATA" / table_name
+                    data_folder_path.mkdir(parents=True, exist_ok=True)
+                    csv_path = data_folder_path / f"{table_name}.csv"
+                    df.to_csv(csv_path, index=True)
+                    csv_paths[table_name] = csv_path
+                    logger.info("%s saved to %s Successfully!", table_name, csv_path)
+                except Exception as err:
+                    logger.error(
+                        "%s FAILED DOWNLOAD CSV in method 'to_db', since %s", table_name, err
+                    )
+                    continue
 
         except CancelledError:
             raise
@@ -399,7 +395,7 @@ class ISMDownloader(DataDownloader):
             except Exception:
                 pass
 
-        return df_dict if return_csv else None
+        return csv_paths if return_csv else None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,213 @@
+"""浏览器网络响应捕获：直接读取页面 XHR 返回的 JSON / 局部刷新片段，而不是解析渲染后的 DOM。
+
+FS、EM、FW 页面上的数据都来自 XHR：FS 的掉期曲线与 EM 的成交量 / 持仓量是 JSON 接口，
+FW 每次点击会议是一次 ASP.NET 局部回发（返回只含更新面板的 HTML 片段）。
+
+- Selenium：Chrome 以 `goog:loggingPrefs={"performance": "ALL"}` 启动（见 `downloaders.browser`），
+  `NetworkCapture` 从 performance 日志中筛出匹配的响应，再用 CDP `Network.getResponseBody` 取响应体；
+- Playwright：`click_and_capture()` 用 `page.expect_response` 在点击的同时等待对应响应。
+
+载荷结构并不固定，`find_records()` / `pick()` 按字段名模式在 JSON 中查找记录列表；
+找不到时调用方回退到原有的 DOM 解析。`NETWORK_CAPTURE=false` 关闭捕获。
+"""
+
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Sequence
+
+logger = logging.getLogger(__name__)
+
+JSON_MIME_TYPES = ("application/json", "text/json", "application/javascript", "text/javascript")
+TEXT_MIME_TYPES = JSON_MIME_TYPES + ("text/plain", "text/html")
+
+
+def capture_enabled() -> bool:
+    return os.environ.get("NETWORK_CAPTURE", "true").strip().lower() not in ("0", "false", "no")
+
+
+def enable_performance_log(options: Any) -> None:
+    """让 chromedriver 记录 Network.* 事件（`driver.get_log("performance")`）。"""
+
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+
+class NetworkCapture:
+    """Selenium 驱动的响应捕获器：只保留 URL 匹配 url_pattern、类型属于 mime_types 的响应。
+
+    每个响应记录为 dict：url / method / status / mime / text。
+    performance 日志读取后即被清空，`reset()` 丢弃此前的事件，之后的 `poll()` 只返回新响应。
+    """
+
+    def __init__(
+        self,
+        driver: Any,
+        url_pattern: str,
+        mime_types: Sequence[str] = JSON_MIME_TYPES,
+        method: Optional[str] = None,
+    ) -> None:
+        self.driver = driver
+        self.pattern: Pattern[str] = re.compile(url_pattern, re.IGNORECASE)
+        self.mime_types = tuple(mime_types)
+        self.method = method.upper() if method else None
+        self._requests: Dict[str, str] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self.responses: List[Dict[str, Any]] = []
+
+    def _drain(self) -> List[Dict[str, Any]]:
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception as e:
+            logger.debug("performance log unavailable: %s", e)
+            return []
+        events: List[Dict[str, Any]] = []
+        for entry in entries:
+            try:
+                events.append(json.loads(entry["message"])["message"])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return events
+
+    def reset(self) -> None:
+        self._drain()
+        self._requests.clear()
+        self._pending.clear()
+        self.responses.clear()
+
+    def _body(self, request_id: str) -> Optional[str]:
+        try:
+            body = self.driver.execute_cdp_cmd("Network.getResponseBody", {"requestId": request_id})
+        except Exception as e:
+            logger.debug("response body for %s unavailable: %s", request_id, e)
+            return None
+        text = body.get("body", "")
+        if body.get("base64Encoded"):
+            text = base64.b64decode(text).decode("utf-8", errors="replace")
+        return text
+
+    def poll(self) -> List[Dict[str, Any]]:
+        """处理新到的日志事件，返回本次新完成的匹配响应。"""
+
+        new: List[Dict[str, Any]] = []
+        for event in self._drain():
+            method = event.get("method")
+            params = event.get("params") or {}
+            rid = params.get("requestId")
+            if method == "Network.requestWillBeSent":
+                self._requests[rid] = (params.get("request") or {}).get("method", "GET")
+            elif method == "Network.responseReceived":
+                resp = params.get("response") or {}
+                url = resp.get("url", "")
+                mime = (resp.get("mimeType") or "").lower()
+                req_method = self._requests.get(rid, "GET")
+                if not self.pattern.search(url) or not mime.startswith(self.mime_types):
+                    continue
+                if self.method is not None and req_method.upper() != self.method:
+                    continue
+                self._pending[rid] = {"url": url, "method": req_method, "status": resp.get("status"), "mime": mime}
+            elif method == "Network.loadingFinished" and rid in self._pending:
+                info = self._pending.pop(rid)
+                text = self._body(rid)
+                if text is None:
+                    continue
+                info["text"] = text
+                logger.debug("captured %s %s (%d bytes)", info["method"], info["url"], len(text))
+                new.append(info)
+        self.responses.extend(new)
+        return new
+
+    def wait(self, waiter: Any, step: str = "network response", accept: Optional[Any] = None, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """用 `PageWaiter` 轮询，直到出现一个（满足 accept(response) 的）新响应；超时返回 None。"""
+
+        def _arrived(_driver: Any) -> Optional[Dict[str, Any]]:
+            for resp in self.poll():
+                if accept is None or accept(resp):
+                    return resp
+            return None
+
+        return waiter.until(_arrived, step, timeout, raise_on_timeout=False)
+
+
+def json_body(response: Optional[Dict[str, Any]]) -> Any:
+    """解析响应体为 JSON；不是 JSON（或为空）时返回 None。"""
+
+    if not response:
+        return None
+    text = (response.get("text") or "").strip()
+    if not text or text[0] not in "[{":
+        return None
+    try:
+        return json.loads(text)
+    except ValueError:
+        return None
+
+
+def _key_matches(keys: Iterable[str], patterns: Sequence[Pattern[str]]) -> bool:
+    keys = list(keys)
+    return all(any(p.search(k) for k in keys) for p in patterns)
+
+
+def find_records(payload: Any, *key_patterns: str) -> Optional[List[Dict[str, Any]]]:
+    """深度优先查找第一个“字典列表”，其元素的键覆盖全部 key_patterns（正则，不区分大小写）。"""
+
+    patterns = [re.compile(p, re.IGNORECASE) for p in key_patterns]
+    stack = [payload]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            dicts = [x for x in node if isinstance(x, dict)]
+            if dicts and len(dicts) == len(node) and _key_matches(dicts[0].keys(), patterns):
+                return dicts
+            stack.extend(reversed(node))
+        elif isinstance(node, dict):
+            stack.extend(reversed(list(node.values())))
+    return None
+
+
+def pick(record: Dict[str, Any], pattern: str, default: Any = None) -> Any:
+    """取第一个键名匹配 pattern 的字段值。"""
+
+    regex = re.compile(pattern, re.IGNORECASE)
+    for key, value in record.items():
+        if regex.search(key):
+            return value
+    return default
+
+
+def to_number(value: Any) -> Optional[float]:
+    """数值或 "1,234" / "12.5%" 形式的字符串 -> float；无法转换时返回 None。"""
+
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).replace(",", "").rstrip("%").strip()
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+async def click_and_capture(page: Any, element: Any, url_pattern: str, timeout_ms: int, method: Optional[str] = "POST") -> Optional[str]:
+    """Playwright：点击 element 并返回触发的、URL 匹配 url_pattern 的响应文本。
+
+    未在 timeout_ms 内捕获到匹配响应时返回 None（点击本身已经完成）。
+    """
+
+    regex = re.compile(url_pattern, re.IGNORECASE)
+
+    def _match(resp: Any) -> bool:
+        return bool(regex.search(resp.url)) and (method is None or resp.request.method.upper() == method.upper())
+
+    try:
+        async with page.expect_response(_match, timeout=timeout_ms) as info:
+            await element.evaluate("el => { el.scrollIntoView({block:'center'}); el.click(); }")
+        response = await info.value
+        return await response.text()
+    except Exception as e:
+        logger.debug("no response matching %s captured: %s", url_pattern, e)
+        return None
@@ -2,19 +2,13 @@
 
 from __future__ import annotations
 import logging
-from pathlib import Path
 import os
-import time
-import shutil
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 from datetime import date
 import pandas as pd
 import urllib.request, urllib.parse
-from bs4 import BeautifulSoup
-
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
 
+from downloaders.archive import archive_file
 from downloaders.common import (
     CSV_DATA_FOLDER,
     CancelledError,
@@ -22,8 +16,22 @@ from downloaders.common import (
     DatabaseConverter,
     DataDownloader,
 )
+from downloaders.file_fetch import FetchResult, FileFetcher
+from downloaders.htmlparse import has_class, xpath_first, xpath_nodes
+from downloaders.impersonate import get_impersonated_session
+from downloaders.sheet_cache import read_sheets
 
 logger = logging.getLogger(__name__)
+
+# 数据名 -> (sheet 名称, 单位)
+_NYF_SHEETS: Dict[str, Tuple[str, str]] = {
+    "Debt_balance": ("Page 3 Data", "Trillion USD"),
+    "Credit_quota": ("Page 10 Data", "Trillion USD"),
+    "30_Days_debt_default": ("Page 13 Data", "%/Pct"),
+    "90_Days_debt_default": ("Page 14 Data", "%/Pct"),
+    "Num_of_debts_bankruptcy_and_default": ("Page 17 Data", "Thousands"),
+}
+
 class NYFDownloader(DataDownloader):
     def __init__(
             self, json_dict: Dict[str, Dict[str, Any]], api_key: str, request_year: int
@@ -31,180 +39,122 @@ class NYFDownloader(DataDownloader):
         self.json_dict = json_dict
 
         # folder path
-        self.download_path = Path.home() / "Downloads"
         self.csv_folder_path = CSV_DATA_FOLDER
         self.table_folder_path = os.path.join(self.csv_folder_path, "A_TABLE_DATA")
-
-        # use selenium download xlsx file
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-        self.driver = webdriver.Chrome(options=options)
-
-    def _change_original_file_path(self, check_cancel):
-        """下载的原始文件修改路径，注意这里不是给细分文件的
-        先做判断，对文件的日期进行判断，如果日期相同则直接跳过下载
-        Judge whether download or not"""
-
+        self.original_file_path = os.path.join(self.csv_folder_path, "nyf_original_file", "nyf_original_file.xlsx")
+
+        # xlsx 直链可从 iframe 中解析得到，直接条件下载，不再启动浏览器
+        self.fetcher = FileFetcher()
+
+    def _outputs_exist(self) -> bool:
+        return all(
+            os.path.exists(os.path.join(self.table_folder_path, cfg["name"], f"{cfg['name']}.csv"))
+            for cfg in self.json_dict.values()
+        )
+
+    def _read_page(self, url: str, session) -> bytes:
+        """读取页面 HTML：选用 impersonate 后端时带浏览器指纹与 Cookie，否则用 urllib。"""
+        if session is not None:
+            return session.get_text(url).encode("utf-8")
+        return urllib.request.urlopen(url).read()
+
+    def _original_file_download(self, check_cancel, cancel_token: Optional[CancellationToken] = None) -> Optional[FetchResult]:
+        """解析 HHDC 页面 iframe 中的 xlsx 链接并条件下载。
+        文件未变化（304 或内容哈希相同）且各表 csv 已存在时，调用方跳过解析。"""
         check_cancel()
-        # path variables
-        folder_path = os.path.join(os.path.join(self.csv_folder_path, "nyf_original_file"))  # 文件夹地址
-        os.makedirs(folder_path, exist_ok=True)  # 创建文件夹
 
-        # 更宽松的匹配模式
-        pattern = r"HHD_C_Report*.xlsx"
-        matching_files = list(self.download_path.glob(pattern))
+        # initialize info
+        url = r"https://www.newyorkfed.org/microeconomics/hhdc.html"
+        session = get_impersonated_session("nyf")
 
-        if not matching_files:
-            # 增强错误提示，显示当前目录下的所有文件
-            all_files = [f.name for f in self.download_path.iterdir() if f.is_file()]
-            error_msg = (
-                f"未找到匹配的HHD_C_Report文件，当前路径: {self.download_path}\n"
-                f"当前目录下的文件列表: {all_files}"
-            )
+        try:
+            html = self._read_page(url, session)
+        except Exception as e:
+            error_msg = f"Failed to access URL {url}: {e}"
             logger.error(error_msg)
             print(error_msg)
-            raise FileNotFoundError(error_msg)
-
-        xlsx_file = matching_files[0]  # 取第一个匹配项
-        target_location_path = os.path.join(folder_path, "nyf_original_file.xlsx")  # 转移后的文件路径与名称
+            return None
 
-        # 等待新文件下载完成
-        check_cancel()
-        for _ in range(30):
-            if xlsx_file.exists():
-                break
-            else:
-                time.sleep(1)
+        iframe_src = xpath_first(html, "//iframe[@id='HHDCIframe']/@src")
+        if iframe_src is None:
+            error_msg = "Failed to find iframe"
+            logger.error(error_msg)
+            print(error_msg)
+            return None
 
-        if os.path.exists(folder_path):
-            shutil.rmtree(folder_path)  # 删除整个目录及其内容
-            os.makedirs(folder_path, exist_ok=True)
+        # 访问 iframe 的 src 页面，因为iframe是单独的html所以需要重复访问一次
+        full_iframe_url = urllib.parse.urljoin(url, iframe_src)
+        try:
+            iframe_html = self._read_page(full_iframe_url, session)
+        except Exception as e:
+            error_msg = f"Failed to access iframe URL {full_iframe_url}: {e}"
+            logger.error(error_msg)
+            print(error_msg)
+            return None
 
-        check_cancel()
-        if xlsx_file.exists():
-            #xlsx_file.rename(target_location_path)
-            if os.name == 'nt':
-                os.system("move " + str(xlsx_file) + " " + str(target_location_path))
-            else:
-                os.system("mv " + str(xlsx_file) + " " + str(target_location_path))
-            return
-        else:
-            error_msg = "Failed to download, because did not found target excel file"
+        # 找到下载链接
+        link = xpath_nodes(iframe_html, f"//a{has_class('glossary-download')}")
+        if not link:
+            error_msg = "Failed to find download button"
             logger.error(error_msg)
             print(error_msg)
-            return
+            return None
+        try:
+            href = link[1].get("href")
+        except IndexError:
+            error_msg = f"Expected at least 2 download links, but found {len(link)}"
+            logger.error(error_msg)
+            print(error_msg)
+            return None
 
-    def _original_file_download(self, check_cancel):
+        full_href = urllib.parse.urljoin(full_iframe_url, href)
         check_cancel()
-
-        # 先删除任何下载文件夹中的之前的文件
-        pattern = r"HHD_C_Report*.xlsx"
-        matching_files = list(self.download_path.glob(pattern))
-        for file in matching_files:
-            try:
-                file.unlink()
-                logger.info(f"Deleted file: {file}")
-            except Exception as e:
-                logger.warning(f"Failed to delete file {file}: {e}")
-                break
-
-        # initialize info
-        url = r"https://www.newyorkfed.org/microeconomics/hhdc.html"
-        # file_name = f"nyf_original_file"
-
         try:
-            html = urllib.request.urlopen(url).read()
+            result = self.fetcher.fetch(
+                "nyf/HHD_C_Report",
+                full_href,
+                self.original_file_path,
+                force=not (self._outputs_exist() and os.path.exists(self.original_file_path)),
+                cancel_token=cancel_token,
+                session=session,
+            )
+        except CancelledError:
+            raise
         except Exception as e:
-            error_msg = f"Failed to access URL {url}: {e}"
+            error_msg = f"Failed to download {full_href}: {e}"
             logger.error(error_msg)
             print(error_msg)
-            return
-
-        soup = BeautifulSoup(html, "lxml")
-        iframe = soup.find("iframe", id = "HHDCIframe")
-        if iframe:
-            iframe_src = iframe.get("src")
-
-            # 访问 iframe 的 src 页面，因为iframe是单独的html所以需要重复访问一次
-            full_iframe_url = urllib.parse.urljoin(url, iframe_src)
-            try:
-                iframe_html = urllib.request.urlopen(full_iframe_url).read()
-            except Exception as e:
-                error_msg = f"Failed to access iframe URL {full_iframe_url}: {e}"
-                logger.error(error_msg)
-                print(error_msg)
-                return
-
-            iframe_soup = BeautifulSoup(iframe_html, "lxml")
-
-            # 找到下载链接
-            link = iframe_soup.find_all("a", class_="glossary-download")
-            if link:
-                try:
-                    href = link[1].get("href")
-                except IndexError:
-                    error_msg = f"Expected at least 2 download links, but found {len(link)}"
-                    logger.error(error_msg)
-                    print(error_msg)
-                    return
-
-                full_href = urllib.parse.urljoin(full_iframe_url, href)
-
-                self.driver.get(full_href)
-                time.sleep(1.5)
-
-            else:
-                error_msg = "Failed to find download button"
-                logger.error(error_msg)
-                print(error_msg)
-                return
+            return None
+        if result.changed:
+            archive_file("nyf", "nyf_original_file", self.original_file_path)
+        return result
 
-            # 转移文件 move the location of the file
-            self._change_original_file_path(check_cancel = check_cancel)
+    def _read_excel_sheets(self, check_cancel, sha256: Optional[str] = None):
+        """下载完后，一次读取Excel文件中需要的所有sheet（按文件哈希缓存），并重新整理到新的文本当中"""
+        file_name_path = self.original_file_path
+        check_cancel()
 
-        else:
-            error_msg = "Failed to find iframe"
+        # 匹配sheet名称，整本工作簿只解析一次
+        names = [table_config["name"] for table_config in self.json_dict.values()]
+        wanted = [_NYF_SHEETS[n][0] for n in names if n in _NYF_SHEETS]
+        try:
+            sheets = read_sheets(file_name_path, wanted, label="nyf", sha256=sha256)
+        except Exception as e:
+            error_msg = f"Failed to read sheets {wanted} from file {file_name_path}: {e}"
             logger.error(error_msg)
             print(error_msg)
             return
 
-    def _read_excel_sheets(self, check_cancel):
-        """下载完后，读取Excel文件中的所有sheet，并重新整理到新的文本当中"""
-        file_name_path = os.path.join(self.csv_folder_path, "nyf_original_file", "nyf_original_file.xlsx")
-        check_cancel()
-
         # 根据配置处理各个数据表
-        for table_name, table_config in self.json_dict.items():
+        for data_name in names:
             check_cancel()
-            data_name = table_config["name"]
-
-            # 匹配sheet名称
-            unit = None
-            sheet_name = None
-            if data_name == "Debt_balance":
-                sheet_name = "Page 3 Data"
-                unit = "Trillion USD"
-            elif data_name == "Credit_quota":
-                sheet_name = "Page 10 Data"
-                unit = "Trillion USD"
-            elif data_name == "30_Days_debt_default":
-                sheet_name = "Page 13 Data"
-                unit = "%/Pct"
-            elif data_name == "90_Days_debt_default":
-                sheet_name = "Page 14 Data"
-                unit = "%/Pct"
-            elif data_name == "Num_of_debts_bankruptcy_and_default":
-                sheet_name = "Page 17 Data"
-                unit = "Thousands"
-
-            try:
-                df_single_data = pd.read_excel(file_name_path, sheet_name=sheet_name)
-            except:
+            sheet_name, unit = _NYF_SHEETS.get(data_name, (None, None))
+            if sheet_name not in sheets:
                 error_msg = f"Failed to read sheet {sheet_name} from file {file_name_path}"
                 logger.error(error_msg)
                 print(error_msg)
                 continue
+            df_single_data = sheets[sheet_name].copy()
 
             if sheet_name == "Page 13 Data" or sheet_name == "Page 14 Data":
                 df_single_data = df_single_data.drop(2)
@@ -260,20 +210,16 @@ class NYFDownloader(DataDownloader):
             if token is not None:
                 token.raise_if_cancelled()
 
-        try:
-            # 在循环外先下载文件，读取文件
-            self._original_file_download(_check_cancel)
-            self._read_excel_sheets(_check_cancel)
-
-        except CancelledError:
-            raise
-        finally:
-            try:
-                self.driver.quit()
-            except:
-                pass
-
+        # 在循环外先下载文件，读取文件
+        result = self._original_file_download(_check_cancel, cancel_token=token)
+        if result is None:
+            return None
+        if not result.changed:
+            logger.info("NYF household debt report unchanged (%s), skip parsing", result.status)
             return None
+        self._read_excel_sheets(_check_cancel, sha256=result.sha256)
+        self.fetcher.mark_processed(result)
+        return None
 
 if __name__ == "__main__":
     json_dict = {
@@ -0,0 +1,219 @@
+"""异步 Playwright 抓取引擎：一个浏览器、多个并发页面。
+
+Selenium 一次只能驱动一个页面，TE 逐个指标翻页、FW 逐个点击 16 个议息会议，总耗时与页面数成正比。
+本模块在后台线程中运行一个 asyncio 事件循环和一个 Chromium 实例，同步代码通过 `map_pages()`
+提交一批页面任务：
+
+- 每个任务使用独立的 BrowserContext（Cookie / 存储互不干扰）；
+- 按站点限制同时打开的页面数（`_SITE_CONCURRENCY`，可用 `PLAYWRIGHT_CONCURRENCY` 统一覆盖）；
+- 调用方传入的 `CancellationToken` 被取消时，未完成的页面任务随之取消并抛出 `CancelledError`；
+- 与 Selenium 的 lean 配置一致，拦截图片 / 字体 / 媒体请求与第三方统计域名（`BROWSER_LEAN=false` 关闭）。
+
+按数据源开启：`PLAYWRIGHT_SOURCES=te,fw`（默认关闭，仍走 Selenium 驱动池）。
+"""
+
+from __future__ import annotations
+
+import asyncio
+import atexit
+import logging
+import os
+import threading
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from downloaders.browser import BLOCKED_HOSTS, BLOCKED_RESOURCE_TYPES, headless_enabled, lean_enabled
+from downloaders.common import CancellationToken, CancelledError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# 站点 -> 同时打开的页面数上限
+_SITE_CONCURRENCY: Dict[str, int] = {
+    "tradingeconomics.com": 3,
+    "cmegroup.com": 4,
+}
+_DEFAULT_CONCURRENCY = 2
+
+
+def playwright_enabled(source: str) -> bool:
+    """数据源是否选用 Playwright 引擎（环境变量 PLAYWRIGHT_SOURCES，逗号分隔）。"""
+
+    wanted = os.environ.get("PLAYWRIGHT_SOURCES", "")
+    return source.lower() in {s.strip().lower() for s in wanted.split(",") if s.strip()}
+
+
+def site_concurrency(site: str) -> int:
+    env = os.environ.get("PLAYWRIGHT_CONCURRENCY")
+    if env and env.isdigit() and int(env) > 0:
+        return int(env)
+    return _SITE_CONCURRENCY.get(site, _DEFAULT_CONCURRENCY)
+
+
+async def _lean_route(route: Any) -> None:
+    request = route.request
+    if request.resource_type in BLOCKED_RESOURCE_TYPES or any(host in request.url for host in BLOCKED_HOSTS):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+class PlaywrightEngine:
+    """后台事件循环 + 单个 Chromium；线程安全地接受同步调用方提交的页面任务。"""
+
+    def __init__(self, headless: Optional[bool] = None) -> None:
+        if headless is None:
+            headless = headless_enabled()
+        self.headless = headless
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._playwright: Any = None
+        self._browser: Any = None
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    # ---- 事件循环 ----
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                ready = threading.Event()
+
+                def _run() -> None:
+                    asyncio.set_event_loop(loop)
+                    loop.call_soon(ready.set)
+                    loop.run_forever()
+
+                self._thread = threading.Thread(target=_run, name="playwright-loop", daemon=True)
+                self._thread.start()
+                ready.wait()
+                self._loop = loop
+            return self._loop
+
+    async def _ensure_browser(self) -> Any:
+        if self._browser is None:
+            from playwright.async_api import async_playwright
+
+            t0 = time.perf_counter()
+            self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(
+                headless=self.headless,
+                args=["--disable-blink-features=AutomationControlled"],
+            )
+            logger.info("playwright Chromium launched in %.3fs", time.perf_counter() - t0)
+        return self._browser
+
+    def _semaphore(self, site: str) -> asyncio.Semaphore:
+        sem = self._semaphores.get(site)
+        if sem is None:
+            sem = asyncio.Semaphore(site_concurrency(site))
+            self._semaphores[site] = sem
+        return sem
+
+    # ---- 页面任务 ----
+    async def _run_one(self, site: str, handler: Callable[[Any, T], Awaitable[R]], item: T, label: str) -> Optional[R]:
+        async with self._semaphore(site):
+            context: Any = None
+            t0 = time.perf_counter()
+            try:
+                # 上下文 / 页面创建失败同样只让本任务返回 None，不拖垮 gather 中的其他任务
+                context = await self._browser.new_context(viewport={"width": 1920, "height": 1080})
+                if lean_enabled():
+                    await context.route("**/*", _lean_route)
+                page = await context.new_page()
+                return await handler(page, item)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("playwright task %s on %s failed: %s", label, site, e)
+                return None
+            finally:
+                logger.info("playwright task %s on %s finished in %.3fs", label, site, time.perf_counter() - t0)
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        logger.warning("playwright context close for %s on %s failed: %s", label, site, e)
+
+    async def _gather(self, site: str, handler: Callable[[Any, T], Awaitable[R]], items: Sequence[T], labels: Sequence[str]) -> List[Optional[R]]:
+        # 先在单个协程里启动浏览器，避免并发任务各自启动一个
+        await self._ensure_browser()
+        return list(await asyncio.gather(*(self._run_one(site, handler, item, label) for item, label in zip(items, labels))))
+
+    def map_pages(
+        self,
+        site: str,
+        handler: Callable[[Any, T], Awaitable[R]],
+        items: Sequence[T],
+        *,
+        labels: Optional[Sequence[str]] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ) -> List[Optional[R]]:
+        """对每个 item 在新页面中并发执行 `await handler(page, item)`，按输入顺序返回结果。
+
+        单个任务失败时对应结果为 None；cancel_token 被取消时取消全部任务并抛出 CancelledError。
+        """
+
+        if not items:
+            return []
+        loop = self._ensure_loop()
+        names = list(labels) if labels is not None else [str(i) for i in range(len(items))]
+        future = asyncio.run_coroutine_threadsafe(self._gather(site, handler, items, names), loop)
+        while True:
+            try:
+                return future.result(timeout=0.2)
+            except FutureTimeoutError:
+                if cancel_token is not None and cancel_token.cancelled():
+                    future.cancel()
+                    raise CancelledError(f"playwright tasks on {site} cancelled")
+
+    def shutdown(self) -> None:
+        with self._lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+
+        async def _close() -> None:
+            if self._browser is not None:
+                await self._browser.close()
+            if self._playwright is not None:
+                await self._playwright.stop()
+            self._browser = None
+            self._playwright = None
+
+        try:
+            asyncio.run_coroutine_threadsafe(_close(), loop).result(timeout=30)
+        except Exception as e:
+            logger.warning("playwright shutdown failed: %s", e)
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self._semaphores.clear()
+
+
+_ENGINE: Optional[PlaywrightEngine] = None
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_playwright_engine() -> PlaywrightEngine:
+    global _ENGINE
+    with _ENGINE_LOCK:
+        if _ENGINE is None:
+            _ENGINE = PlaywrightEngine()
+        return _ENGINE
+
+
+def shutdown_playwright_engine() -> None:
+    """关闭浏览器与后台事件循环（运行结束时调用；进程退出时也会自动调用）。"""
+
+    global _ENGINE
+    with _ENGINE_LOCK:
+        engine, _ENGINE = _ENGINE, None
+    if engine is not None:
+        engine.shutdown()
+
+
+atexit.register(shutdown_playwright_engine)
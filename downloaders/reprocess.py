@@ -0,0 +1,149 @@
+"""离线重新解析：从原始归档（`downloaders.archive`）重建 data.db，不访问网络。
+
+- 每个 (source, series) 取最近一次归档的载荷；
+- 解析与 `_format_converter` 规范化在进程池中并行执行（借 `DatabaseConverter.frame_sink` 截获结果），
+  以紧凑数组回传；
+- 父进程串行写库，与 `worker_pool` 的单写线程模型一致。
+
+只有写入 Time_Series 的来源（BEA / BLS / FRED / TE）可以重建；DFM / NYF / CIN 的 xlsx/csv
+仅归档备查，它们的产物是 CSV 表格而非数据库中的序列。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, Iterable, List, Optional
+
+from downloaders.archive import ARCHIVE_FOLDER, RawArchive, load_blob
+
+logger = logging.getLogger(__name__)
+
+REPROCESSABLE_SOURCES = ("bea", "bls", "fred", "te")
+
+
+def _parse_payload(source: str, payload: bytes, meta: Dict[str, Any], kind: str = "") -> Any:
+    table_config: Dict[str, Any] = meta.get("table_config") or {}
+    if source == "fred":
+        from downloaders.fred import parse_fred_observations
+
+        return parse_fred_observations(json.loads(payload), table_config)
+    if source == "bls":
+        from downloaders.bls import parse_bls_response
+
+        return parse_bls_response(json.loads(payload), table_config, meta.get("data_name", ""))
+    if source == "bea":
+        from downloaders.bea import parse_bea_table
+
+        if kind != "json":
+            # 旧版归档为 pickle，不再反序列化；重新下载一次即可生成 JSON 归档
+            raise ValueError(f"unsupported BEA archive kind {kind or 'unknown'}; re-download to refresh the archive")
+        return parse_bea_table(json.loads(payload), table_config)
+    if source == "te":
+        from downloaders.te import parse_te_html, parse_te_series
+
+        if kind == "json":
+            return parse_te_series(json.loads(payload), meta["data_name"])
+        return parse_te_html(payload.decode("utf-8"), meta["data_name"])
+    raise ValueError(f"source {source} cannot be reprocessed")
+
+
+def _reprocess_one(row: Dict[str, Any], folder: str) -> Dict[str, Any]:
+    """子进程：读取归档、解析并规范化，返回可直接写库的紧凑帧。"""
+
+    from downloaders.common import DatabaseConverter
+    from worker_pool import pack_frame
+
+    meta = row["meta"]
+    frames: List[Dict[str, Any]] = []
+
+    def frame_sink(df: Any, data_name: str, **kwargs: Any) -> None:
+        frames.append({"data_name": data_name, **kwargs, **pack_frame(df, data_name)})
+        return None
+
+    out: Dict[str, Any] = {"source": row["source"], "series": row["series"], "ok": False, "frames": frames}
+    DatabaseConverter.frame_sink = frame_sink
+    try:
+        df = _parse_payload(row["source"], load_blob(row["sha256"], folder), meta, row.get("kind", ""))
+        if df is None or df.empty:
+            out["error"] = "parser returned no data"
+            return out
+        DatabaseConverter().write_into_db(
+            df=df,
+            data_name=meta["data_name"],
+            start_date=meta["start_date"],
+            is_time_series=True,
+            is_pct_data=bool(meta.get("is_pct_data", False)),
+        )
+        out["ok"] = bool(frames)
+        if not frames:
+            out["error"] = "reformat produced no frame"
+    except Exception as e:
+        out["error"] = str(e)
+    finally:
+        DatabaseConverter.frame_sink = None
+    return out
+
+
+def reprocess(sources: Optional[Iterable[str]] = None, max_workers: Optional[int] = None, folder: os.PathLike[str] | str = ARCHIVE_FOLDER) -> Dict[str, Any]:
+    """用归档重建数据库。
+
+    Returns:
+        摘要字典：series / succeeded / failed（[{source, series, error}]）/ rows / elapsed_seconds。
+    """
+
+    from downloaders.common import DatabaseConverter
+    from worker_pool import default_pool_size, unpack_frame
+
+    wanted = [s for s in (sources or REPROCESSABLE_SOURCES) if s in REPROCESSABLE_SOURCES]
+    t0 = time.perf_counter()
+    rows = RawArchive(folder).latest(wanted)
+    summary: Dict[str, Any] = {"series": len(rows), "succeeded": 0, "failed": [], "rows": 0}
+    if not rows:
+        logger.info("reprocess: archive has no payloads for %s", ", ".join(wanted))
+        summary["elapsed_seconds"] = round(time.perf_counter() - t0, 3)
+        return summary
+
+    workers = max(1, min(max_workers or default_pool_size(), len(rows)))
+    logger.info("reprocess: %d series from archive (workers=%d)", len(rows), workers)
+    converter = DatabaseConverter()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("spawn")) as ex:
+        futures = [ex.submit(_reprocess_one, row, os.fspath(folder)) for row in rows]
+        for fut in as_completed(futures):
+            try:
+                result = fut.result()
+            except Exception as e:
+                summary["failed"].append({"source": "?", "series": "?", "error": str(e)})
+                continue
+            if not result["ok"]:
+                summary["failed"].append({"source": result["source"], "series": result["series"], "error": result.get("error")})
+                logger.error("reprocess %s/%s failed: %s", result["source"], result["series"], result.get("error"))
+                continue
+            try:
+                for frame in result["frames"]:
+                    data_name = frame["data_name"]
+                    df = unpack_frame(frame, data_name)
+                    converter.write_into_db(
+                        df=df,
+                        data_name=data_name,
+                        start_date=frame["start_date"],
+                        is_time_series=True,
+                        is_pct_data=frame["is_pct_data"],
+                        overwrite_existing=frame["overwrite_existing"],
+                        only_fill_null=frame["only_fill_null"],
+                    )
+                    summary["rows"] += len(df)
+                summary["succeeded"] += 1
+            except Exception as e:
+                summary["failed"].append({"source": result["source"], "series": result["series"], "error": str(e)})
+                logger.error("reprocess write %s/%s failed: %s", result["source"], result["series"], e)
+    summary["elapsed_seconds"] = round(time.perf_counter() - t0, 3)
+    logger.info(
+        "reprocess finished: %d/%d series, %d rows in %.3fs",
+        summary["succeeded"], summary["series"], summary["rows"], summary["elapsed_seconds"],
+    )
+    return summary
@@ -0,0 +1,189 @@
+"""紧凑时间序列容器：int32 天数（自 1970-01-01 起）+ float64 数值，两个 NumPy 数组。
+
+大多数序列只有 20–2000 个点，逐个构造 DataFrame、copy、merge、assign、reindex 的固定开销
+远大于数据本身。`CompactSeries` 用 `__slots__` 只保存两个数组，常用变换都是向量化实现：
+
+- `pct_change()` / `ffill()` / `dropna()` / `dedup()` —— 与对应的 pandas 操作结果一致；
+- `align(start, end)` —— 展开为逐日稠密序列（与 `write_into_db` 原先 merge + ffill 的规则相同）；
+- `to_payload()` / `from_payload()` —— worker 进程经 Pipe 回传的紧凑帧（见 `worker_pool.pack_frame`）。
+
+FRED / YF 的解析直接产出 `CompactSeries`，`DatabaseConverter.write_into_db` 两种输入都接受；
+只有导出 CSV 等需要表格时才调用 `to_frame()`。模块本身只依赖 NumPy，pandas 按需导入。
+"""
+
+from __future__ import annotations
+
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Sequence, Union
+
+import numpy as np
+
+DayLike = Union[str, date, np.datetime64]
+
+
+def to_day(value: DayLike) -> int:
+    """日期 -> 自 1970-01-01 起的天数。"""
+
+    return int(np.datetime64(value, "D").astype(np.int64))
+
+
+def _to_float_array(values: Sequence[Any]) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        # FRED 用 "." 表示缺失值，其他无法转换的值同样记为 NaN
+        out = np.empty(len(values), dtype=np.float64)
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except (TypeError, ValueError):
+                out[i] = np.nan
+        return out
+
+
+def _ffill_values(values: np.ndarray) -> np.ndarray:
+    valid = ~np.isnan(values)
+    if valid.all() or not valid.any():
+        return values.copy()
+    idx = np.where(valid, np.arange(len(values)), 0)
+    np.maximum.accumulate(idx, out=idx)
+    out = values[idx]
+    out[: int(np.argmax(valid))] = np.nan  # 第一个有效值之前保持 NaN
+    return out
+
+
+class CompactSeries:
+    """一个序列：name + days(int32) + values(float64)，两个数组等长。"""
+
+    __slots__ = ("name", "days", "values")
+
+    def __init__(self, name: str, days: Any, values: Any) -> None:
+        self.name = name
+        self.days = np.asarray(days, dtype=np.int32)
+        self.values = np.asarray(values, dtype=np.float64)
+        if self.days.shape != self.values.shape:
+            raise ValueError(f"{name}: {len(self.days)} days but {len(self.values)} values")
+
+    @classmethod
+    def from_strings(cls, name: str, dates: Sequence[str], values: Sequence[Any]) -> "CompactSeries":
+        """ISO 日期字符串（YYYY-MM-DD）与原始数值（字符串或数字，无法转换的记为 NaN）。"""
+
+        days = np.asarray(dates, dtype="datetime64[D]").astype(np.int32)
+        return cls(name, days, _to_float_array(values))
+
+    @classmethod
+    def from_index(cls, name: str, index: Any, values: Any) -> "CompactSeries":
+        """DatetimeIndex（可带时区，按当地日期取天）与对应数值。"""
+
+        import pandas as pd
+
+        dates = pd.DatetimeIndex(index)
+        if dates.tz is not None:
+            dates = dates.tz_localize(None)
+        mask = ~dates.isna()
+        days = dates[mask].to_numpy(dtype="datetime64[D]").astype(np.int32)
+        return cls(name, days, _to_float_array(np.asarray(values))[mask])
+
+    @classmethod
+    def from_frame(cls, df: Any, name: str) -> "CompactSeries":
+        """规范化后的 (date, name) DataFrame；无法解析的日期被丢弃。"""
+
+        import pandas as pd
+
+        dates = pd.to_datetime(df["date"], errors="coerce")
+        mask = dates.notna().to_numpy(dtype=bool)
+        days = dates[mask].to_numpy(dtype="datetime64[D]").astype(np.int32)
+        values = pd.to_numeric(df[name], errors="coerce").to_numpy(dtype=np.float64)[mask]
+        return cls(name, days, values)
+
+    @classmethod
+    def from_payload(cls, name: str, payload: Dict[str, Any]) -> "CompactSeries":
+        return cls(name, payload["days"], payload["values"])
+
+    def to_payload(self) -> Dict[str, np.ndarray]:
+        return {"days": self.days, "values": self.values}
+
+    def date_strings(self) -> np.ndarray:
+        return np.datetime_as_string(self.days.astype("datetime64[D]"), unit="D")
+
+    def to_frame(self) -> Any:
+        """(date, name) 两列的 DataFrame，date 为 YYYY-MM-DD 字符串。"""
+
+        import pandas as pd
+
+        return pd.DataFrame({"date": self.date_strings(), self.name: self.values})
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def __repr__(self) -> str:
+        return f"CompactSeries({self.name!r}, {len(self)} points)"
+
+    @property
+    def empty(self) -> bool:
+        return len(self.days) == 0
+
+    def rename(self, name: str) -> "CompactSeries":
+        return CompactSeries(name, self.days, self.values)
+
+    def dropna(self) -> "CompactSeries":
+        mask = ~np.isnan(self.values)
+        return CompactSeries(self.name, self.days[mask], self.values[mask])
+
+    def ffill(self) -> "CompactSeries":
+        return CompactSeries(self.name, self.days, _ffill_values(self.values))
+
+    def pct_change(self) -> "CompactSeries":
+        """与 pandas `pct_change()` 相同：先向前填充缺失值，再计算相邻变化率，首个点为 NaN。"""
+
+        filled = _ffill_values(self.values)
+        out = np.full(len(filled), np.nan)
+        if len(filled) > 1:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                out[1:] = filled[1:] / filled[:-1] - 1.0
+        return CompactSeries(self.name, self.days, out)
+
+    def dedup(self) -> "CompactSeries":
+        """按日期排序，同一天出现多次时保留最后一个值。"""
+
+        if len(self.days) < 2:
+            return self
+        order = np.argsort(self.days, kind="stable")
+        days = self.days[order]
+        values = self.values[order]
+        keep = np.ones(len(days), dtype=bool)
+        keep[:-1] = days[1:] != days[:-1]
+        return CompactSeries(self.name, days[keep], values[keep])
+
+    def align(self, start: DayLike, end: DayLike) -> "CompactSeries":
+        """展开为 [start, end] 的逐日序列：落在范围内的观测值就位后向前填充，
+        第一个有效值之前的日期用该值回填；范围外的观测值被忽略。"""
+
+        first_day, last_day = to_day(start), to_day(end)
+        n = max(0, last_day - first_day + 1)
+        out = np.full(n, np.nan)
+        series = self.dedup()
+        sel = (series.days >= first_day) & (series.days <= last_day)
+        out[series.days[sel] - first_day] = series.values[sel]
+        valid = ~np.isnan(out)
+        if valid.any():
+            first_valid = int(np.argmax(valid))
+            out[:first_valid] = out[first_valid]
+            out = _ffill_values(out)
+        return CompactSeries(self.name, np.arange(first_day, first_day + n, dtype=np.int32), out)
+
+
+def align_many(series: Iterable[CompactSeries], start: DayLike, end: DayLike) -> Dict[str, np.ndarray]:
+    """把多个序列对齐到同一逐日日期轴，返回 {"date": 日期字符串, 名称: 数值, ...}。"""
+
+    out: Dict[str, np.ndarray] = {}
+    axis: Optional[CompactSeries] = None
+    for s in series:
+        aligned = s.align(start, end)
+        if axis is None:
+            axis = aligned
+            out["date"] = aligned.date_strings()
+        out[s.name] = aligned.values
+    if axis is None:
+        out["date"] = CompactSeries("", [], []).align(start, end).date_strings()
+    return out
@@ -0,0 +1,145 @@
+"""工作簿解析缓存：一次读取所需的全部 sheet，并按文件内容哈希缓存解析结果。
+
+NYF 的 HHD 报告是一个较大的 xlsx，以前每个表各调用一次 `pd.read_excel`，整本工作簿被解析 5 次。
+`read_sheets()` 用 `sheet_name=[...]` 一次读出所有需要的 sheet，结果以 pickle（HIGHEST_PROTOCOL）
+保存在 `cache/sheets/` 下，键为「文件 SHA-256 + sheet 列表」。同一份文件再次处理时（重复运行、
+输出 csv 被删除后重建等）直接加载二进制结果，完全跳过 Excel 解析。
+
+每个 label 只保留最新一份缓存；`SHEET_CACHE=false` 关闭缓存（仍然只解析一次工作簿）。
+
+`stream_sheet()` 用 openpyxl 只读模式逐行读取单个 sheet，读取时就只保留需要的列与行范围，
+不为整张表构建完整的 DataFrame（DFM 的 index 文件用它代替 `pd.read_excel` + drop + 切片）。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import pickle
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import openpyxl
+import pandas as pd
+
+from downloaders.common import CACHE_FOLDER
+from downloaders.file_fetch import _sha256_file
+
+logger = logging.getLogger(__name__)
+
+SHEET_CACHE_FOLDER = CACHE_FOLDER / "sheets"
+
+
+def sheet_cache_enabled() -> bool:
+    return os.environ.get("SHEET_CACHE", "true").strip().lower() not in ("0", "false", "no")
+
+
+def _cache_path(label: str, sha256: str, sheets: Sequence[str]) -> Path:
+    sheets_key = hashlib.sha1("\x00".join(sheets).encode("utf-8")).hexdigest()[:8]
+    return SHEET_CACHE_FOLDER / f"{label}-{sha256[:16]}-{sheets_key}.pkl"
+
+
+def _load(path: Path) -> Optional[Dict[str, pd.DataFrame]]:
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning("Ignoring unreadable sheet cache %s: %s", path, e)
+        return None
+
+
+def _store(label: str, path: Path, sheets: Dict[str, pd.DataFrame]) -> None:
+    try:
+        SHEET_CACHE_FOLDER.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".pkl.part")
+        with open(tmp, "wb") as f:
+            pickle.dump(sheets, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        # 同一 label 只保留最新的一份
+        for old in SHEET_CACHE_FOLDER.glob(f"{label}-*.pkl"):
+            if old != path:
+                old.unlink(missing_ok=True)
+    except OSError as e:
+        logger.warning("Failed to write sheet cache %s: %s", path, e)
+
+
+def read_sheets(
+    path: os.PathLike[str] | str,
+    sheets: Sequence[str],
+    label: str,
+    sha256: Optional[str] = None,
+) -> Dict[str, pd.DataFrame]:
+    """一次读出工作簿中的 sheets，返回 {sheet 名: df}；sha256 为文件内容哈希（已知时传入可省去一次计算）。"""
+
+    sheets = list(dict.fromkeys(sheets))
+    if not sheet_cache_enabled():
+        return pd.read_excel(path, sheet_name=sheets)
+
+    cache_path = _cache_path(label, sha256 or _sha256_file(path), sheets)
+    cached = _load(cache_path)
+    if cached is not None and all(s in cached for s in sheets):
+        logger.info("%s: loaded %d sheets from cache", label, len(sheets))
+        return cached
+
+    t0 = time.perf_counter()
+    parsed = pd.read_excel(path, sheet_name=sheets)
+    logger.info("%s: parsed %d sheets in %.2fs", label, len(sheets), time.perf_counter() - t0)
+    _store(label, cache_path, parsed)
+    return parsed
+
+
+def _blank(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def stream_sheet(
+    path: os.PathLike[str] | str,
+    sheet: str,
+    drop: Iterable[str] = (),
+    start_row: int = 0,
+    trim_blank_tail: bool = True,
+) -> pd.DataFrame:
+    """只读流式读取一个 sheet：首行为表头，去掉 drop 中的列与表头为空的列，跳过前 start_row 个数据行。
+
+    trim_blank_tail 为 True 时去掉末尾「除第一列外全部为空」的行（如只有日期、尚无数值的未来月份）。
+    返回的 df 索引为数据行号（与 `pd.read_excel` 读取整表后再切片的索引一致）。
+    """
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb[sheet].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return pd.DataFrame()
+        dropped = set(drop)
+        names = ["" if h is None else str(h) for h in header]
+        keep = [i for i, name in enumerate(names) if name.strip() and name not in dropped]
+
+        data: List[List[Any]] = []
+        index: List[int] = []
+        pending: List[List[Any]] = []  # 连续的空行，后面再出现数据时才计入
+        pending_index: List[int] = []
+        for n, row in enumerate(rows):
+            if n < start_row:
+                continue
+            values = [row[i] if i < len(row) else None for i in keep]
+            if trim_blank_tail and all(_blank(v) for v in values[1:]):
+                pending.append(values)
+                pending_index.append(n)
+                continue
+            if pending:
+                data.extend(pending)
+                index.extend(pending_index)
+                pending, pending_index = [], []
+            data.append(values)
+            index.append(n)
+        if not trim_blank_tail:
+            data.extend(pending)
+            index.extend(pending_index)
+    finally:
+        wb.close()
+    return pd.DataFrame(data, columns=[names[i] for i in keep], index=index)
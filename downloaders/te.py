@@ -4,44 +4,191 @@
 
 from __future__ import annotations
 
+import json
 import logging
 import os
-import random
 import time
 from datetime import datetime
+from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import pandas as pd
-from bs4 import BeautifulSoup
-from bs4.element import Tag
 from dateutil.relativedelta import relativedelta
-from selenium import webdriver
 from selenium.common.exceptions import (
     ElementClickInterceptedException,
     NoSuchElementException,
     StaleElementReferenceException,
-    TimeoutException,
 )
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
 
+from downloaders.archive import archive_raw
+from downloaders.browser import lease_driver
 from downloaders.common import (
-    CSV_DATA_FOLDER,
     CancelledError,
     CancellationToken,
     DatabaseConverter,
     DataDownloader,
 )
+from downloaders.csv_export import export_store_csv
+from downloaders.htmlparse import has_class, parse_html, xpath_nodes, xpath_strings
+from downloaders.playwright_engine import get_playwright_engine, playwright_enabled
+from downloaders.waits import CHART_READY_JS, PageWaiter, WaitTimeout
 
 logger = logging.getLogger(__name__)
 
+# 柱状图切换后，连续两次轮询柱体数量一致（且不少于两根）才视为重绘完成
+_BARS_READY_JS = (
+    "var n = document.querySelectorAll('rect.highcharts-point').length;"
+    "var prev = window.__teBarCount; window.__teBarCount = n;"
+    "return n >= 2 && prev === n;"
+)
+
+# 一次 execute_script 读取页面中点数最多的 Highcharts 序列（跳过导航器等内部序列）；
+# xData / yData 为完整数据，不受当前缩放区间裁剪
+_SERIES_STATE_JS = (
+    "var charts = (window.Highcharts && Highcharts.charts) || []; var best = null;"
+    "charts.forEach(function (c) {"
+    "  if (!c || !c.series) { return; }"
+    "  c.series.forEach(function (s) {"
+    "    if (!s || (s.options && s.options.isInternal) || /navigator/i.test(s.name || '')) { return; }"
+    "    var xs = s.xData || [], ys = s.yData || [];"
+    "    if (!xs.length && s.points) {"
+    "      xs = s.points.map(function (p) { return p.x; }); ys = s.points.map(function (p) { return p.y; });"
+    "    }"
+    "    if (xs.length && (!best || xs.length > best.x.length)) {"
+    "      best = {name: s.name || '', x: Array.prototype.slice.call(xs), y: Array.prototype.slice.call(ys)};"
+    "    }"
+    "  });"
+    "});"
+    "return best;"
+)
+
+# 与柱高换算结果保持一致：最近 61 个月
+_TE_MONTHS = 61
+
+
+def js_state_enabled() -> bool:
+    """TE_EXTRACT_MODE=js（默认）时优先读取图表 JS 数据；bars 则始终使用柱高换算。"""
+
+    return os.environ.get("TE_EXTRACT_MODE", "js").strip().lower() != "bars"
+
+
+def parse_te_series(series: Optional[Dict[str, Any]], data_name: str) -> Optional[pd.DataFrame]:
+    """把 `_SERIES_STATE_JS` 返回的 {x: 毫秒时间戳, y: 数值} 转为与 `parse_te_html` 相同的月度表。
+
+    数值取自图表数据本身，不经过线性换算；同一月份多个点时保留最后一个。
+    """
+
+    try:
+        if not series:
+            raise Exception(f"{data_name}, chart series state is empty")
+        xs = list(series.get("x") or [])
+        ys = list(series.get("y") or [])
+        if len(xs) != len(ys) or len(xs) < 2:
+            raise Exception(f"{data_name}, chart series has {len(xs)} x / {len(ys)} y points")
+        frame = pd.DataFrame(
+            {
+                "date": pd.to_datetime(pd.Series(xs, dtype="float64"), unit="ms", utc=True).dt.strftime("%b_%Y"),
+                "value": pd.to_numeric(pd.Series(ys), errors="coerce"),
+            }
+        ).dropna()
+        frame = frame.drop_duplicates(subset="date", keep="last").tail(_TE_MONTHS)
+        if len(frame) < 2:
+            raise Exception(f"{data_name}, chart series has no usable points")
+        return frame.reset_index(drop=True)
+    except Exception as e:
+        logger.error("%s FAILED TO EXTRACT data from chart state, %s", data_name, e)
+        return None
+
+
+def _calc_function(x1: float, x2: float, y1: float, y2: float) -> Tuple[float, float]:
+    gradient = round((y1 - y2) / (x1 - x2), 3)
+    intercept = round((y1 - gradient * x1), 3)
+    return float(gradient), float(intercept)
+
+
+def parse_te_html(original_html: str, data_name: str) -> Optional[pd.DataFrame]:
+    """从 TE 页面 HTML 解析最近 5 年月度序列（数据表最新两期 + Highcharts 柱高线性换算）。
+
+    不访问网络，在线抓取与 `downloaders.reprocess` 离线重建共用。
+    """
+
+    try:
+        # 只取最新数据行与柱体高度，lxml 解析后直接 XPath，不构建 BeautifulSoup 树
+        tree = parse_html(original_html)
+        rows = xpath_nodes(tree, f"//tr{has_class('datatable-row')}")
+        if rows:
+            tds = xpath_strings(rows[0], "./td")
+            if len(tds) >= 2:
+                current_num = float(tds[1])
+                previous_num = float(tds[2])
+                current_data_date = tds[4].replace(" ", "_")
+            else:
+                raise Exception(
+                    f"{data_name}, tds tag's length haven't reach 2, during html convert stage"
+                )
+        else:
+            raise Exception(
+                f"{data_name}, HAVEN'T FOUND ROWS during html convert stage"
+            )
+
+        heights: List[float] = []
+        for h in xpath_strings(tree, f"//rect{has_class('highcharts-point')}/@height"):
+            try:
+                heights.append(float(h))
+            except Exception:
+                continue
+
+        gradient, intercept = _calc_function(
+            heights[-1], heights[-2], current_num, previous_num
+        )
+        data_list = [intercept + gradient * num for num in heights]
+
+        month_map = {
+            "Jan": 1,
+            "Feb": 2,
+            "Mar": 3,
+            "Apr": 4,
+            "May": 5,
+            "Jun": 6,
+            "Jul": 7,
+            "Aug": 8,
+            "Sep": 9,
+            "Oct": 10,
+            "Nov": 11,
+            "Dec": 12,
+        }
+        month_abbr, year_str = current_data_date.split("_")
+        month_int: int = month_map[month_abbr]
+        year_int: int = int(year_str)
+        end_date = datetime(year_int, month_int, 1)
+        months_list = [
+            (end_date - relativedelta(months=i)).strftime("%b_%Y")
+            for i in reversed(range(61))
+        ]
+        df = pd.DataFrame(data={"date": months_list, "value": data_list})
+        return df
+    except Exception as e:
+        logger.error("%s FAILED TO EXTRACT data from html, %s", data_name, e)
+        return None
+
+
+def _parse_fetched(kind: str, payload: Any, data_name: str, archive_meta: Optional[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+    """归档并解析一页抓取结果：kind 为 json（图表序列）或 html（柱高换算）。"""
+
+    if kind == "json":
+        if archive_meta is not None:
+            archive_raw("te", data_name, json.dumps(payload).encode("utf-8"), "json", archive_meta)
+        return parse_te_series(payload, data_name)
+    if archive_meta is not None:
+        archive_raw("te", data_name, payload.encode("utf-8"), "html", archive_meta)
+    return parse_te_html(payload, data_name)
+
 
 class TEDownloader(DataDownloader):
     url: str = "https://tradingeconomics.com/united-states/"
-    time_pause: float = random.uniform(1, 1.3)
     time_wait: int = 10
+    page_budget: float = 30.0  # 单页所有条件等待的总超时（秒）
 
     def __init__(
         self, json_dict: Dict[str, Dict[str, Any]], api_key: str, request_year: int
@@ -49,167 +196,200 @@ class TEDownloader(DataDownloader):
         self.json_dict: Dict[str, Dict[str, Any]] = json_dict
         self.start_year: int = request_year
         self.start_date: str = f"{request_year}-01-01"
-        options = Options()
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        self.driver = webdriver.Chrome(options=options)
-        self.driver.maximize_window()
-
-    def _calc_function(
-        self, x1: float, x2: float, y1: float, y2: float
-    ) -> Tuple[float, float]:
-        gradient = round((y1 - y2) / (x1 - x2), 3)
-        intercept = round((y1 - gradient * x1), 3)
-        return float(gradient), float(intercept)
+        # 浏览器从共享驱动池中按需借出，构造时不启动 Chrome
+        self.driver = lease_driver(profile="lean")
 
     def _get_data_from_trading_economics_month(
         self,
         data_name: str,
         check_cancel: Optional[Callable[[], None]] = None,
+        archive_meta: Optional[Dict[str, Any]] = None,
     ) -> Optional[pd.DataFrame]:
         if check_cancel is not None:
             check_cancel()
         url = self.url + data_name.replace("_", "-")
         self.driver.get(url)
-        if check_cancel is not None:
-            check_cancel()
-        time.sleep(TEDownloader.time_pause)
+        # 每一步等待具体条件（按钮可点击 / 图表数据就绪），整页共享 page_budget 秒的超时预算
+        waiter = PageWaiter(self.driver, TEDownloader.page_budget, f"TE {data_name}", check_cancel)
+
+        if js_state_enabled():
+            series = self._read_series_state(waiter, data_name)
+            if series is not None:
+                waiter.report()
+                return _parse_fetched("json", series, data_name, archive_meta)
+            logger.info("%s chart JS state unavailable, falling back to bar heights", data_name)
 
         try:
-            if check_cancel is not None:
-                check_cancel()
-            five_year_button = WebDriverWait(self.driver, TEDownloader.time_wait).until(
-                EC.element_to_be_clickable((By.XPATH, '//*[@id="dateSpansDiv"]/a[3]'))
-            )
+            five_year_button = waiter.clickable((By.XPATH, '//*[@id="dateSpansDiv"]/a[3]'), "5y button")
             self.driver.execute_script("arguments[0].click();", five_year_button)
-            time.sleep(TEDownloader.time_pause)
+            waiter.chart_ready("5y chart")
         except (
-            TimeoutException,
+            WaitTimeout,
             ElementClickInterceptedException,
             NoSuchElementException,
             StaleElementReferenceException,
         ) as e:
             logger.error("%s FAILED TO CLICK 5y button, %s", data_name, e)
+            waiter.report()
             return None
 
         try:
-            if check_cancel is not None:
-                check_cancel()
-            chart_type_button = WebDriverWait(
-                self.driver, TEDownloader.time_wait
-            ).until(
-                EC.element_to_be_clickable(
-                    (By.XPATH, '//*[@id="chart"]/div/div/div[1]/div/div[3]/div/button')
-                )
+            chart_type_button = waiter.clickable(
+                (By.XPATH, '//*[@id="chart"]/div/div/div[1]/div/div[3]/div/button'), "chart type button"
             )
             self.driver.execute_script("arguments[0].click();", chart_type_button)
-            time.sleep(TEDownloader.time_pause)
-            if check_cancel is not None:
-                check_cancel()
-            chart_button = WebDriverWait(self.driver, TEDownloader.time_wait).until(
-                EC.element_to_be_clickable(
-                    (
-                        By.XPATH,
-                        '//*[@id="chart"]/div/div/div[1]/div/div[3]/div/div/div[1]/button',
-                    )
-                )
+            chart_button = waiter.clickable(
+                (By.XPATH, '//*[@id="chart"]/div/div/div[1]/div/div[3]/div/div/div[1]/button'), "chart button"
             )
             self.driver.execute_script("arguments[0].click();", chart_button)
-            time.sleep(TEDownloader.time_wait)
+            # 柱状图重绘完成：柱体数量稳定且不少于两根
+            waiter.js(_BARS_READY_JS, "bar chart")
         except (
-            TimeoutException,
+            WaitTimeout,
             ElementClickInterceptedException,
             NoSuchElementException,
             StaleElementReferenceException,
         ) as e:
             logger.error("%s FAILED TO CLICK chart buttons, %s", data_name, e)
+            waiter.report()
             return None
+        waiter.report()
 
+        if check_cancel is not None:
+            check_cancel()
         try:
-            if check_cancel is not None:
-                check_cancel()
             original_html = self.driver.page_source
-            soup = BeautifulSoup(original_html, "lxml")
-            row = soup.find("tr", class_="datatable-row")
-            if isinstance(row, Tag):
-                tds = row.find_all("td")
-                if len(tds) >= 2:
-                    current_num = float(tds[1].text.strip())
-                    previous_num = float(tds[2].text.strip())
-                    current_data_date = str(tds[4].text.replace(" ", "_"))
-                else:
-                    raise Exception(
-                        f"{data_name}, tds tag's length haven't reach 2, during html convert stage"
-                    )
-            else:
-                raise Exception(
-                    f"{data_name}, HAVEN'T FOUND ROWS during html convert stage"
-                )
-
-            rects = soup.find_all("rect", class_="highcharts-point")
-            heights: List[float] = []
-            for rect in rects:
-                if isinstance(rect, Tag):
-                    h = rect.get("height")
-                    if h is not None:
-                        try:
-                            heights.append(float(str(h)))
-                        except Exception:
-                            continue
-
-            gradient, intercept = self._calc_function(
-                heights[-1], heights[-2], current_num, previous_num
-            )
-            data_list = [intercept + gradient * num for num in heights]
-
-            month_map = {
-                "Jan": 1,
-                "Feb": 2,
-                "Mar": 3,
-                "Apr": 4,
-                "May": 5,
-                "Jun": 6,
-                "Jul": 7,
-                "Aug": 8,
-                "Sep": 9,
-                "Oct": 10,
-                "Nov": 11,
-                "Dec": 12,
-            }
-            month_abbr, year_str = current_data_date.split("_")
-            month_int: int = month_map[month_abbr]
-            year_int: int = int(year_str)
-            end_date = datetime(year_int, month_int, 1)
-            months_list = [
-                (end_date - relativedelta(months=i)).strftime("%b_%Y")
-                for i in reversed(range(61))
-            ]
-            df = pd.DataFrame(data={"date": months_list, "value": data_list})
-            return df
         except Exception as e:
             logger.error("%s FAILED TO EXTRACT data from html, %s", data_name, e)
             return None
+        return _parse_fetched("html", original_html, data_name, archive_meta)
+
+    def _read_series_state(self, waiter: PageWaiter, data_name: str) -> Optional[Dict[str, Any]]:
+        """等图表就绪后直接读取序列数据；默认区间不足 61 个月时只点一次 5 年按钮再读。"""
+
+        def _series(d: Any) -> Optional[Dict[str, Any]]:
+            state = d.execute_script(_SERIES_STATE_JS)
+            return state if state and len(state.get("x") or []) >= 2 else None
+
+        try:
+            state = waiter.until(_series, "chart state", timeout=TEDownloader.time_wait, raise_on_timeout=False)
+            if state is not None and len(state["x"]) >= _TE_MONTHS:
+                return state
+            five_year_button = waiter.clickable((By.XPATH, '//*[@id="dateSpansDiv"]/a[3]'), "5y button")
+            self.driver.execute_script("arguments[0].click();", five_year_button)
+            waiter.chart_ready("5y chart")
+            return waiter.until(_series, "5y chart state", timeout=TEDownloader.time_wait, raise_on_timeout=False) or state
+        except (
+            WaitTimeout,
+            ElementClickInterceptedException,
+            NoSuchElementException,
+            StaleElementReferenceException,
+        ) as e:
+            logger.warning("%s could not read chart JS state, %s", data_name, e)
+            return None
+
+    async def _read_series_state_async(self, page: Any, data_name: str, timeout_ms: int) -> Optional[Dict[str, Any]]:
+        """Playwright 版本的 `_read_series_state`。"""
+
+        expr = f"() => {{ {_SERIES_STATE_JS} }}"
+        try:
+            await page.wait_for_function(f"() => {{ {CHART_READY_JS} }}", polling=100, timeout=timeout_ms)
+            state = await page.evaluate(expr)
+            if state and len(state.get("x") or []) >= _TE_MONTHS:
+                return state
+            button = page.locator('xpath=//*[@id="dateSpansDiv"]/a[3]')
+            await button.wait_for(state="visible", timeout=timeout_ms)
+            await button.evaluate("el => el.click()")
+            await page.wait_for_function(f"() => {{ {CHART_READY_JS} }}", polling=100, timeout=timeout_ms)
+            return (await page.evaluate(expr)) or state
+        except Exception as e:
+            logger.warning("%s could not read chart JS state, %s", data_name, e)
+            return None
+
+    async def _fetch_page_async(self, page: Any, data_name: str) -> Optional[Tuple[str, Any]]:
+        """Playwright 版本的页面交互：优先返回 ("json", 图表序列)，否则切换 5 年区间与柱状图后返回 ("html", 页面 HTML)。"""
+
+        await page.goto(self.url + data_name.replace("_", "-"), wait_until="domcontentloaded")
+        timeout_ms = TEDownloader.time_wait * 1000
+        if js_state_enabled():
+            series = await self._read_series_state_async(page, data_name, timeout_ms)
+            if series is not None and len(series.get("x") or []) >= 2:
+                return "json", series
+            logger.info("%s chart JS state unavailable, falling back to bar heights", data_name)
+        for step, xpath, ready_js in (
+            ("5y button", '//*[@id="dateSpansDiv"]/a[3]', CHART_READY_JS),
+            ("chart type button", '//*[@id="chart"]/div/div/div[1]/div/div[3]/div/button', None),
+            ("chart button", '//*[@id="chart"]/div/div/div[1]/div/div[3]/div/div/div[1]/button', _BARS_READY_JS),
+        ):
+            t0 = time.perf_counter()
+            try:
+                button = page.locator(f"xpath={xpath}")
+                await button.wait_for(state="visible", timeout=timeout_ms)
+                await button.evaluate("el => el.click()")
+                if ready_js is not None:
+                    # 谓词是 execute_script 的函数体形式，包成箭头函数交给 wait_for_function
+                    await page.wait_for_function(
+                        f"() => {{ {ready_js} }}", polling=100, timeout=timeout_ms
+                    )
+            except Exception as e:
+                logger.error("%s FAILED TO CLICK %s, %s", data_name, step, e)
+                return None
+            logger.debug("TE %s %s ready in %.2fs", data_name, step, time.perf_counter() - t0)
+        return "html", await page.content()
+
+    def _scrape_concurrently(self, token: Optional[CancellationToken]) -> Dict[str, Optional[pd.DataFrame]]:
+        """所有指标页面在一个 Chromium 中并发抓取，解析在调用线程中完成。"""
+
+        names = [cfg["name"] for cfg in self.json_dict.values()]
+        fetched = get_playwright_engine().map_pages(
+            "tradingeconomics.com", self._fetch_page_async, names, labels=names, cancel_token=token
+        )
+        out: Dict[str, Optional[pd.DataFrame]] = {}
+        for (table_name, table_config), result in zip(self.json_dict.items(), fetched):
+            if result is None:
+                out[table_name] = None
+                continue
+            kind, payload = result
+            out[table_name] = _parse_fetched(kind, payload, table_config["name"], self._archive_meta(table_config))
+        return out
+
+    def _archive_meta(self, table_config: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "data_name": table_config["name"],
+            "start_date": self.start_date,
+            "is_pct_data": table_config["needs_pct"],
+            "table_config": table_config,
+        }
 
     def to_db(
         self,
         return_csv: bool = False,
         max_workers: Optional[int] = None,
         cancel_token: Optional[CancellationToken] = None,
-    ) -> Optional[Dict[str, pd.DataFrame]]:
-        df_dict: Dict[str, pd.DataFrame] = {}
+    ) -> Optional[Dict[str, Path]]:
+        """返回 return_csv 时为 {配置名: CSV 路径}；与 API 下载器相同，CSV 在写库后从数据库流式导出。"""
+        written: Dict[str, str] = {}
         token = cancel_token
 
         def _check_cancel() -> None:
             if token is not None:
                 token.raise_if_cancelled()
 
+        self.driver.cancel_token = token
+        # PLAYWRIGHT_SOURCES 包含 te 时并发抓取全部页面，否则逐页使用 Selenium
+        prefetched = self._scrape_concurrently(token) if playwright_enabled("te") else None
         try:
             for table_name, table_config in self.json_dict.items():
                 _check_cancel()
                 data_name = table_config["name"]
-                df = self._get_data_from_trading_economics_month(
-                    data_name=data_name,
-                    check_cancel=_check_cancel
-                )
+                if prefetched is not None:
+                    df = prefetched.pop(table_name, None)
+                else:
+                    df = self._get_data_from_trading_economics_month(
+                        data_name=data_name,
+                        check_cancel=_check_cancel,
+                        archive_meta=self._archive_meta(table_config),
+                    )
                 if df is None:
                     logger.error(
                         "FAILED TO EXTRACT %s, check PREVIOUS loggings", table_name
@@ -217,15 +397,17 @@ class TEDownloader(DataDownloader):
                     continue
                 converter = DatabaseConverter()
                 _check_cancel()
-                converter.write_into_db(
+                final_result = converter.write_into_db(
                     df=df,
-                    data_name=table_config["name"],
+                    data_name=data_name,
                     start_date=self.start_date,
                     is_time_series=True,
                     is_pct_data=table_config["needs_pct"],
                 )
                 _check_cancel()
-                df_dict[table_name] = df
+                # 只记录已写库的序列名，月度帧不保留到运行结束
+                if final_result is not None:
+                    written[table_name] = data_name
         except CancelledError:
             raise
         finally:
@@ -234,19 +416,9 @@ class TEDownloader(DataDownloader):
             except Exception:
                 pass
 
-        if return_csv and df_dict:
-            _check_cancel()
-            for name, df in df_dict.items():
-                try:
-                    data_folder_path = os.path.join(os.fspath(CSV_DATA_FOLDER), name)
-                    os.makedirs(data_folder_path, exist_ok=True)
-                    csv_path = os.path.join(data_folder_path, f"{name}.csv")
-                    df.to_csv(csv_path, index=True)
-                    logger.info("%s saved to %s Successfully!", name, csv_path)
-                except Exception as err:
-                    logger.error(
-                        "%s FAILED DOWNLOAD CSV in method 'to_db', since %s", name, err
-                    )
-                    continue
-
-        return df_dict if return_csv else None
+        if not return_csv:
+            return None
+        if not written:
+            return {}
+        _check_cancel()
+        return export_store_csv(written.items(), self.start_date, wide_name="te")
@@ -0,0 +1,170 @@
+"""浏览器抓取的条件等待工具，替代固定 `time.sleep`。
+
+`PageWaiter` 绑定一个驱动与单页超时预算（秒），每一步都等待具体条件而不是最坏情况的常量：
+
+- `element()` / `clickable()`     —— DOM 选择器出现 / 可点击；
+- `js()`                           —— 任意 JS 谓词为真（例如 `CHART_READY_JS`：Highcharts 序列已有数据点）；
+- `network_idle()`                 —— 一段静默期内没有新的资源请求完成；
+- `stale()` / `text_changed()`     —— 点击后旧元素被替换 / 元素文本变化。
+
+每一步的耗时记录在 `waiter.timings` 中，页面结束时 `waiter.report()` 输出日志并累计到进程级统计
+（`wait_stats()`）。整页预算耗尽后，后续步骤只剩最短超时，避免单页卡住整个下载器。
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Highcharts 图表已渲染且至少有一个序列带数据点
+CHART_READY_JS = (
+    "return !!(window.Highcharts && Highcharts.charts && Highcharts.charts.some("
+    "function (c) { return c && c.series && c.series.some(function (s) { return s.points && s.points.length > 0; }); }))"
+)
+
+# 已完成的资源请求数（配合 network_idle 判断静默期）
+_RESOURCE_COUNT_JS = "return performance.getEntriesByType('resource').length"
+
+_MIN_STEP_TIMEOUT = 0.5
+_POLL = 0.1
+
+_STATS: Dict[str, Dict[str, float]] = {}
+_STATS_LOCK = threading.Lock()
+
+
+def _record(label: str, step: str, seconds: float, ok: bool) -> None:
+    key = f"{label}:{step}"
+    with _STATS_LOCK:
+        s = _STATS.setdefault(key, {"count": 0, "timeouts": 0, "total": 0.0, "max": 0.0})
+        s["count"] += 1
+        s["timeouts"] += 0 if ok else 1
+        s["total"] += seconds
+        s["max"] = max(s["max"], seconds)
+
+
+def wait_stats() -> Dict[str, Dict[str, float]]:
+    """进程内各 (页面标签:步骤) 的等待次数、超时次数、总耗时与最大耗时（秒）。"""
+
+    with _STATS_LOCK:
+        return {k: {**v, "total": round(v["total"], 3), "max": round(v["max"], 3)} for k, v in _STATS.items()}
+
+
+def reset_wait_stats() -> None:
+    with _STATS_LOCK:
+        _STATS.clear()
+
+
+class WaitTimeout(Exception):
+    """条件在超时内未满足。"""
+
+
+class PageWaiter:
+    """单页条件等待器：共享一个超时预算，并记录每一步的等待耗时。"""
+
+    def __init__(
+        self,
+        driver: Any,
+        budget: float = 30.0,
+        label: str = "page",
+        check_cancel: Optional[Callable[[], None]] = None,
+    ) -> None:
+        self.driver = driver
+        self.budget = float(budget)
+        self.label = label
+        self.check_cancel = check_cancel
+        self.started = time.monotonic()
+        self.timings: List[Tuple[str, float, bool]] = []
+
+    def remaining(self) -> float:
+        return max(0.0, self.budget - (time.monotonic() - self.started))
+
+    def _timeout(self, timeout: Optional[float]) -> float:
+        left = self.remaining()
+        t = left if timeout is None else min(timeout, left)
+        return max(t, _MIN_STEP_TIMEOUT)
+
+    def until(self, condition: Callable[[Any], Any], step: str, timeout: Optional[float] = None, raise_on_timeout: bool = True) -> Any:
+        """轮询 condition(driver) 直到返回真值；超时抛出 WaitTimeout（或返回 None）。"""
+
+        deadline = time.monotonic() + self._timeout(timeout)
+        t0 = time.monotonic()
+        last_exc: Optional[Exception] = None
+        while True:
+            if self.check_cancel is not None:
+                self.check_cancel()
+            try:
+                value = condition(self.driver)
+                if value:
+                    self._done(step, time.monotonic() - t0, True)
+                    return value
+            except Exception as e:  # 元素暂不可用 / 已失效时继续轮询
+                last_exc = e
+            if time.monotonic() >= deadline:
+                self._done(step, time.monotonic() - t0, False)
+                if raise_on_timeout:
+                    raise WaitTimeout(f"{self.label}: {step} not satisfied within {deadline - t0:.1f}s ({last_exc or 'condition false'})")
+                return None
+            time.sleep(_POLL)
+
+    def _done(self, step: str, seconds: float, ok: bool) -> None:
+        self.timings.append((step, seconds, ok))
+        _record(self.label, step, seconds, ok)
+
+    # ---- 常用条件 ----
+    def element(self, locator: Tuple[str, str], step: str = "element", timeout: Optional[float] = None) -> Any:
+        from selenium.webdriver.support import expected_conditions as EC
+
+        return self.until(EC.presence_of_element_located(locator), step, timeout)
+
+    def clickable(self, locator: Tuple[str, str], step: str = "clickable", timeout: Optional[float] = None) -> Any:
+        from selenium.webdriver.support import expected_conditions as EC
+
+        return self.until(EC.element_to_be_clickable(locator), step, timeout)
+
+    def js(self, predicate: str, step: str = "js", timeout: Optional[float] = None) -> Any:
+        return self.until(lambda d: d.execute_script(predicate), step, timeout)
+
+    def chart_ready(self, step: str = "chart ready", timeout: Optional[float] = None) -> Any:
+        return self.js(CHART_READY_JS, step, timeout)
+
+    def stale(self, element: Any, step: str = "stale", timeout: Optional[float] = None) -> Any:
+        from selenium.webdriver.support import expected_conditions as EC
+
+        return self.until(EC.staleness_of(element), step, timeout)
+
+    def text_changed(self, locator: Tuple[str, str], old_text: str, step: str = "text changed", timeout: Optional[float] = None) -> Any:
+        def _changed(d: Any) -> Any:
+            text = d.find_element(*locator).text
+            return text if text and text != old_text else None
+
+        return self.until(_changed, step, timeout)
+
+    def network_idle(self, quiet: float = 0.5, step: str = "network idle", timeout: Optional[float] = None) -> bool:
+        """资源请求计数在 quiet 秒内不再增长且文档已解析完成时视为空闲；超时不抛异常，返回 False。"""
+
+        state = {"count": -1, "since": time.monotonic()}
+
+        def _idle(d: Any) -> bool:
+            if d.execute_script("return document.readyState") == "loading":
+                return False
+            count = d.execute_script(_RESOURCE_COUNT_JS)
+            now = time.monotonic()
+            if count != state["count"]:
+                state["count"], state["since"] = count, now
+                return False
+            return now - state["since"] >= quiet
+
+        return bool(self.until(_idle, step, timeout, raise_on_timeout=False))
+
+    def report(self) -> Dict[str, float]:
+        """输出本页各步骤耗时并返回 {step: seconds}。"""
+
+        total = time.monotonic() - self.started
+        steps = {step: round(sec, 3) for step, sec, _ in self.timings}
+        slow = [f"{step}={sec:.2f}s{'' if ok else '(timeout)'}" for step, sec, ok in self.timings]
+        logger.info("%s waits: %s; page total %.2fs", self.label, ", ".join(slow) or "none", total)
+        return steps
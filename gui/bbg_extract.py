@@ -10,6 +10,14 @@ from selenium.webdriver.support.ui import WebDriverWait
 
 logger = logging.getLogger(__name__)
 
+# 在页面内取 __NEXT_DATA__ 中的文章正文，按原结构包装返回；没有文章数据时返回 null
+_STORY_BODY_JS = (
+    "var d = window.__NEXT_DATA__;"
+    "var story = d && d.props && d.props.pageProps && d.props.pageProps.story;"
+    "if (!story || !story.body) { return null; }"
+    "return {props: {pageProps: {story: {body: {content: story.body.content || []}}}}};"
+)
+
 class BloombergExtractor:
     def __init__(self, url : str):
         # 不在此处传入 URL，使实例可以复用
@@ -54,10 +62,10 @@ class BloombergExtractor:
 
     def _fetch_bbg_article(self, driver : webdriver.chrome):
         """
-        获取 Bloomberg 文章的完整 JSON 数据（__NEXT_DATA__）
+        获取 Bloomberg 文章正文的 JSON 数据（__NEXT_DATA__ 中的 story.body，保持原嵌套结构）
         Args: bbg_url: Bloomberg 文章的 URL
         Returns:
-            True, dict  成功时返回完整 JSON 数据
+            True, dict  成功时返回正文 JSON 数据（页面没有文章数据时为 None）
             False, dict("error": err_text)  失败时返回错误说明
         """
         try:
@@ -67,9 +75,8 @@ class BloombergExtractor:
             WebDriverWait(driver, 10).until(
                 lambda d: d.execute_script("return document.readyState") == "complete"
             )
-            article_dict : dict = driver.execute_script(
-                "return window.__NEXT_DATA__"  # Bloomberg用Next.js
-            )
+            # Bloomberg用Next.js；只把正文部分传回 Python，不序列化整个 __NEXT_DATA__
+            article_dict : dict = driver.execute_script(_STORY_BODY_JS)
             return True, article_dict
 
         except Exception as e:
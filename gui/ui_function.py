@@ -17,7 +17,11 @@ import pyqtgraph as pg
 import pandas as pd
 from PySide6.QtCore import QTimer
 
-from downloaders.common import CancellationToken, CancelledError
+from downloaders.common import CancellationToken, CancelledError, DatabaseConverter, reset_retry_state, save_concurrency_state, throttle_stats
+from downloaders.browser import shutdown_driver_pool
+from downloaders.impersonate import close_impersonated_sessions
+from downloaders.playwright_engine import shutdown_playwright_engine
+from refresh_planner import RefreshPlanner, planner_enabled
 
 from gui import *
 from gui.bbg_extract import BloombergExtractor
@@ -83,7 +87,7 @@ class _DownloadWorker(QObject):
     finished = Signal()
     failed = Signal(str)
 
-    def __init__(self, json_data: Dict[str, Any], start_year: int, download_all: bool, selected_sources: Optional[list[str]] | None = None, main_window: Optional[_MainWindowProto] = None):
+    def __init__(self, json_data: Dict[str, Any], start_year: int, download_all: bool, selected_sources: Optional[list[str]] | None = None, main_window: Optional[_MainWindowProto] = None, parallel: bool = False, max_workers: int = 1):
         super().__init__()
         self._json_data = json_data
         self._start_year = start_year
@@ -92,10 +96,52 @@ class _DownloadWorker(QObject):
         self._selected_sources = selected_sources or []
         self.main_window = main_window
         self._cancel_token = CancellationToken()
+        self._parallel = parallel
+        self._max_workers = max(1, int(max_workers))
+        self._pool = None
 
     def cancel(self):
         self._is_cancelled = True
         self._cancel_token.cancel()
+        pool = self._pool
+        if pool is not None:
+            pool.cancel()  # 并行模式：直接结束忙碌中的 worker 进程
+
+    def _want_csv(self) -> bool:
+        return bool(self.main_window and hasattr(self.main_window, "download_csv_check") and self.main_window.download_csv_check.isChecked())
+
+    def _run_with_pool(self, sources: list[str], json_data: Dict[str, Any], planner: Any = None) -> None:
+        """并行模式：各数据源在常驻 worker 进程中执行，父进程单线程写库。"""
+        from worker_pool import SourceJob, WorkerPool
+
+        want_csv = self._want_csv()
+        jobs = [SourceJob(src, json_data, self._start_year, return_csv=want_csv) for src in sources]
+
+        def on_event(event: str, job: Any, payload: Dict[str, Any]) -> None:
+            if event == "started":
+                self.progress.emit(f"Downloading {job.source} data to local (pid={payload.get('pid')})...")
+            elif event == "progress":
+                self.progress.emit(f"{job.source}: {payload.get('message', '')}")
+            elif event == "done":
+                self.progress.emit(f"{job.source} done ({payload['elapsed_seconds']:.1f}s, {payload['series']} series).")
+                if planner is not None:
+                    planner.mark_source_fetched(job.source, json_data)
+            elif event == "failed":
+                self.progress.emit(f"{job.source} failed: {payload.get('error')}")
+            elif event == "cancelled":
+                self.progress.emit(f"{job.source} cancelled.")
+
+        self._pool = WorkerPool(size=min(self._max_workers, len(jobs)), process_tag="worker")
+        try:
+            self._pool.run(
+                jobs,
+                on_event=on_event,
+                cancel_token=self._cancel_token,
+                write_listeners=[planner.record_write] if planner is not None else None,
+            )
+        finally:
+            self._pool.shutdown()
+            self._pool = None
 
     def run(self):
         try:
@@ -127,55 +173,100 @@ class _DownloadWorker(QObject):
                 self.finished.emit()
                 return
 
-            for src in sources:
-                if self._is_cancelled:
-                    self.progress.emit("Cancelled by user.")
-                    break
-                if not _backend_available:
-                    # 模拟下载进度
-                    try:
-                        import time
-                        for i in range(5):
-                            if self._is_cancelled:
-                                break
-                            self.progress.emit(f"{src}: mock step {i+1}/5...")
-                            time.sleep(0.3)
-                        self.progress.emit(f"{src} done (mock).")
-                    except Exception as e:
-                        self.progress.emit(f"{src} mock failed: {e}")
-                    continue
+            # 刷新计划：只下载按发布日历到期的序列（REFRESH_PLANNER=false 时全量下载）
+            json_data = self._json_data
+            planner = None
+            if _backend_available and planner_enabled():
+                planner = RefreshPlanner()
+                json_data, due = planner.plan(self._json_data, sources, self._start_year)
+                skipped = [s for s in sources if s not in due]
+                if skipped:
+                    self.progress.emit(f"Up to date, skipped: {', '.join(skipped)}")
+                sources = [s for s in sources if s in due]
+                if not sources:
+                    self.progress.emit("All series are up to date. Nothing to do.")
+                    return
 
-                self.progress.emit(f"Creating downloader for: {src}...")
-                downloader = DownloaderFactory.create_downloader(  # type: ignore[reportUnknownMemberType]
-                    source=src,
-                    json_data=self._json_data,
-                    request_year=self._start_year,
-                )
-                if downloader is None:
-                    self.progress.emit(f"Skip {src}: no downloader available.")
-                    continue
-                self.progress.emit(f"Downloading {src} data to local...")
+            if self._parallel and _backend_available:
                 try:
-                    # 优先判断 download_csv_check 是否被选中
-                    if self.main_window and hasattr(self.main_window, "download_csv_check") and self.main_window.download_csv_check.isChecked():
-                        self.progress.emit(f"Exporting {src} data to CSV...")
-                        downloader.to_db(return_csv=True, cancel_token=self._cancel_token)
-                    else:
-                        downloader.to_db(return_csv=False, cancel_token=self._cancel_token)
-                    self.progress.emit(f"{src} done.")
-                except CancelledError:
-                    self._is_cancelled = True
-                    self.progress.emit(f"{src} cancelled.")
-                    break
-                except Exception as e:
-                    self.progress.emit(f"{src} failed: {e}")
-                    continue
+                    self._run_with_pool(sources, json_data, planner)
+                finally:
+                    if planner is not None:
+                        planner.save()
+                if self._cancel_token.cancelled():
+                    self.progress.emit("Cancelled by user.")
+                return
+
+            if planner is not None:
+                DatabaseConverter.write_listeners.append(planner.record_write)
+            reset_retry_state()
+            try:
+                self._run_sequential(sources, json_data, planner, _backend_available, DownloaderFactory)
+                throttled = throttle_stats()
+                if throttled:
+                    self.progress.emit(f"Server throttling observed: {throttled}")
+            finally:
+                save_concurrency_state()
+                close_impersonated_sessions()
+                shutdown_driver_pool()
+                shutdown_playwright_engine()
+                if planner is not None:
+                    DatabaseConverter.write_listeners.remove(planner.record_write)
+                    planner.save()
         except Exception as e:
             self.failed.emit(str(e))
             return
         finally:
             self.finished.emit()
 
+    def _run_sequential(self, sources: list[str], json_data: Dict[str, Any], planner: Any, _backend_available: bool, DownloaderFactory: Any) -> None:
+        """串行模式：在当前线程依次执行各数据源（原有流程）。"""
+        for src in sources:
+            if self._is_cancelled:
+                self.progress.emit("Cancelled by user.")
+                break
+            if not _backend_available:
+                # 模拟下载进度
+                try:
+                    import time
+                    for i in range(5):
+                        if self._is_cancelled:
+                            break
+                        self.progress.emit(f"{src}: mock step {i+1}/5...")
+                        time.sleep(0.3)
+                    self.progress.emit(f"{src} done (mock).")
+                except Exception as e:
+                    self.progress.emit(f"{src} mock failed: {e}")
+                continue
+
+            self.progress.emit(f"Creating downloader for: {src}...")
+            downloader = DownloaderFactory.create_downloader(  # type: ignore[reportUnknownMemberType]
+                source=src,
+                json_data=json_data,
+                request_year=self._start_year,
+            )
+            if downloader is None:
+                self.progress.emit(f"Skip {src}: no downloader available.")
+                continue
+            self.progress.emit(f"Downloading {src} data to local...")
+            try:
+                # 优先判断 download_csv_check 是否被选中
+                if self._want_csv():
+                    self.progress.emit(f"Exporting {src} data to CSV...")
+                    downloader.to_db(return_csv=True, cancel_token=self._cancel_token)
+                else:
+                    downloader.to_db(return_csv=False, cancel_token=self._cancel_token)
+                self.progress.emit(f"{src} done.")
+                if planner is not None:
+                    planner.mark_source_fetched(src, json_data)
+            except CancelledError:
+                self._is_cancelled = True
+                self.progress.emit(f"{src} cancelled.")
+                break
+            except Exception as e:
+                self.progress.emit(f"{src} failed: {e}")
+                continue
+
 
 class UiFunctions():  # 删除:mainWindow
     def __init__(self, main_window: _MainWindowProto):
@@ -1446,7 +1537,9 @@ class UiFunctions():  # 删除:mainWindow
                 start_year=start_year,
                 download_all=download_all_bool,
                 selected_sources=sources,
-                main_window=self.main_window
+                main_window=self.main_window,
+                parallel=True,
+                max_workers=max_threads,
             )
             self._dl_thread = QThread()
             self._worker.moveToThread(self._dl_thread)
@@ -7,29 +7,21 @@
 
 备注：
 - 若需要在无界面模式测试下载逻辑，可参考底部注释的示例使用 `DownloaderFactory`。
+- worker 进程池以 spawn 方式启动子进程，子进程会以 `__mp_main__` 重新导入本模块；
+  PySide6 与各 GUI 窗口只在 `main()` / 需要时导入，worker 不承担界面的导入时间与内存。
 """
 
 import json
 import logging
+import multiprocessing
 import sys
 import threading
 import traceback
 from types import TracebackType
 from typing import Any, Dict, Optional
 from pathlib import Path
-from PySide6.QtWidgets import QApplication, QMessageBox
-from PySide6.QtCore import QEvent, QObject, QTimer, Qt
-from gui.ui_mainwindow import mainWindow
-from downloaders import DownloaderFactory  # type: ignore  # 示例引用，避免静态检查器误报未使用
 from logging_config import start_logging, stop_logging
-from gui.ui_prestart_window import Prestart_ui
-
-SMART_QUOTES_MAP = {
-    '\u201c': '"', '\u201d': '"',  # 左/右双引号
-    '\u2018': "'", '\u2019': "'",  # 左/右单引号
-    '\u2013': '-',  '\u2014': '-',   # 短/长破折号
-    '\u00a0': ' ',                    # 不换行空格
-}
+from request_config import _load_json_raw
 
 
 def _format_exception(
@@ -41,6 +33,9 @@ def _format_exception(
 
 
 def _show_exception_dialog(summary: str, detail: str) -> None:
+    from PySide6.QtCore import QTimer
+    from PySide6.QtWidgets import QApplication, QMessageBox
+
     app = QApplication.instance()
     if app is None:
         sys.stderr.write(detail)
@@ -88,46 +83,25 @@ def _install_global_exception_handlers() -> None:
         threading.excepthook = _thread_hook  # type: ignore[attr-defined]
 
 
-class SafeApplication(QApplication):
-    """安全包装 QApplication，捕获事件循环中的未处理异常。"""
-
-    def notify(self, receiver: QObject, event: QEvent) -> bool:  # type: ignore[override]
-        try:
-            return super().notify(receiver, event)
-        except Exception:  # noqa: BLE001
-            exc_type, exc_value, exc_traceback = sys.exc_info()
-            if exc_type is None or exc_value is None:
-                raise
-            _handle_uncaught_exception(exc_type, exc_value, exc_traceback)
-            return False
-
-
-def _normalize_smart_chars(text: str) -> str:
-    for k, v in SMART_QUOTES_MAP.items():
-        if k in text:
-            text = text.replace(k, v)
-    return text
-
-def _load_json_raw(path: Path) -> Optional[Dict[str, Any]]:
-    """底层读取函数：多编码尝试 + 智能字符清洗。"""
-    if not path.exists():
-        logging.error("read_json ERROR: file not found: %s", path)
-        return None
-    raw = path.read_bytes()
-    tried_encodings = ['utf-8', 'utf-8-sig', 'cp1252', 'gbk']  # cp1252 兼容 0x93, 最后尝试 gbk 以便日志更友好
-    last_err: Optional[Exception] = None
-    for enc in tried_encodings:
-        try:
-            text = raw.decode(enc)
-            if enc != 'utf-8':
-                logging.warning("read_json: decoded with fallback encoding=%s", enc)
-            text = _normalize_smart_chars(text)
-            return json.loads(text)
-        except Exception as e:  # noqa: BLE001
-            last_err = e
-            continue
-    logging.error("read_json FAILED: all encodings tried %s, last_err=%s", tried_encodings, last_err)
-    return None
+def _create_application() -> Any:
+    from PySide6.QtCore import QEvent, QObject
+    from PySide6.QtWidgets import QApplication
+
+    class SafeApplication(QApplication):
+        """安全包装 QApplication，捕获事件循环中的未处理异常。"""
+
+        def notify(self, receiver: QObject, event: QEvent) -> bool:  # type: ignore[override]
+            try:
+                return super().notify(receiver, event)
+            except Exception:  # noqa: BLE001
+                exc_type, exc_value, exc_traceback = sys.exc_info()
+                if exc_type is None or exc_value is None:
+                    raise
+                _handle_uncaught_exception(exc_type, exc_value, exc_traceback)
+                return False
+
+    return SafeApplication([])
+
 
 def read_json() -> Dict[str, Any]:
     """读取 `request_id.json`，带编码回退与智能字符清洗。
@@ -143,10 +117,14 @@ def read_json() -> Dict[str, Any]:
     return data
 
 
-if __name__ == "__main__":
+def main() -> None:
+    from PySide6.QtCore import QTimer, Qt
+    from gui.ui_mainwindow import mainWindow
+    from gui.ui_prestart_window import Prestart_ui
+
     try:
         _install_global_exception_handlers()
-        app = SafeApplication([])
+        app = _create_application()
 
         # 先显示预启动窗口
         prestart_window = Prestart_ui()
@@ -159,7 +137,7 @@ if __name__ == "__main__":
 
         # 初始化日志和配置
         start_logging(process_tag="gui")
-        json_data: Dict[str, Any] = read_json()
+        json_data: Dict[str, Any] = read_json()  # noqa: F841  # 预先读取并记录配置
 
         # 使用定时器延迟创建主窗口
         def load_main_window():
@@ -177,6 +155,12 @@ if __name__ == "__main__":
         stop_logging()
 
 
+if __name__ == "__main__":
+    # 打包为 exe 后，worker 进程池（spawn）需要此调用才能正确启动子进程
+    multiprocessing.freeze_support()
+    main()
+
+
 
 
 
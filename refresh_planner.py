@@ -0,0 +1,205 @@
+"""按发布日历筛选待刷新序列的刷新计划器。
+
+多数月度/季度序列只在发布日变化，每次全量下载 ~110 个序列是浪费。计划器为每个序列记录：
+- 观测周期（从历史观测日期间隔推断，或取自配置 `freq`）；
+- 发布滞后（观察到新观测值时，距该观测日期的最短天数）；
+- 最近一次抓取时间与最新观测日期。
+
+据此给出「当前时间下到期的序列」，GUI 的 `_DownloadWorker` 与 `cli.py` 只下载这一子集。
+状态保存在 `cache/refresh_plan.json`，纯标准库实现，不依赖 pandas。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import statistics
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PLAN_FILE = Path(__file__).resolve().parent / "cache" / "refresh_plan.json"
+
+# 只产出 CSV 表格、不写入 Time_Series 的数据源：下载成功即视为该来源全部条目已刷新
+TABLE_SOURCES = frozenset({"ism", "fw", "dfm", "nyf", "cin", "em", "fs"})
+
+# 频率代码 -> 周期天数（BEA 配置中的 freq）
+FREQ_PERIOD_DAYS: Dict[str, float] = {
+    "D": 1, "W": 7, "BW": 14, "M": 30.4, "Q": 91.3, "SA": 182.6, "A": 365.2,
+}
+
+_MAX_LAGS = 6          # 保留的发布滞后样本数
+_HISTORY_WINDOW = 25   # 推断周期时使用的最近观测数量
+
+
+def _env_hours(name: str, default: float) -> float:
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+def _parse_day(s: str) -> date:
+    return datetime.strptime(str(s)[:10], "%Y-%m-%d").date()
+
+
+class RefreshPlanner:
+    """记录各序列的发布节奏与抓取时间，并据此挑选到期序列。
+
+    - 到达预期发布时间后，按 `PLANNER_POLL_HOURS`（默认 12 小时）轮询直到出现新观测；
+    - 距上次抓取超过一个周期（最多 31 天）时也会强制刷新，以捕获修订值；
+    - 请求的起始年份早于上次写入范围时，该序列视为到期。
+    """
+
+    def __init__(self, path: Path = PLAN_FILE) -> None:
+        self.path: Path = Path(path)
+        self.poll_interval = timedelta(hours=_env_hours("PLANNER_POLL_HOURS", 12.0))
+        self._lock = threading.Lock()
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    # ---- 持久化 ----
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._state = data
+        except FileNotFoundError:
+            self._state = {}
+        except Exception as e:
+            logger.warning("refresh plan unreadable, starting fresh: %s", e)
+            self._state = {}
+
+    def save(self) -> None:
+        with self._lock:
+            payload = json.dumps(self._state, indent=1, ensure_ascii=False)
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(payload, encoding="utf-8")
+            os.replace(tmp, self.path)
+        except Exception as e:
+            logger.error("Failed to save refresh plan %s: %s", self.path, e)
+
+    # ---- 记录 ----
+    def record_write(self, data_name: str, obs_dates: List[str], start_date: Optional[str] = None, fetched_at: Optional[datetime] = None) -> None:
+        """写库监听回调：记录一次成功抓取及其观测日期（`DatabaseConverter.write_listeners`）。"""
+
+        fetched_at = fetched_at or datetime.now()
+        days = sorted({_parse_day(d) for d in obs_dates if d})
+        with self._lock:
+            entry = self._state.setdefault(data_name, {})
+            entry["last_fetch"] = fetched_at.isoformat(timespec="seconds")
+            if start_date:
+                prev_start = entry.get("start_date")
+                entry["start_date"] = min(prev_start, str(start_date)) if prev_start else str(start_date)
+            if not days:
+                return
+            recent = days[-_HISTORY_WINDOW:]
+            if len(recent) >= 3:
+                gaps = [(b - a).days for a, b in zip(recent, recent[1:])]
+                entry["period_days"] = float(statistics.median(gaps))
+            last_obs = days[-1]
+            prev_obs = entry.get("last_obs")
+            if prev_obs and last_obs > _parse_day(prev_obs):
+                # 观测到新一期发布：发布时间不晚于本次抓取，滞后取样本最小值（偏早轮询）
+                lags = list(entry.get("release_lags", []))
+                lags.append(max(0, (fetched_at.date() - last_obs).days))
+                entry["release_lags"] = lags[-_MAX_LAGS:]
+            entry["last_obs"] = last_obs.isoformat()
+
+    def mark_fetched(self, data_names: Iterable[str], fetched_at: Optional[datetime] = None) -> None:
+        """无观测日期的数据（表格类来源）只记录抓取时间。"""
+
+        stamp = (fetched_at or datetime.now()).isoformat(timespec="seconds")
+        with self._lock:
+            for name in data_names:
+                self._state.setdefault(name, {})["last_fetch"] = stamp
+
+    # ---- 判断 ----
+    def _period_days(self, entry: Dict[str, Any], config: Dict[str, Any]) -> float:
+        if entry.get("period_days"):
+            return float(entry["period_days"])
+        freq = str(config.get("freq", "")).upper()
+        return FREQ_PERIOD_DAYS.get(freq, 1.0)
+
+    def is_due(self, data_name: str, config: Dict[str, Any], start_date: Optional[str] = None, now: Optional[datetime] = None) -> Tuple[bool, str]:
+        """返回 (是否到期, 原因)。"""
+
+        now = now or datetime.now()
+        with self._lock:
+            entry = dict(self._state.get(data_name, {}))
+        last_fetch_s = entry.get("last_fetch")
+        if not last_fetch_s:
+            return True, "never fetched"
+        if start_date and entry.get("start_date") and str(start_date) < entry["start_date"]:
+            return True, "earlier start year requested"
+        last_fetch = datetime.fromisoformat(last_fetch_s)
+        period = self._period_days(entry, config)
+        since_fetch = now - last_fetch
+        if since_fetch >= timedelta(days=min(max(period, 1.0), 31.0)):
+            return True, "max age reached"
+        last_obs_s = entry.get("last_obs")
+        if not last_obs_s:
+            # 表格类来源：没有观测日期，按周期刷新
+            return False, "fresh"
+        lags = entry.get("release_lags") or []
+        lag = min(lags) if lags else 0
+        expected = datetime.combine(_parse_day(last_obs_s), datetime.min.time()) + timedelta(days=period + lag)
+        if now >= expected and since_fetch >= min(self.poll_interval, timedelta(days=period)):
+            return True, f"release expected since {expected:%Y-%m-%d}"
+        return False, f"next release ~{expected:%Y-%m-%d}"
+
+    def plan(self, json_data: Dict[str, Any], sources: Iterable[str], request_year: int, now: Optional[datetime] = None) -> Tuple[Dict[str, Any], Dict[str, List[str]]]:
+        """筛选到期条目。
+
+        Returns:
+            (planned_json, due) —— planned_json 只保留到期条目（结构与 request_id.json 相同）；
+            due 为 {source: [到期的 table key]}，不含无到期条目的来源。
+        """
+
+        now = now or datetime.now()
+        start_date = f"{request_year}-01-01"
+        planned: Dict[str, Any] = {}
+        due: Dict[str, List[str]] = {}
+        for source in sources:
+            config = json_data.get(source)
+            if not isinstance(config, dict):
+                continue
+            picked = {}
+            for table_key, table_cfg in config.items():
+                if not isinstance(table_cfg, dict):
+                    continue
+                name = str(table_cfg.get("name", table_key))
+                ok, reason = self.is_due(name, table_cfg, start_date=start_date, now=now)
+                logger.debug("plan %s/%s due=%s (%s)", source, name, ok, reason)
+                if ok:
+                    picked[table_key] = table_cfg
+            if picked:
+                if source in TABLE_SOURCES:
+                    # 表格类来源一次下载覆盖全部条目，保留完整配置
+                    picked = dict(config)
+                planned[source] = picked
+                due[source] = list(picked)
+        total = sum(len(v) for v in due.values())
+        logger.info("refresh plan: %d entries due across %d sources", total, len(due))
+        return planned, due
+
+    def mark_source_fetched(self, source: str, json_data: Dict[str, Any]) -> None:
+        """表格类来源下载成功后调用，记录其全部条目的抓取时间。"""
+
+        if source not in TABLE_SOURCES:
+            return
+        config = json_data.get(source)
+        if isinstance(config, dict):
+            self.mark_fetched(str(cfg.get("name", key)) for key, cfg in config.items() if isinstance(cfg, dict))
+
+
+def planner_enabled() -> bool:
+    """环境变量 REFRESH_PLANNER=false 可关闭按计划刷新（恢复全量下载）。"""
+
+    return os.environ.get("REFRESH_PLANNER", "true").strip().lower() not in ("0", "false", "no")
@@ -0,0 +1,44 @@
+"""`request_id.json` 读取工具（无 GUI 依赖，供 GUI 与命令行共用）。"""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+SMART_QUOTES_MAP = {
+    '\u201c': '"', '\u201d': '"',  # 左/右双引号
+    '\u2018': "'", '\u2019': "'",  # 左/右单引号
+    '\u2013': '-',  '\u2014': '-',   # 短/长破折号
+    '\u00a0': ' ',                    # 不换行空格
+}
+
+
+def _normalize_smart_chars(text: str) -> str:
+    for k, v in SMART_QUOTES_MAP.items():
+        if k in text:
+            text = text.replace(k, v)
+    return text
+
+
+def _load_json_raw(path: Path) -> Optional[Dict[str, Any]]:
+    """底层读取函数：多编码尝试 + 智能字符清洗。"""
+    if not path.exists():
+        logging.error("read_json ERROR: file not found: %s", path)
+        return None
+    raw = path.read_bytes()
+    tried_encodings = ['utf-8', 'utf-8-sig', 'cp1252', 'gbk']  # cp1252 兼容 0x93, 最后尝试 gbk 以便日志更友好
+    last_err: Optional[Exception] = None
+    for enc in tried_encodings:
+        try:
+            text = raw.decode(enc)
+            if enc != 'utf-8':
+                logging.warning("read_json: decoded with fallback encoding=%s", enc)
+            text = _normalize_smart_chars(text)
+            return json.loads(text)
+        except Exception as e:  # noqa: BLE001
+            last_err = e
+            continue
+    logging.error("read_json FAILED: all encodings tried %s, last_err=%s", tried_encodings, last_err)
+    return None
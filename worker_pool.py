@@ -0,0 +1,517 @@
+"""常驻 worker 进程池（基于 `worker_run_source.py`）。
+
+与「每个数据源启动一次 `worker_run_source.py`」相比：
+- worker 进程启动后只导入一次 pandas / yfinance / selenium / beaapi，之后循环复用；
+- 任务通过 Pipe 下发，进度事件与解析结果（紧凑的 NumPy 数组）经同一 Pipe 回传；
+- 父进程只有一个写线程负责写 SQLite，避免多进程同时写库；
+- 取消即强制结束进程（kill），不依赖下载器内部的协作式取消；
+- 解析在各自进程中执行，CPU 密集的来源可以真正并行，不受 GIL 限制。
+
+模块本身不导入 pandas/PySide6，父进程仅在收到第一帧时才加载写库所需依赖。
+"""
+from __future__ import annotations
+
+import itertools
+import logging
+import multiprocessing as mp
+import os
+import queue
+import threading
+import time
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 连续多少个 worker 在发送 ready 之前退出后停止重启，并让待执行任务直接失败
+MAX_STARTUP_FAILURES = 3
+
+# 事件回调签名：on_event(event, job, payload)
+EventCallback = Callable[[str, "SourceJob", Dict[str, Any]], None]
+
+_job_ids = itertools.count(1)
+
+
+def default_pool_size() -> int:
+    """默认进程数：可由环境变量 POOL_WORKERS 覆盖，否则取 min(4, cpu)。"""
+
+    env_workers = os.environ.get("POOL_WORKERS")
+    if env_workers and env_workers.isdigit() and int(env_workers) > 0:
+        return int(env_workers)
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def pack_frame(df: Any, data_name: str) -> Dict[str, Any]:
+    """把规范化后的序列压成两个紧凑数组：int32 天数 + float64 数值。
+
+    写库接收器收到的是 `CompactSeries`（直接取其数组）；(date, value) DataFrame 也仍然接受。
+    """
+
+    from downloaders.series import CompactSeries
+
+    if isinstance(df, CompactSeries):
+        return df.to_payload()
+    return CompactSeries.from_frame(df, data_name).to_payload()
+
+
+def unpack_frame(payload: Dict[str, Any], data_name: str) -> Any:
+    """`pack_frame` 的逆操作，还原为 write_into_db 可直接写入的 `CompactSeries`。"""
+
+    from downloaders.series import CompactSeries
+
+    return CompactSeries.from_payload(data_name, payload)
+
+
+class SourceJob:
+    """一个数据源下载任务。json_data 为完整的 request_id.json 内容。"""
+
+    def __init__(self, source: str, json_data: Dict[str, Any], request_year: int, return_csv: bool = False) -> None:
+        self.job_id: int = next(_job_ids)
+        self.source: str = source
+        self.json_data: Dict[str, Any] = json_data
+        self.request_year: int = request_year
+        self.return_csv: bool = return_csv
+
+    def to_message(self) -> Dict[str, Any]:
+        # 只下发该来源自己的配置，减小 Pipe 传输量
+        return {
+            "job_id": self.job_id,
+            "source": self.source,
+            "json_data": {self.source: self.json_data.get(self.source, {})},
+            "request_year": self.request_year,
+        }
+
+
+class JobResult:
+    """单个任务的执行结果（耗时、写入行数、失败原因等）。"""
+
+    def __init__(self, job: SourceJob) -> None:
+        self.job: SourceJob = job
+        self.ok: bool = False
+        self.cancelled: bool = False
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.elapsed: float = 0.0
+        self.frames: int = 0
+        self.rows: int = 0
+        self.http_cache: Optional[Dict[str, Any]] = None
+        self.throttle: Optional[Dict[str, Any]] = None
+        self.write_errors: List[str] = []
+        # 已落库的序列名与起始日期（任务结束时据此导出 CSV）
+        self.written: List[str] = []
+        self.start_date: Optional[str] = None
+        # 收到 done/failed 后记录结束消息，写线程写完该任务之前的全部帧后才结束任务
+        self.final: Optional[Dict[str, Any]] = None
+        self.settled: bool = False
+
+    def csv_items(self) -> List[tuple]:
+        """(文件名, 列名) 列表：文件以配置键命名，与进程内 `PipelineDownloader.to_db` 的导出一致。"""
+
+        config = self.job.json_data.get(self.job.source, {})
+        keys = {cfg.get("name"): key for key, cfg in config.items() if isinstance(cfg, dict)} if isinstance(config, dict) else {}
+        return [(keys.get(name, name), name) for name in self.written]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": self.job.source,
+            "ok": self.ok,
+            "cancelled": self.cancelled,
+            "error": self.error,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "series": self.frames,
+            "rows": self.rows,
+            "http_cache": self.http_cache,
+            "throttle": self.throttle,
+        }
+
+
+class _WorkerHandle:
+    """父进程侧对单个 worker 进程的引用。"""
+
+    def __init__(self, process: Any, conn: Connection) -> None:
+        self.process = process
+        self.conn = conn
+        self.ready: bool = False
+        self.job: Optional[SourceJob] = None
+        self.fatal: Optional[str] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.process.is_alive()
+
+    def kill(self) -> None:
+        try:
+            self.process.kill()
+            self.process.join(timeout=5)
+        except Exception:
+            pass
+        try:
+            self.conn.close()
+        except Exception:
+            pass
+
+
+class _FrameWriter(threading.Thread):
+    """父进程中唯一的写库线程：按到达顺序把各 worker 回传的帧写入 SQLite。
+
+    任务的 done/failed 到达后，调度循环向队列追加该任务的结束标记；同一 Pipe 上帧先于结束消息到达，
+    写线程处理到标记时该任务的帧已全部落库，于是按需导出 CSV 并把任务放入 `settled`，
+    由调度循环取出并结束。调度循环本身从不等待写库。
+    """
+
+    def __init__(self, write_listeners: Optional[List[Callable[..., None]]] = None) -> None:
+        super().__init__(name="pool-db-writer", daemon=True)
+        self.frames: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=256)
+        self.settled: "queue.Queue[JobResult]" = queue.Queue()
+        # 写库监听者（如刷新计划器）只在首次写库时挂到 DatabaseConverter 上，结束时移除
+        self.write_listeners: List[Callable[..., None]] = list(write_listeners or [])
+
+    def submit(self, result: JobResult, frame: Dict[str, Any]) -> None:
+        self.frames.put((result, frame))
+
+    def finish(self, result: JobResult, msg: Dict[str, Any]) -> None:
+        """记录任务的结束消息，并在该任务已排队的帧之后追加结束标记。"""
+
+        result.final = msg
+        self.frames.put((result, None))
+
+    @staticmethod
+    def _settle_job(result: JobResult) -> None:
+        if not (result.job.return_csv and result.written):
+            return
+        try:
+            # 每个任务导出一次，文件名与宽表与进程内模式相同；CSV 默认在后台线程中从数据库流式导出
+            from downloaders.csv_export import export_store_csv
+
+            export_store_csv(result.csv_items(), result.start_date, wide_name=result.job.source)
+        except Exception as e:
+            logger.error("CSV export for %s failed: %s", result.job.source, e)
+
+    def run(self) -> None:
+        converter: Any = None
+        try:
+            while True:
+                item = self.frames.get()
+                try:
+                    if item is None:
+                        return
+                    result, frame = item
+                    if frame is None:
+                        self._settle_job(result)
+                        self.settled.put(result)
+                        continue
+                    data_name = frame.get("data_name")
+                    try:
+                        if converter is None:
+                            from downloaders.common import DatabaseConverter
+
+                            DatabaseConverter.write_listeners.extend(self.write_listeners)
+                            converter = DatabaseConverter()
+                        df = unpack_frame(frame, data_name)
+                        out = converter.write_into_db(
+                            df=df,
+                            data_name=data_name,
+                            start_date=frame["start_date"],
+                            is_time_series=True,
+                            is_pct_data=frame["is_pct_data"],
+                            overwrite_existing=frame["overwrite_existing"],
+                            only_fill_null=frame["only_fill_null"],
+                            ack=frame.get("ack"),  # 落库成功后执行（如推进 FRED 探测水位）
+                        )
+                        if out is None:
+                            # write_into_db 内部已记录原因
+                            result.write_errors.append(str(data_name))
+                            continue
+                        result.frames += 1
+                        result.rows += len(df)
+                        result.written.append(data_name)
+                        result.start_date = result.start_date or frame["start_date"]
+                    except Exception as e:
+                        logger.error("pool writer failed for %s: %s", data_name, e)
+                        result.write_errors.append(str(data_name))
+                finally:
+                    self.frames.task_done()
+        finally:
+            if converter is not None:
+                for listener in self.write_listeners:
+                    try:
+                        type(converter).write_listeners.remove(listener)
+                    except ValueError:
+                        pass
+
+
+class WorkerPool:
+    """常驻 worker 进程池。
+
+    用法::
+
+        with WorkerPool(size=4) as pool:
+            results = pool.run([SourceJob("fred", json_data, 2020)], on_event=print_event)
+
+    - `run` 会阻塞直到所有任务完成、失败或被取消；
+    - `cancel()` 可在任意线程调用：强制结束忙碌中的进程，空闲进程保留复用。
+    """
+
+    def __init__(self, size: Optional[int] = None, process_tag: str = "worker") -> None:
+        self.size: int = size or default_pool_size()
+        self.process_tag: str = process_tag
+        self._ctx = mp.get_context("spawn")
+        self._workers: List[_WorkerHandle] = []
+        self._cancel_event = threading.Event()
+        self._lock = threading.Lock()
+        # 未发送 ready 就退出的 worker 计数（导入失败等），达到上限后不再重启
+        self._startup_failures: int = 0
+        self._startup_error: Optional[str] = None
+
+    # ---- 生命周期 ----
+    def __enter__(self) -> "WorkerPool":
+        self.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.shutdown()
+
+    def start(self) -> None:
+        """预先拉起全部 worker 进程（它们会在后台并行完成导入预热）。"""
+
+        with self._lock:
+            self._workers = [w for w in self._workers if w.alive]
+            while len(self._workers) < self.size:
+                self._workers.append(self._spawn())
+
+    def _spawn(self) -> _WorkerHandle:
+        from worker_run_source import serve
+
+        parent_conn, child_conn = self._ctx.Pipe(duplex=True)
+        process = self._ctx.Process(
+            target=serve,
+            args=(child_conn, self.process_tag),
+            name="source-worker",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()
+        logger.info("worker pool spawned pid=%s", process.pid)
+        return _WorkerHandle(process, parent_conn)
+
+    def shutdown(self) -> None:
+        """通知所有进程退出；超时未退出的直接 kill。"""
+
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for w in workers:
+            try:
+                w.conn.send(None)
+            except Exception:
+                pass
+        for w in workers:
+            w.process.join(timeout=3)
+            if w.process.is_alive():
+                w.kill()
+            else:
+                try:
+                    w.conn.close()
+                except Exception:
+                    pass
+
+    def cancel(self) -> None:
+        """硬取消：正在执行任务的进程会在 run() 的下一次轮询中被 kill。"""
+
+        self._cancel_event.set()
+
+    # ---- 调度 ----
+    def run(
+        self,
+        jobs: Iterable[SourceJob],
+        on_event: Optional[EventCallback] = None,
+        cancel_token: Any = None,
+        write_listeners: Optional[List[Callable[..., None]]] = None,
+    ) -> List[JobResult]:
+        """执行一批任务，返回与输入同序的结果列表。
+
+        write_listeners 会在父进程写库成功后被调用（签名同 `DatabaseConverter.write_listeners`）。
+        """
+
+        self._cancel_event.clear()
+        self._startup_failures = 0
+        self._startup_error = None
+        job_list = list(jobs)
+        results: Dict[int, JobResult] = {job.job_id: JobResult(job) for job in job_list}
+        pending: List[SourceJob] = list(job_list)
+        if not pending:
+            return []
+
+        def emit(event: str, job: SourceJob, payload: Dict[str, Any]) -> None:
+            if on_event is None:
+                return
+            try:
+                on_event(event, job, payload)
+            except Exception as e:
+                logger.warning("worker pool event callback failed: %s", e)
+
+        self.start()
+        writer = _FrameWriter(write_listeners)
+        writer.start()
+        try:
+            while pending or any(w.job is not None for w in self._workers) or self._settling(results):
+                self._settle(writer, emit)
+                if pending and not self._workers:
+                    # 所有 worker 都在启动阶段失败且已停止重启：剩余任务直接失败
+                    error = self._startup_error or "worker processes failed to start"
+                    for job in pending:
+                        result = results[job.job_id]
+                        result.error = error
+                        result.settled = True
+                        emit("failed", job, result.to_dict())
+                    pending.clear()
+                    continue
+                if self._cancel_event.is_set() or (cancel_token is not None and cancel_token.cancelled()):
+                    self._kill_busy(results, emit)
+                    for job in pending:
+                        results[job.job_id].cancelled = True
+                        results[job.job_id].error = "cancelled"
+                    pending.clear()
+                    break
+
+                # 把待执行任务派发给已完成预热的空闲进程
+                for w in self._workers:
+                    if pending and w.ready and w.job is None and w.alive:
+                        job = pending.pop(0)
+                        try:
+                            w.conn.send(job.to_message())
+                        except Exception as e:
+                            logger.error("failed to dispatch %s: %s", job.source, e)
+                            pending.insert(0, job)
+                            self._replace(w)
+                            continue
+                        w.job = job
+                        results[job.job_id].started_at = time.perf_counter()
+                        emit("started", job, {"pid": w.process.pid})
+
+                conns = [w.conn for w in self._workers]
+                sentinels = [w.process.sentinel for w in self._workers]
+                for ready in wait(conns + sentinels, timeout=0.2):
+                    handle = self._find(ready)
+                    if handle is None:
+                        continue
+                    if ready is handle.conn:
+                        self._drain(handle, results, writer, emit)
+                    elif not handle.alive:
+                        self._drain(handle, results, writer, emit)
+                        self._on_died(handle, results, writer, emit)
+        finally:
+            writer.frames.put(None)
+            writer.join()
+            self._settle(writer, emit)
+
+        ordered = [results[job.job_id] for job in job_list]
+        for job_result in ordered:
+            emit("finished", job_result.job, job_result.to_dict())
+        return ordered
+
+    @staticmethod
+    def _settling(results: Dict[int, JobResult]) -> bool:
+        """是否还有已收到结束消息、但帧尚未全部落库的任务。"""
+
+        return any(r.final is not None and not r.settled for r in results.values())
+
+    def _settle(self, writer: _FrameWriter, emit: EventCallback) -> None:
+        """结束写线程已确认全部落库的任务（在调度循环中调用，不阻塞）。"""
+
+        while True:
+            try:
+                result = writer.settled.get_nowait()
+            except queue.Empty:
+                return
+            self._complete(result, emit)
+
+    def _complete(self, result: JobResult, emit: EventCallback) -> None:
+        msg = result.final or {}
+        result.settled = True
+        result.ok = msg.get("event") == "done" and not result.write_errors
+        result.error = msg.get("error")
+        if result.write_errors and result.error is None:
+            result.error = f"failed to write {len(result.write_errors)} series: {', '.join(result.write_errors)}"
+        result.http_cache = msg.get("http_cache")
+        result.throttle = msg.get("throttle")
+        result.elapsed = time.perf_counter() - (result.started_at or time.perf_counter())
+        emit("done" if result.ok else "failed", result.job, result.to_dict())
+
+    def _find(self, obj: Any) -> Optional[_WorkerHandle]:
+        for w in self._workers:
+            if obj is w.conn or obj == w.process.sentinel:
+                return w
+        return None
+
+    def _drain(self, handle: _WorkerHandle, results: Dict[int, JobResult], writer: _FrameWriter, emit: EventCallback) -> None:
+        """读取该进程已到达的全部消息。"""
+
+        try:
+            while handle.conn.poll():
+                msg = handle.conn.recv()
+                self._dispatch(handle, msg, results, writer, emit)
+        except (EOFError, OSError):
+            pass
+
+    def _dispatch(self, handle: _WorkerHandle, msg: Dict[str, Any], results: Dict[int, JobResult], writer: _FrameWriter, emit: EventCallback) -> None:
+        kind = msg.get("event")
+        if kind == "ready":
+            handle.ready = True
+            self._startup_failures = 0
+            return
+        if kind == "fatal":
+            handle.fatal = msg.get("error")
+            logger.error("worker pid=%s cannot start: %s", handle.process.pid, handle.fatal)
+            return
+        job = handle.job
+        if job is None or msg.get("job_id") != job.job_id:
+            return
+        result = results[job.job_id]
+        if kind == "frame":
+            writer.submit(result, msg)
+            emit("progress", job, {"message": f"{msg['data_name']} parsed ({len(msg['days'])} rows)"})
+        elif kind == "progress":
+            emit("progress", job, {"message": msg.get("message", "")})
+        elif kind in ("done", "failed"):
+            # 进程已空闲，可以接收下一个任务；该任务在写线程处理完它的帧后才结束（见 _settle）
+            handle.job = None
+            writer.finish(result, msg)
+
+    def _on_died(self, handle: _WorkerHandle, results: Dict[int, JobResult], writer: _FrameWriter, emit: EventCallback) -> None:
+        job = handle.job
+        if job is not None:
+            handle.job = None
+            writer.finish(results[job.job_id], {
+                "event": "failed",
+                "error": f"worker process exited (code={handle.process.exitcode})",
+            })
+        respawn = True
+        if not handle.ready:
+            self._startup_failures += 1
+            self._startup_error = handle.fatal or f"worker process exited before ready (code={handle.process.exitcode})"
+            if self._startup_failures >= MAX_STARTUP_FAILURES:
+                respawn = False
+                logger.error("worker pool: %d workers failed to start, giving up: %s", self._startup_failures, self._startup_error)
+        self._replace(handle, respawn=respawn)
+
+    def _kill_busy(self, results: Dict[int, JobResult], emit: EventCallback) -> None:
+        for handle in list(self._workers):
+            job = handle.job
+            if job is None:
+                continue
+            handle.kill()
+            result = results[job.job_id]
+            result.cancelled = True
+            result.error = "cancelled"
+            result.elapsed = time.perf_counter() - (result.started_at or time.perf_counter())
+            emit("cancelled", job, result.to_dict())
+            handle.job = None
+            self._replace(handle, respawn=False)
+
+    def _replace(self, handle: _WorkerHandle, respawn: bool = True) -> None:
+        handle.kill()
+        with self._lock:
+            if handle in self._workers:
+                self._workers.remove(handle)
+            if respawn:
+                self._workers.append(self._spawn())
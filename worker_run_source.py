@@ -1,15 +1,129 @@
 """
 独立进程执行单个数据源的下载，便于父进程实现强制取消。
 用法: python worker_run_source.py <request_json_path> <start_year:int> <source:str> [--csv]
+
+`serve` 为常驻模式入口，由 `worker_pool.WorkerPool` 以子进程方式启动，循环处理 Pipe 下发的任务。
 """
 from __future__ import annotations
 
 import logging
 import sys
 import json
+import threading
+import time
+from typing import Any, Dict, Optional
 from logging_config import start_logging, stop_logging
 
 
+class _PipeLogHandler(logging.Handler):
+    """把下载器的 WARNING 及以上日志作为进度事件转发给父进程。"""
+
+    def __init__(self, send: Any) -> None:
+        super().__init__(level=logging.WARNING)
+        self._send = send
+        self.job_id: Optional[int] = None
+
+    def emit(self, record: logging.LogRecord) -> None:  # type: ignore[override]
+        if self.job_id is None or not record.name.startswith("downloaders"):
+            return
+        try:
+            self._send({"event": "progress", "job_id": self.job_id, "message": record.getMessage()})
+        except Exception:
+            pass
+
+
+def serve(conn: Any, process_tag: str = "worker") -> None:
+    """常驻 worker 主循环：预热导入一次后端，之后逐个执行父进程下发的任务。
+
+    消息协议（dict）：
+    - 父 -> 子：{"job_id", "source", "json_data", "request_year"}；None 表示退出
+    - 子 -> 父：ready / progress / frame / done / failed 事件；导入失败时发送 fatal 后退出
+    """
+    start_logging(process_tag=process_tag)
+    send_lock = threading.Lock()
+
+    def send(msg: Dict[str, Any]) -> None:
+        # 下载器内部为多线程，Connection 本身不是线程安全的
+        with send_lock:
+            conn.send(msg)
+
+    try:
+        # 预热：一次性导入重量级依赖，后续任务不再重复付出导入成本
+        from downloaders import DownloaderFactory  # type: ignore
+        from downloaders.common import DatabaseConverter, reset_retry_state, save_concurrency_state, throttle_stats
+        from downloaders.browser import shutdown_driver_pool
+        from downloaders.http_cache import get_http_cache
+        from downloaders.impersonate import close_impersonated_sessions
+        from downloaders.playwright_engine import shutdown_playwright_engine
+        from worker_pool import pack_frame
+    except Exception as e:
+        logging.error(f"Failed to import backend: {e}")
+        # 通知父进程本进程无法提供服务，避免其无限重启同样会失败的 worker
+        try:
+            send({"event": "fatal", "error": f"Failed to import backend: {e}"})
+        except Exception:
+            pass
+        stop_logging()
+        return
+
+    log_handler = _PipeLogHandler(send)
+    logging.getLogger().addHandler(log_handler)
+    send({"event": "ready"})
+
+    try:
+        while True:
+            try:
+                job = conn.recv()
+            except (EOFError, OSError):
+                break
+            if job is None:
+                break
+            job_id = job["job_id"]
+            source = job["source"]
+            log_handler.job_id = job_id
+
+            def frame_sink(df: Any, data_name: str, **kwargs: Any) -> None:
+                # 规范化后的帧以紧凑数组形式回传，由父进程的单一写线程落库
+                payload = pack_frame(df, data_name)
+                send({"event": "frame", "job_id": job_id, "data_name": data_name, **kwargs, **payload})
+                return None
+
+            DatabaseConverter.frame_sink = frame_sink
+            # 每个任务独立的重试预算与熔断状态
+            reset_retry_state()
+            http_cache = get_http_cache()
+            if http_cache is not None:
+                http_cache.reset_stats()
+            t0 = time.perf_counter()
+            try:
+                downloader = DownloaderFactory.create_downloader(  # type: ignore[reportUnknownMemberType]
+                    source=source,
+                    json_data=job["json_data"],
+                    request_year=job["request_year"],
+                )
+                if downloader is None:
+                    send({"event": "failed", "job_id": job_id, "error": f"No downloader for {source}"})
+                    continue
+                # CSV 由父进程在写库后导出，这里只负责下载与解析
+                downloader.to_db(return_csv=False)  # type: ignore[reportUnknownMemberType]
+                logging.info("%s finished in worker (%.3fs)", source, time.perf_counter() - t0)
+                send({"event": "done", "job_id": job_id, "http_cache": http_cache.stats() if http_cache is not None else None, "throttle": throttle_stats()})
+            except Exception as e:
+                logging.error(f"{source} failed: {e}")
+                send({"event": "failed", "job_id": job_id, "error": str(e), "http_cache": http_cache.stats() if http_cache is not None else None, "throttle": throttle_stats()})
+            finally:
+                DatabaseConverter.frame_sink = None
+                log_handler.job_id = None
+                save_concurrency_state()
+                close_impersonated_sessions()
+    finally:
+        # 驱动池在同一工作进程的多个任务间复用浏览器，进程退出前统一关闭
+        shutdown_driver_pool()
+        shutdown_playwright_engine()
+        logging.getLogger().removeHandler(log_handler)
+        stop_logging()
+
+
 def main() -> int:
     if len(sys.argv) < 4:
         logging.error("Usage: worker_run_source.py <request_json_path> <start_year:int> <source> [--csv]")
@@ -52,6 +166,10 @@ def main() -> int:
             return 5
         # 修改: 传递 return_csv 参数
         downloader.to_db(return_csv=return_csv)  # type: ignore[reportUnknownMemberType]
+        if return_csv:
+            from downloaders.csv_export import shutdown_csv_export
+
+            shutdown_csv_export()  # 进程退出前等待后台 CSV 导出完成
         return 0
     except Exception as e:
         logging.error(f"{source} failed: {e}")